@@ -0,0 +1,91 @@
+"""Compares the legacy Model.predict inference path with the traced fast path.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_inference --iterations 500
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from config import Config
+from handlers.model_handler import ModelHandler
+from handlers.model_registry import LoadedModel
+
+
+def legacy(model: LoadedModel, inputs: np.ndarray):
+    input_tensor = tf.constant([inputs], dtype=tf.float32)
+    predictions = model.engine.model.predict(input_tensor, verbose=0)
+    return tf.nn.softmax(predictions).numpy()[0]
+
+def fast(model: LoadedModel, inputs: np.ndarray):
+    return model.engine(inputs[np.newaxis])[0][0]
+
+async def load_default_models(model_handler: ModelHandler) -> Tuple[LoadedModel, LoadedModel]:
+    await model_handler.load_models()
+    return await model_handler.registry.get(task="static"), await model_handler.registry.get(task="dynamic")
+
+def measure(fn: Callable, model: LoadedModel, inputs: np.ndarray, iterations: int) -> Dict[str, float]:
+    fn(model, inputs[0])
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(model, inputs[i % len(inputs)])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.asarray(timings)
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "mean_ms": float(timings.mean())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    if Config.INFERENCE_BACKEND != "keras":
+        parser.error("The legacy path needs the Keras models; run with INFERENCE_BACKEND=keras.")
+
+    model_handler = ModelHandler()
+    static_model, dynamic_model = asyncio.run(load_default_models(model_handler))
+
+    rng = np.random.default_rng(0)
+    static_inputs = rng.random((64, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+    dynamic_inputs = rng.random((16, Config.NUM_FRAMES_VIDEO, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+
+    max_diff = max(
+        float(np.abs(legacy(static_model, x) - fast(static_model, x)).max()) for x in static_inputs[:8]
+    )
+
+    results = {
+        "static": {
+            "legacy": measure(legacy, static_model, static_inputs, args.iterations),
+            "fast_path": measure(fast, static_model, static_inputs, args.iterations)
+        },
+        "dynamic": {
+            "legacy": measure(legacy, dynamic_model, dynamic_inputs, args.iterations),
+            "fast_path": measure(fast, dynamic_model, dynamic_inputs, args.iterations)
+        },
+        "static_max_abs_diff": max_diff
+    }
+
+    print(f"{'model':<10}{'path':<12}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for model_name in ("static", "dynamic"):
+        for path_name, stats in results[model_name].items():
+            print(f"{model_name:<10}{path_name:<12}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+    print(f"Max abs probability difference (static): {max_diff:.2e}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measures hit rate and accuracy drift of the static prediction cache.
+
+Replays synthetic "held pose" streams (a base hand shape plus per-frame
+jitter) through ModelHandler with and without the cache and reports how far
+the cached answers diverge from the uncached ones.
+
+Each pose is replayed first where it was generated, then --transforms more
+times translated and scaled about the wrist. Frames of the same shape at
+another position or scale must not be served an answer cached for the
+original unless the model itself is position- and scale-invariant. These
+frames are therefore reported separately.
+
+Exits non-zero when class agreement or confidence drift falls outside the
+given bounds in either group.
+
+Run from the Backend directory:
+
+    python -m benchmarks.bench_prediction_cache --poses 50 --frames 30 --jitter 0.002
+"""
+import argparse
+import asyncio
+import sys
+
+import numpy as np
+
+from config import Config
+from handlers.model_handler import ModelHandler
+from handlers.prediction_cache import PredictionCache
+
+
+async def run(args) -> int:
+    model_handler = ModelHandler()
+    await model_handler.load_models()
+
+    rng = np.random.default_rng(args.seed)
+    base_poses = rng.random((args.poses, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+    streams, transformed = [], []
+    for pose in base_poses:
+        variants = [pose]
+        for _ in range(args.transforms):
+            points = pose.reshape(-1, 3)
+            scale = rng.uniform(1 - args.max_scale_change, 1 + args.max_scale_change)
+            offset = rng.uniform(-args.max_shift, args.max_shift, 3).astype(np.float32)
+            variants.append(((points - points[0]) * scale + points[0] + offset).reshape(-1).astype(np.float32))
+        for index, variant in enumerate(variants):
+            streams.append(np.repeat(variant[np.newaxis], args.frames, axis=0))
+            transformed.extend([index > 0] * args.frames)
+    frames = np.concatenate(streams)
+    frames += rng.normal(0.0, args.jitter, frames.shape).astype(np.float32)
+    transformed = np.array(transformed)
+
+    model_handler.static_cache = None
+    uncached = [await model_handler.predict_static_sign(frame) for frame in frames]
+
+    normalize = {"true": True, "false": False}.get(args.normalize)
+    model_handler.static_cache = PredictionCache(grid_size=args.grid_size, normalize=normalize)
+    cached = [await model_handler.predict_static_sign(frame) for frame in frames]
+
+    agrees = np.array([a["index"] == b["index"] for a, b in zip(uncached, cached)])
+    drift = np.abs(np.array([a["confidence"] for a in uncached]) - np.array([b["confidence"] for b in cached]))
+    stats = model_handler.static_cache.stats()
+
+    print(f"Frames: {len(frames)}  grid size: {args.grid_size}  jitter: {args.jitter}  normalize: {args.normalize}")
+    print(f"Hit rate: {stats['hitRate']:.3f}  (hits={stats['hits']}, misses={stats['misses']}, evictions={stats['evictions']})")
+
+    failed = False
+    for label, group in (("held poses", ~transformed), ("translated/scaled poses", transformed)):
+        if not group.any():
+            continue
+        agreement = float(agrees[group].mean())
+        print(f"{label}: class agreement with uncached predictions {agreement:.4f}, "
+              f"confidence drift max={drift[group].max():.4f} mean={drift[group].mean():.4f}")
+        failed = failed or agreement < args.min_agreement or drift[group].max() > args.max_confidence_drift
+
+    await model_handler.shutdown()
+
+    if failed:
+        print("Cached predictions diverge beyond the allowed bounds.")
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--poses", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--jitter", type=float, default=0.002)
+    parser.add_argument("--grid-size", type=float, default=Config.PREDICTION_CACHE_GRID_SIZE)
+    parser.add_argument("--normalize", choices=("auto", "true", "false"), default=Config.PREDICTION_CACHE_NORMALIZE)
+    parser.add_argument("--transforms", type=int, default=3, help="Translated/scaled copies of each pose.")
+    parser.add_argument("--max-shift", type=float, default=0.2)
+    parser.add_argument("--max-scale-change", type=float, default=0.3)
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    parser.add_argument("--max-confidence-drift", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Drives concurrent load against the prediction, realtime and WebSocket paths.
+
+Without --url the app is started in this process on a free local port
+(uvicorn in a background thread, models loaded as at startup), so the
+reported memory includes the server. With --url an already-running server
+is used; pass --server-pid to also sample that process's memory.
+
+Scenarios (all with synthetic hand landmarks):
+
+    static     POST /api/predict-static-sign
+    dynamic    POST /api/predict-dynamic-sign
+    realtime   session create -> frames via POST /api/realtime/landmarks -> status -> end
+    websocket  one session per worker; each request sends a frame then a ping
+               and waits for the pong
+
+Each scenario reports throughput, p50/p95/p99 latency and errors. Results
+are written as JSON. With --baseline, the run fails (exit code 1) when a
+scenario's p95 latency rises, or its throughput falls, by more than
+--max-regression compared with the baseline file.
+
+Run from the Backend directory:
+
+    python -m benchmarks.load_test --concurrency 16 --duration 20 --output results.json
+    python -m benchmarks.load_test --url http://localhost:8000 --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+import websockets
+
+from config import Config
+from schemas.landmark_codec import LANDMARK_CONTENT_TYPE, encode_landmarks
+
+SCENARIOS = ("static", "dynamic", "realtime", "websocket")
+
+class LandmarkGenerator:
+    """Produces plausible hands: a fixed 21-point shape, moved, scaled and jittered per frame."""
+
+    def __init__(self, seed: int):
+        self.rng = np.random.default_rng(seed)
+        self.shape = self.rng.normal(0.0, 0.08, (21, 3)).astype(np.float32)
+        self.shape[0] = 0.0
+
+    def frame(self) -> np.ndarray:
+        wrist = np.array([self.rng.uniform(0.3, 0.7), self.rng.uniform(0.3, 0.7), 0.0], dtype=np.float32)
+        hand = wrist + self.shape * self.rng.uniform(0.8, 1.2) + self.rng.normal(0.0, 0.005, (21, 3))
+        return hand.astype(np.float32).reshape(-1)
+
+    def sequence(self, frames: int = Config.NUM_FRAMES_VIDEO) -> np.ndarray:
+        start, end = self.frame(), self.frame()
+        steps = np.linspace(0.0, 1.0, frames, dtype=np.float32)[:, np.newaxis]
+        return start + (end - start) * steps
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    timings = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "mean_ms": float(timings.mean())
+    }
+
+class LoadRunner:
+    def __init__(self, base_url: str, args):
+        self.base_url = base_url.rstrip("/")
+        self.args = args
+        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=args.timeout,
+                                        limits=httpx.Limits(max_connections=args.concurrency * 2))
+
+    def _body(self, frames: np.ndarray, field: str, single_frame: bool) -> Dict[str, Any]:
+        if self.args.binary:
+            return {
+                "content": encode_landmarks(frames[np.newaxis] if single_frame else frames),
+                "headers": {"Content-Type": LANDMARK_CONTENT_TYPE}
+            }
+        return {"json": {field: frames.tolist()}}
+
+    @staticmethod
+    def _check(response: httpx.Response):
+        response.raise_for_status()
+
+    async def _drive(self, make_worker: Callable[[int], Awaitable[Callable[[], Awaitable[None]]]],
+                     cleanup: Optional[Callable[[], Awaitable[None]]] = None) -> Dict[str, Any]:
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + self.args.duration
+        remaining = [self.args.requests] if self.args.requests else None
+
+        async def worker(index: int):
+            nonlocal errors
+            request = await make_worker(index)
+            while time.perf_counter() < deadline:
+                if remaining is not None:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                start = time.perf_counter()
+                try:
+                    await request()
+                    latencies.append(time.perf_counter() - start)
+                except Exception:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(self.args.concurrency)))
+        elapsed = time.perf_counter() - started
+        if cleanup is not None:
+            await cleanup()
+        return summarize(latencies, errors, elapsed)
+
+    async def static(self) -> Dict[str, Any]:
+        async def make_worker(index: int):
+            generator = LandmarkGenerator(self.args.seed + index)
+
+            async def request():
+                body = self._body(generator.frame(), "landmarks", single_frame=True)
+                self._check(await self.client.post("/api/predict-static-sign", **body))
+            return request
+        return await self._drive(make_worker)
+
+    async def dynamic(self) -> Dict[str, Any]:
+        async def make_worker(index: int):
+            generator = LandmarkGenerator(self.args.seed + index)
+
+            async def request():
+                body = self._body(generator.sequence(), "landmarkSequence", single_frame=False)
+                self._check(await self.client.post("/api/predict-dynamic-sign", **body))
+            return request
+        return await self._drive(make_worker)
+
+    async def realtime(self) -> Dict[str, Any]:
+        """One request is a full session lifecycle of --session-frames frames."""
+        async def make_worker(index: int):
+            generator = LandmarkGenerator(self.args.seed + index)
+
+            async def request():
+                response = await self.client.post("/api/realtime/session/create", json={"userId": f"load-{index}"})
+                self._check(response)
+                session_id = response.json()["sessionId"]
+                for _ in range(self.args.session_frames):
+                    frame = generator.frame()
+                    if self.args.binary:
+                        response = await self.client.post(
+                            "/api/realtime/landmarks", params={"sessionId": session_id},
+                            **self._body(frame, "landmarks", single_frame=True)
+                        )
+                    else:
+                        response = await self.client.post(
+                            "/api/realtime/landmarks", json={"sessionId": session_id, "landmarks": frame.tolist()}
+                        )
+                    self._check(response)
+                self._check(await self.client.get(f"/api/realtime/session/{session_id}/status"))
+                self._check(await self.client.post("/api/realtime/session/end", json={"sessionId": session_id}))
+            return request
+        return await self._drive(make_worker)
+
+    async def websocket(self) -> Dict[str, Any]:
+        connections = []
+        ws_base = "ws" + self.base_url[len("http"):]
+
+        async def make_worker(index: int):
+            generator = LandmarkGenerator(self.args.seed + index)
+            response = await self.client.post("/api/realtime/session/create", json={"userId": f"ws-load-{index}"})
+            self._check(response)
+            session_id = response.json()["sessionId"]
+            connection = await websockets.connect(f"{ws_base}/ws/realtime/sign/{session_id}", max_size=None)
+            connections.append((session_id, connection))
+            ping = json.dumps({"type": "ping"})
+
+            async def request():
+                frame = generator.frame()
+                if self.args.binary:
+                    await connection.send(encode_landmarks(frame[np.newaxis]))
+                else:
+                    await connection.send(json.dumps({"type": "landmarks", "landmarks": frame.tolist()}))
+                await connection.send(ping)
+                while True:
+                    message = json.loads(await connection.recv())
+                    if message.get("type") == "pong":
+                        return
+                    if message.get("type") == "error":
+                        raise RuntimeError(message.get("error"))
+            return request
+
+        async def cleanup():
+            for session_id, connection in connections:
+                await connection.close()
+                await self.client.post("/api/realtime/session/end", json={"sessionId": session_id})
+
+        return await self._drive(make_worker, cleanup)
+
+    async def run(self, scenarios: List[str], server_pid: Optional[int]) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        for name in scenarios:
+            memory_before = rss_mb(server_pid)
+            results[name] = await getattr(self, name)()
+            results[name]["rss_mb_before"] = memory_before
+            results[name]["rss_mb_after"] = rss_mb(server_pid)
+            stats = results[name]
+            print(f"{name:<10}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>11.1f}"
+                  f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                  f"{(stats['rss_mb_after'] or 0):>10.1f}")
+        await self.client.aclose()
+        return results
+
+def start_in_process_server() -> str:
+    import uvicorn
+    from main import app
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws="websockets"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("In-process server failed to start.")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for name, stats in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if not reference:
+            continue
+        if stats["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {stats['p95_ms']:.2f} ms vs baseline {reference['p95_ms']:.2f} ms")
+        if stats["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {stats['throughput_rps']:.1f} rps vs baseline {reference['throughput_rps']:.1f} rps"
+            )
+        if stats["errors"] > reference["errors"]:
+            regressions.append(f"{name}: {stats['errors']} errors vs baseline {reference['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server. Starts the app in-process when omitted.")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, to sample its memory.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario.")
+    parser.add_argument("--requests", type=int, default=0, help="Stop a scenario after this many requests (0 = duration only).")
+    parser.add_argument("--session-frames", type=int, default=30, help="Frames sent per realtime session.")
+    parser.add_argument("--binary", action="store_true", help="Send landmarks in the binary wire format.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--baseline", help="Fail when results regress past this earlier results file.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed fractional regression vs. the baseline.")
+    args = parser.parse_args()
+
+    in_process = args.url is None
+    base_url = args.url or start_in_process_server()
+    server_pid = None if in_process else args.server_pid
+
+    print(f"Target: {base_url}  concurrency: {args.concurrency}  duration: {args.duration}s  binary: {args.binary}")
+    print(f"{'scenario':<10}{'requests':>9}{'errors':>8}{'rps':>11}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'rss (MB)':>10}")
+    scenarios = asyncio.run(LoadRunner(base_url, args).run(args.scenarios, server_pid))
+
+    results = {
+        "timestamp": time.time(),
+        "target": "in-process" if in_process else base_url,
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "requests": args.requests,
+            "sessionFrames": args.session_frames,
+            "binary": args.binary,
+            "inferenceBackend": Config.INFERENCE_BACKEND if in_process else None,
+            "cpuCount": os.cpu_count()
+        },
+        "scenarios": scenarios
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        if regressions:
+            print("Regressions beyond the allowed threshold:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
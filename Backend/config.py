@@ -6,13 +6,29 @@ class Config:
     PORT = int(os.getenv("PORT", 8000))  
     HOST = os.getenv("HOST", "0.0.0.0")
 
+    # Per-prediction logs are at DEBUG. LOG_FORMAT is "json" (one object per line) or "text".
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+
     MODELS_DIR = os.path.join(BASE_DIR, "models")
 
-    H5_LANDMARK_MODEL_PATH = os.path.join(MODELS_DIR, "best_bisindo_landmark_model.h5")
-    H5_VIDEO_LSTM_MODEL_PATH = os.path.join(MODELS_DIR, "best_bisindo_video_lstm_model.h5")
+    # Model names, versions, files, class mappings and input shapes. The defaults are loaded
+    # at startup; other models load on first use and are unloaded after
+    # MODEL_IDLE_UNLOAD_SECONDS without traffic (0 keeps them loaded).
+    MODEL_MANIFEST_PATH = os.getenv("MODEL_MANIFEST_PATH", os.path.join(MODELS_DIR, "manifest.json"))
+    MODEL_IDLE_UNLOAD_SECONDS = float(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", 15 * 60))
+    MODEL_MANIFEST_POLL_SECONDS = float(os.getenv("MODEL_MANIFEST_POLL_SECONDS", 10))
+    # Required in the X-Admin-Token header for model management and debug routes. While it is
+    # unset those routes are refused.
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
-    IMAGE_CLASS_MAPPING_PATH = os.path.join(MODELS_DIR, "image_class_mapping.json")
-    VIDEO_CLASS_MAPPING_PATH = os.path.join(MODELS_DIR, "video_class_mapping.json")
+    # Stage-level request tracing (see profiling.py). PROFILING_MAX_TRACES_PER_SECOND caps header,
+    # sampled and per-session traces together; fractions such as 0.2 allow one every five seconds, 0 turns tracing off.
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+    PROFILING_MAX_TRACES_PER_SECOND = float(os.getenv("PROFILING_MAX_TRACES_PER_SECOND", 5))
+    PROFILING_TRACE_HISTORY = int(os.getenv("PROFILING_TRACE_HISTORY", 200))
+    PROFILING_SESSION_TTL_SECONDS = float(os.getenv("PROFILING_SESSION_TTL_SECONDS", 10 * 60))
+    PROFILING_CPROFILE_TOP_N = int(os.getenv("PROFILING_CPROFILE_TOP_N", 40))
 
     IMAGE_HEIGHT = 224
     IMAGE_WIDTH = 224
@@ -26,14 +42,117 @@ class Config:
 
     MAX_FILE_SIZE_MB = 50
     MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+    # Files older than the retention age are swept, then the oldest files until each
+    # directory is under its quota. 0 disables either rule.
+    UPLOAD_RETENTION_HOURS = float(os.getenv("UPLOAD_RETENTION_HOURS", 24 * 7))
+    UPLOADS_QUOTA_MB = float(os.getenv("UPLOADS_QUOTA_MB", 5 * 1024))
+    TEMP_RETENTION_HOURS = float(os.getenv("TEMP_RETENTION_HOURS", 1))
+    TEMP_QUOTA_MB = float(os.getenv("TEMP_QUOTA_MB", 1024))
+    STORAGE_SWEEP_INTERVAL_S = float(os.getenv("STORAGE_SWEEP_INTERVAL_S", 600))
+    # Upload temp files written to within this window are treated as in progress by the sweep.
+    UPLOAD_TEMP_GRACE_SECONDS = float(os.getenv("UPLOAD_TEMP_GRACE_SECONDS", 900))
+    # Allowance for multipart boundaries and form fields on top of the file size limits.
+    UPLOAD_MULTIPART_OVERHEAD_BYTES = int(os.getenv("UPLOAD_MULTIPART_OVERHEAD_BYTES", 64 * 1024))
     ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/jpg", "image/png"]
     ALLOWED_VIDEO_TYPES = ["video/mp4", "video/avi", "video/quicktime"]
+    ALLOWED_VIDEO_EXTENSIONS = [".mp4", ".avi", ".mov"]
+
+    HAND_DETECTION_MIN_CONFIDENCE = float(os.getenv("HAND_DETECTION_MIN_CONFIDENCE", 0.5))
+    HAND_DETECTOR_POOL_SIZE = int(os.getenv("HAND_DETECTOR_POOL_SIZE", 2))
+    MAX_IMAGE_BATCH_ITEMS = int(os.getenv("MAX_IMAGE_BATCH_ITEMS", 16))
+    MAX_IMAGE_SIZE_MB = 10
+    MAX_IMAGE_SIZE_BYTES = MAX_IMAGE_SIZE_MB * 1024 * 1024
+
+    # Video recognition jobs: frames are sampled down to VIDEO_JOB_SAMPLE_FPS (0 keeps every
+    # frame), so one NUM_FRAMES_VIDEO window spans about two seconds at the default of 15.
+    VIDEO_JOB_WORKERS = int(os.getenv("VIDEO_JOB_WORKERS", 2))
+    VIDEO_JOB_MAX_QUEUED = int(os.getenv("VIDEO_JOB_MAX_QUEUED", 100))
+    VIDEO_JOB_MAX_RETAINED = int(os.getenv("VIDEO_JOB_MAX_RETAINED", 500))
+    VIDEO_JOB_SAMPLE_FPS = float(os.getenv("VIDEO_JOB_SAMPLE_FPS", 15))
+    VIDEO_JOB_WINDOW_STRIDE = int(os.getenv("VIDEO_JOB_WINDOW_STRIDE", 10))
+    VIDEO_JOB_MIN_HAND_FRAMES = int(os.getenv("VIDEO_JOB_MIN_HAND_FRAMES", 10))
+    VIDEO_JOB_READ_CHUNK_FRAMES = int(os.getenv("VIDEO_JOB_READ_CHUNK_FRAMES", 32))
+    VIDEO_JOB_BATCH_SIZE = int(os.getenv("VIDEO_JOB_BATCH_SIZE", 32))
+    # With the redis session store, job snapshots are kept there under VIDEO_JOB_STORE_PREFIX so
+    # any worker can answer for a job; each snapshot expires VIDEO_JOB_RETENTION_S after its
+    # last update.
+    VIDEO_JOB_STORE_PREFIX = os.getenv("VIDEO_JOB_STORE_PREFIX", "artisign:videojob:")
+    VIDEO_JOB_RETENTION_S = int(os.getenv("VIDEO_JOB_RETENTION_S", 24 * 60 * 60))
 
-    REALTIME_SESSION_TIMEOUT_MS = 60 * 60 * 1000
+    REALTIME_SESSION_TIMEOUT_MS = int(os.getenv("REALTIME_SESSION_TIMEOUT_MS", 60 * 60 * 1000))
+    REALTIME_MAX_SESSIONS = int(os.getenv("REALTIME_MAX_SESSIONS", 10000))
+    REALTIME_SESSION_MEMORY_BUDGET_MB = float(os.getenv("REALTIME_SESSION_MEMORY_BUDGET_MB", 256))
+    REALTIME_CLEANUP_MAX_INTERVAL_S = float(os.getenv("REALTIME_CLEANUP_MAX_INTERVAL_S", 60))
     REALTIME_STABLE_FRAME_THRESHOLD = 5
     REALTIME_MOVEMENT_THRESHOLD = 0.03
     REALTIME_MIN_SEQUENCE_FRAMES = 15
     REALTIME_CONFIDENCE_THRESHOLD = 0.5
+    # "stable" runs the static model only on stable poses and votes before emitting a letter;
+    # "always" runs it on every frame.
+    REALTIME_STATIC_GATING = os.getenv("REALTIME_STATIC_GATING", "stable")
+    REALTIME_STATIC_VOTE_FRAMES = int(os.getenv("REALTIME_STATIC_VOTE_FRAMES", 3))
+    # Name of an LSTM model from the manifest to run one frame at a time per session while the
+    # hand moves, publishing rolling "dynamicPrediction" updates and committing the word from the
+    # streamed state when the motion ends. Empty keeps the re-run of the buffered sequence, as does
+    # a model whose file is missing (the "lstm" entry's .h5 is not shipped in models/).
+    REALTIME_STREAMING_MODEL = os.getenv("REALTIME_STREAMING_MODEL", "")
+    REALTIME_STREAMING_TOP_K = int(os.getenv("REALTIME_STREAMING_TOP_K", 3))
+
+    # Number of server worker processes (gunicorn reads the same variable). More than one
+    # needs the redis session store, which also holds video jobs.
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+    # "memory" keeps sessions inside one worker; "redis" shares them across workers and nodes.
+    # SESSION_STORE_URL may be "fakeredis://" to use an in-process stand-in for local development
+    # (fakeredis comes from requirements-dev.txt and is only imported for that URL).
+    SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")
+    SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "redis://localhost:6379/0")
+    SESSION_STORE_PREFIX = os.getenv("SESSION_STORE_PREFIX", "artisign:session:")
+    # Frames of one session are processed one at a time, across workers for the redis backend.
+    # A frame gives up after SESSION_LOCK_WAIT_S; a lock whose holder died expires after
+    # SESSION_LOCK_TIMEOUT_S.
+    SESSION_LOCK_WAIT_S = float(os.getenv("SESSION_LOCK_WAIT_S", 5))
+    SESSION_LOCK_TIMEOUT_S = float(os.getenv("SESSION_LOCK_TIMEOUT_S", 10))
+
+    # "keras" runs the .h5 models through a traced TensorFlow graph; "tflite" runs the
+    # converted models from TFLITE_MODELS_DIR (see tools/convert_tflite.py); "numpy" runs
+    # Dense-only .h5 models as NumPy matrix products without TensorFlow. "auto" (the default)
+    # uses the "engine" a model version names in the manifest and "keras" for the rest; any
+    # other value applies to every model, overriding the manifest.
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "auto")
+    TFLITE_MODELS_DIR = os.path.join(MODELS_DIR, "tflite")
+    TFLITE_MODEL_VARIANT = os.getenv("TFLITE_MODEL_VARIANT", "float16")
+    TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", 1))
+
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 32))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 5))
+    INFERENCE_THREAD_POOL_SIZE = int(os.getenv("INFERENCE_THREAD_POOL_SIZE", 2))
+    INFERENCE_MAX_CONCURRENT_BATCHES = int(os.getenv("INFERENCE_MAX_CONCURRENT_BATCHES", 2))
+    INFERENCE_MAX_QUEUE_SIZE = int(os.getenv("INFERENCE_MAX_QUEUE_SIZE", 1024))
+    INFERENCE_BULK_BATCH_SIZE = int(os.getenv("INFERENCE_BULK_BATCH_SIZE", 256))
+    MAX_PREDICTION_BATCH_ITEMS = int(os.getenv("MAX_PREDICTION_BATCH_ITEMS", 5000))
+
+    TEXT_TO_SIGN_TOKEN_CACHE_SIZE = int(os.getenv("TEXT_TO_SIGN_TOKEN_CACHE_SIZE", 10000))
+    TEXT_TO_SIGN_MAX_SENTENCE_CHARS = int(os.getenv("TEXT_TO_SIGN_MAX_SENTENCE_CHARS", 2000))
+    MAX_TEXT_TO_SIGN_BULK_ITEMS = int(os.getenv("MAX_TEXT_TO_SIGN_BULK_ITEMS", 1000))
+    # Cap on a JSON bulk body, which is parsed whole; text/plain bodies stream and are not capped.
+    MAX_TEXT_TO_SIGN_BULK_MB = int(os.getenv("MAX_TEXT_TO_SIGN_BULK_MB", 5))
+    MAX_TEXT_TO_SIGN_BULK_BYTES = MAX_TEXT_TO_SIGN_BULK_MB * 1024 * 1024
+
+    # Static frames first go through the nearest-centroid stage named by "cascade" in the model
+    # manifest (built by tools/build_cascade.py). It answers when its top-2 probability margin is
+    # at least STATIC_CASCADE_MIN_MARGIN; other frames go to the full model.
+    # STATIC_CASCADE_AUDIT_RATE of the answered frames also run the full model to track agreement.
+    STATIC_CASCADE_ENABLED = os.getenv("STATIC_CASCADE_ENABLED", "true").lower() == "true"
+    STATIC_CASCADE_MIN_MARGIN = float(os.getenv("STATIC_CASCADE_MIN_MARGIN", 0.5))
+    STATIC_CASCADE_AUDIT_RATE = float(os.getenv("STATIC_CASCADE_AUDIT_RATE", 0.02))
+
+    PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+    PREDICTION_CACHE_CAPACITY = int(os.getenv("PREDICTION_CACHE_CAPACITY", 4096))
+    PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 300))
+    PREDICTION_CACHE_GRID_SIZE = float(os.getenv("PREDICTION_CACHE_GRID_SIZE", 0.02))
+    # "auto" normalizes cache keys only for models that take normalized landmarks, so poses the
+    # model tells apart by position or scale never share an entry; "true"/"false" force it.
+    PREDICTION_CACHE_NORMALIZE = os.getenv("PREDICTION_CACHE_NORMALIZE", "auto").lower()
 
     @staticmethod
     def create_dirs():
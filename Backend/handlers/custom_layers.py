@@ -0,0 +1,44 @@
+import numpy as np
+import tensorflow as tf
+
+class PositionalEncoding(tf.keras.layers.Layer):
+    """Sinusoidal positional encoding used by the video transformer model.
+
+    Mirrors the layer defined in ml-workspace/Artisign_notebook.ipynb so the
+    saved .h5 model can be deserialized.
+    """
+
+    def __init__(self, position, d_model, **kwargs):
+        super().__init__(**kwargs)
+        self.position = position
+        self.d_model = d_model
+        self.pos_encoding = self.positional_encoding(self.position, self.d_model)
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({
+            'position': self.position,
+            'd_model': self.d_model,
+        })
+        return config
+
+    def positional_encoding(self, position, d_model):
+        angle_rads = self.get_angles(np.arange(position)[:, np.newaxis],
+                                     np.arange(d_model)[np.newaxis, :],
+                                     d_model)
+        angle_rads[:, 0::2] = np.sin(angle_rads[:, 0::2])
+        angle_rads[:, 1::2] = np.cos(angle_rads[:, 1::2])
+        pos_encoding = angle_rads[np.newaxis, ...]
+        return tf.cast(pos_encoding, dtype=tf.float32)
+
+    def get_angles(self, pos, i, d_model):
+        angle_rates = 1 / np.power(10000, (2 * (i // 2)) / np.float32(d_model))
+        return pos * angle_rates
+
+    def call(self, inputs):
+        seq_len = tf.shape(inputs)[1]
+        return inputs + self.pos_encoding[:, :seq_len, :]
+
+CUSTOM_OBJECTS = {
+    "PositionalEncoding": PositionalEncoding
+}
@@ -0,0 +1,95 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from fastapi import HTTPException
+
+from config import Config
+from logger import get_logger
+from handlers.landmark_extractor import HandsPool, extract_hand_landmarks
+from schemas.image_form import ImagePart
+
+logger = get_logger(__name__)
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+class ImageSignHandler:
+    """Extracts hand landmarks from uploaded images on the server and classifies them.
+
+    Images arrive as in-memory parts from ``read_image_form`` and are decoded
+    without touching disk. Landmark extraction runs on a small
+    thread pool sized to a pool of static-image MediaPipe detectors, so
+    detectors are created once and reused. Classification goes through the
+    regular static prediction path, so concurrent images share batches and
+    the prediction cache.
+    """
+
+    def __init__(self, model_handler, pool_size: int = Config.HAND_DETECTOR_POOL_SIZE):
+        self.model_handler = model_handler
+        self.hands_pool = HandsPool(pool_size, static_image_mode=True)
+        self.executor = ThreadPoolExecutor(max_workers=self.hands_pool.size, thread_name_prefix="hands")
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.hands_pool.close()
+
+    def _detect(self, data: bytes) -> Tuple[Optional[np.ndarray], Dict[str, float]]:
+        timings = {}
+        start = time.perf_counter()
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        timings["decodeMs"] = _elapsed_ms(start)
+        if image is None:
+            raise ValueError("Could not decode image.")
+
+        start = time.perf_counter()
+        with self.hands_pool.acquire() as hands:
+            landmarks = extract_hand_landmarks(hands, image)
+        timings["landmarksMs"] = _elapsed_ms(start)
+        return landmarks, timings
+
+    def _check(self, part: ImagePart):
+        if part.content_type not in Config.ALLOWED_IMAGE_TYPES:
+            raise ValueError(f"Invalid file type: {part.content_type}. Allowed types: {', '.join(Config.ALLOWED_IMAGE_TYPES)}")
+        if part.too_large:
+            raise ValueError(f"Image too large. Max size is {Config.MAX_IMAGE_SIZE_MB}MB.")
+
+    async def predict_image(self, part: ImagePart) -> Dict[str, Any]:
+        total_start = time.perf_counter()
+        item: Dict[str, Any] = {"filename": part.filename, "success": False}
+        timings: Dict[str, float] = {}
+        try:
+            self._check(part)
+            landmarks, detect_timings = await asyncio.get_running_loop().run_in_executor(self.executor, self._detect, bytes(part.data))
+            timings.update(detect_timings)
+
+            if landmarks is None:
+                item["error"] = "No hand detected."
+            else:
+                start = time.perf_counter()
+                item["result"] = await self.model_handler.predict_static_sign(landmarks)
+                timings["inferenceMs"] = _elapsed_ms(start)
+                item["landmarks"] = landmarks.tolist()
+                item["success"] = True
+        except HTTPException as e:
+            item["error"] = str(e.detail)
+        except ValueError as e:
+            item["error"] = str(e)
+        except Exception as e:
+            logger.error(f"Error extracting landmarks from {part.filename}:", e)
+            item["error"] = f"Landmark extraction failed: {e}"
+
+        timings["totalMs"] = _elapsed_ms(total_start)
+        item["timings"] = timings
+        return item
+
+    async def predict_images(self, parts: List[ImagePart]) -> List[Dict[str, Any]]:
+        if not parts:
+            raise HTTPException(status_code=400, detail="No image provided.")
+
+        results = await asyncio.gather(*(self.predict_image(part) for part in parts))
+        logger.info(f"Image sign prediction: images={len(parts)}, detected={sum(item['success'] for item in results)}")
+        return results
@@ -0,0 +1,202 @@
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+# TensorFlow is imported only by the engines that need it, so processes serving
+# NumPy engines alone never load it.
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exponents = np.exp(shifted)
+    return exponents / exponents.sum(axis=-1, keepdims=True)
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "softmax": softmax
+}
+
+def activation(name: str, layer_name: str) -> Callable[[np.ndarray], np.ndarray]:
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Activation '{name}' of layer {layer_name} is not supported by the NumPy engines.")
+    return ACTIVATIONS[name]
+
+class KerasEngine:
+    """Runs a Keras model through a traced graph that fuses the forward pass, softmax and argmax."""
+    name = "keras"
+
+    def __init__(self, model, input_shape: Tuple[int, ...]):
+        import tensorflow as tf
+
+        self.model = model
+        self.input_shape = input_shape
+
+        @tf.function(input_signature=[tf.TensorSpec(shape=(None, *input_shape), dtype=tf.float32)])
+        def fast_path(inputs):
+            probabilities = tf.nn.softmax(model(inputs, training=False))
+            return probabilities, tf.argmax(probabilities, axis=-1, output_type=tf.int32)
+
+        self.fast_path = fast_path
+
+    def __call__(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        probabilities, indices = self.fast_path(batch)
+        return probabilities.numpy(), indices.numpy()
+
+class TFLiteEngine:
+    """Runs a converted ``.tflite`` model with the TFLite interpreter.
+
+    Interpreters are not thread-safe, so each inference thread lazily gets its
+    own. The input tensor is resized only when the batch size changes.
+    Quantized (int8) inputs and outputs are converted using the tensor's own
+    scale and zero point, so float32, float16 and int8 variants are
+    interchangeable.
+    """
+    name = "tflite"
+
+    def __init__(self, model_path: str, input_shape: Tuple[int, ...], num_threads: int = Config.TFLITE_NUM_THREADS):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"TFLite model not found at {model_path}. Run `python -m tools.convert_tflite` to generate it."
+            )
+        self.model_path = model_path
+        self.input_shape = input_shape
+        self.num_threads = num_threads
+        self._local = threading.local()
+
+    def _interpreter(self):
+        state = getattr(self._local, "state", None)
+        if state is None:
+            import tensorflow as tf
+
+            interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+            interpreter.allocate_tensors()
+            state = {
+                "interpreter": interpreter,
+                "input": interpreter.get_input_details()[0],
+                "output": interpreter.get_output_details()[0],
+                "batch_size": None
+            }
+            self._local.state = state
+        return state
+
+    def __call__(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        state = self._interpreter()
+        interpreter = state["interpreter"]
+        input_details = state["input"]
+
+        if state["batch_size"] != len(batch):
+            interpreter.resize_tensor_input(input_details["index"], [len(batch), *self.input_shape])
+            interpreter.allocate_tensors()
+            state["input"] = input_details = interpreter.get_input_details()[0]
+            state["output"] = interpreter.get_output_details()[0]
+            state["batch_size"] = len(batch)
+
+        inputs = np.asarray(batch, dtype=np.float32)
+        if input_details["dtype"] != np.float32:
+            scale, zero_point = input_details["quantization"]
+            inputs = np.clip(np.round(inputs / scale + zero_point), -128, 127).astype(input_details["dtype"])
+        interpreter.set_tensor(input_details["index"], inputs)
+        interpreter.invoke()
+
+        output_details = state["output"]
+        outputs = interpreter.get_tensor(output_details["index"])
+        if output_details["dtype"] != np.float32:
+            scale, zero_point = output_details["quantization"]
+            outputs = (outputs.astype(np.float32) - zero_point) * scale
+
+        probabilities = softmax(outputs.astype(np.float32))
+        return probabilities, probabilities.argmax(axis=-1).astype(np.int32)
+
+class NumpyEngine:
+    """Runs a Keras Dense stack saved as ``.h5`` as plain NumPy matrix products.
+
+    The layer list comes from the ``model_config`` attribute and the weights
+    from ``model_weights``, read once with h5py. InputLayer, Dense, Dropout,
+    Activation and BatchNormalization layers are supported. Inference is a
+    chain of float32 ``batch @ kernel + bias`` products with in-place
+    activations, followed by ``softmax`` as in the other engines. It needs
+    neither TensorFlow nor a Keras model.
+    """
+    name = "numpy"
+
+    def __init__(self, layers: List[Dict[str, Any]], input_shape: Tuple[int, ...]):
+        self.layers = layers
+        self.input_shape = input_shape
+
+    @classmethod
+    def from_h5(cls, path: str, input_shape: Tuple[int, ...]) -> "NumpyEngine":
+        import h5py
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"H5 model file not found at {path}.")
+        with h5py.File(path, "r") as f:
+            model_config = f.attrs["model_config"]
+            config = json.loads(model_config.decode("utf-8") if isinstance(model_config, bytes) else model_config)
+            if config["class_name"] not in ("Sequential", "Functional", "Model"):
+                raise ValueError(f"Model class {config['class_name']} is not supported by the NumPy engine.")
+            weights_group = f["model_weights"] if "model_weights" in f else f
+            layers = [
+                layer for layer in (cls._read_layer(layer, weights_group) for layer in config["config"]["layers"])
+                if layer is not None
+            ]
+        return cls(layers, input_shape)
+
+    @staticmethod
+    def _read_layer(layer: Dict[str, Any], weights_group) -> Optional[Dict[str, Any]]:
+        kind, config = layer["class_name"], layer["config"]
+        name = config["name"]
+        if kind in ("InputLayer", "Dropout"):
+            return None
+        if kind == "Activation":
+            return {"kind": kind, "activation": activation(config["activation"], name)}
+
+        group = weights_group[name]
+        weights = [np.asarray(group[weight_name], dtype=np.float32) for weight_name in group.attrs["weight_names"]]
+        if kind == "Dense":
+            return {
+                "kind": kind,
+                "kernel": np.ascontiguousarray(weights[0]),
+                "bias": weights[1] if config.get("use_bias", True) else None,
+                "activation": activation(config.get("activation", "linear"), name)
+            }
+        if kind == "BatchNormalization":
+            if config.get("axis", -1) not in (-1, [-1]):
+                raise ValueError(f"BatchNormalization layer {name} must normalize the last axis.")
+            weights = list(weights)
+            gamma = weights.pop(0) if config.get("scale", True) else 1.0
+            beta = weights.pop(0) if config.get("center", True) else 0.0
+            mean, variance = weights
+            scale = (gamma / np.sqrt(variance + config.get("epsilon", 1e-3))).astype(np.float32)
+            return {"kind": kind, "scale": scale, "offset": (beta - mean * scale).astype(np.float32)}
+        raise ValueError(f"Layer {name} ({kind}) is not supported by the NumPy engine.")
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        outputs = np.array(batch, dtype=np.float32).reshape(len(batch), -1)
+        for layer in self.layers:
+            if layer["kind"] == "Dense":
+                outputs = outputs @ layer["kernel"]
+                if layer["bias"] is not None:
+                    outputs += layer["bias"]
+            elif layer["kind"] == "BatchNormalization":
+                outputs = outputs * layer["scale"] + layer["offset"]
+            activate = layer.get("activation")
+            if activate is ACTIVATIONS["relu"]:
+                np.maximum(outputs, 0.0, out=outputs)
+            elif activate is not None:
+                outputs = activate(outputs)
+        return outputs
+
+    def __call__(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        probabilities = softmax(self.forward(batch))
+        return probabilities, probabilities.argmax(axis=-1).astype(np.int32)
+
+def tflite_model_path(h5_path: str, variant: str = Config.TFLITE_MODEL_VARIANT) -> str:
+    base_name = os.path.splitext(os.path.basename(h5_path))[0]
+    return os.path.join(Config.TFLITE_MODELS_DIR, f"{base_name}_{variant}.tflite")
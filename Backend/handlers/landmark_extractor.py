@@ -0,0 +1,92 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Union
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+class HandsPool:
+    """A bounded pool of reusable MediaPipe Hands detectors.
+
+    Creating a detector loads its graph, which costs far more than running
+    it, so detectors are created lazily up to ``size`` and then handed out
+    again. ``static_image_mode`` detectors treat every frame independently;
+    tracking detectors are reset before reuse so one video's state never
+    leaks into the next.
+    """
+
+    def __init__(self, size: int, static_image_mode: bool):
+        self.size = max(1, size)
+        self.static_image_mode = static_image_mode
+        self._idle: "queue.Queue" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self):
+        return mp.solutions.hands.Hands(
+            static_image_mode=self.static_image_mode,
+            max_num_hands=1,
+            min_detection_confidence=Config.HAND_DETECTION_MIN_CONFIDENCE
+        )
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        hands = None
+        try:
+            hands = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    hands = self._create()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                hands = self._idle.get(timeout=timeout)
+
+        try:
+            yield hands
+        finally:
+            if not self.static_image_mode:
+                hands.reset()
+            self._idle.put(hands)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self.size, "created": self._created, "idle": self._idle.qsize()}
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+def extract_hand_landmarks(hands, image_bgr: np.ndarray) -> Optional[np.ndarray]:
+    """Returns the first detected hand as a flat (x, y, z) * 21 float32 array, or None.
+
+    The frame is resized to the training resolution first, as in the
+    training notebook.
+    """
+    resized = cv2.resize(image_bgr, (Config.IMAGE_WIDTH, Config.IMAGE_HEIGHT))
+    results = hands.process(cv2.cvtColor(resized, cv2.COLOR_BGR2RGB))
+    if not results.multi_hand_landmarks:
+        return None
+
+    return np.array(
+        [[landmark.x, landmark.y, landmark.z] for landmark in results.multi_hand_landmarks[0].landmark],
+        dtype=np.float32
+    ).reshape(-1)
@@ -1,214 +1,547 @@
 import os
 import json
+import time
+import random
+import asyncio
 import numpy as np
-import tensorflow as tf
-from typing import List, Dict, Union, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Union, Any, Optional, Callable, Tuple, AsyncIterator
 from fastapi import HTTPException
 from config import Config
-import traceback # 
+from logger import get_logger
+from metrics import INFERENCE_BATCH_SECONDS, INFERENCE_BATCH_SIZE
+import profiling
+from handlers.prediction_cache import PredictionCache
+from handlers.inference_engines import KerasEngine, NumpyEngine, TFLiteEngine, tflite_model_path
+from handlers.model_registry import ModelRegistry, LoadedModel
+from handlers.sign_lexicon import SignLexicon
+from handlers.preprocessing import LandmarkPreprocessor, normalize_landmarks
 
-def log_info(message: str, meta: Optional[Dict] = None):
-    print(f"[INFO] {message}", meta if meta else "")
+logger = get_logger(__name__)
 
-def log_error(message: str, error: Union[Exception, Dict] = None):
-    meta = {"message": str(error), "stack": traceback.format_exc()} if isinstance(error, Exception) else error
-    print(f"[ERROR] {message}", meta if meta else "")
+class InferenceBatcher:
+    """Collects concurrent inference requests into a single forward pass.
+
+    Callers submit one input at a time and await their own row of each array
+    returned by ``run_batch``. A batch is flushed once it holds
+    ``max_batch_size`` items or ``max_wait_ms`` has passed since its first
+    item arrived. The forward pass runs on ``executor`` so the event loop is
+    never blocked by TensorFlow, and ``concurrency`` bounds how many batches
+    may be in flight at once.
+
+    ``close`` lets batches already running finish and fails every request
+    that has not been answered with a 503. A closed batcher refuses new
+    submissions rather than starting a fresh worker.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[np.ndarray], Tuple[np.ndarray, ...]],
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 concurrency: Optional[asyncio.Semaphore] = None,
+                 max_batch_size: int = Config.INFERENCE_MAX_BATCH_SIZE,
+                 max_wait_ms: float = Config.INFERENCE_MAX_WAIT_MS,
+                 max_queue_size: int = Config.INFERENCE_MAX_QUEUE_SIZE):
+        self.name = name
+        self.run_batch = run_batch
+        self.executor = executor
+        self.concurrency = concurrency
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue_size = max(0, int(max_queue_size))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()
+        self._futures = set()
+        self._closed = False
+
+    def _ensure_worker(self):
+        if self._closed:
+            raise HTTPException(status_code=503, detail=f"Inference for {self.name} has been shut down. Try again.")
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, item: np.ndarray) -> Tuple[Any, ...]:
+        self._ensure_worker()
+        if self.max_queue_size and self._queue.qsize() >= self.max_queue_size:
+            raise HTTPException(status_code=503, detail=f"Inference queue for {self.name} is full. Try again later.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, profiling.current_trace()))
+        self._futures.add(future)
+        try:
+            return await future
+        finally:
+            self._futures.discard(future)
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future, Any]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            pending = [entry for entry in batch if not entry[1].done()]
+            if not pending:
+                continue
+
+            if self.concurrency is not None:
+                await self.concurrency.acquire()
+            task = asyncio.get_running_loop().create_task(self._dispatch(pending))
+            self._in_flight.add(task)
+            task.add_done_callback(self._dispatch_done)
+
+    def _dispatch_done(self, task: asyncio.Task):
+        # Released here rather than in _dispatch, which never runs its finally if cancelled before starting.
+        self._in_flight.discard(task)
+        if self.concurrency is not None:
+            self.concurrency.release()
+
+    async def _dispatch(self, pending: List[Tuple[np.ndarray, asyncio.Future, Any]]):
+        try:
+            inputs = np.stack([item for item, _, _ in pending])
+            start = time.perf_counter()
+            outputs = await asyncio.get_running_loop().run_in_executor(self.executor, self.run_batch, inputs)
+            end = time.perf_counter()
+            INFERENCE_BATCH_SECONDS.labels(model=self.name, path="batcher").observe(end - start)
+            INFERENCE_BATCH_SIZE.labels(model=self.name, path="batcher").observe(len(pending))
+            for _, _, trace in pending:
+                if trace is not None:
+                    trace.add_stage("model_forward", start, end, model=self.name, batchSize=len(pending))
+        except Exception as e:
+            logger.error(f"Batched inference failed for {self.name} (batch size {len(pending)}):", e)
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), output in zip(pending, zip(*outputs)):
+            if not future.done():
+                future.set_result(output)
+
+    async def drain(self, timeout: float = 30.0):
+        """Lets already submitted requests finish, then stops the worker."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._futures and loop.time() < deadline:
+            await asyncio.sleep(max(self.max_wait, 0.001))
+        await self.close()
+
+    async def close(self, timeout: float = 30.0):
+        self._closed = True
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._in_flight:
+            _, still_running = await asyncio.wait(list(self._in_flight), timeout=timeout)
+            for task in still_running:
+                task.cancel()
+
+        # Requests still queued, collected by the stopped worker, or in a batch that was cancelled.
+        for future in list(self._futures):
+            if not future.done():
+                future.set_exception(HTTPException(
+                    status_code=503, detail=f"Inference for {self.name} was shut down before this request ran. Try again."
+                ))
+        self._queue = None
 
 class ModelHandler:
     def __init__(self):
-        self.static_sign_model = None
-        self.video_lstm_model = None
         self.image_class_mapping = {}
         self.video_class_mapping = {}
+        self.lexicon = SignLexicon({}, {})
         self.models_loaded = False
+        self.models_warmed_up = False
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.INFERENCE_THREAD_POOL_SIZE,
+            thread_name_prefix="inference"
+        )
+        self.inference_slots = asyncio.Semaphore(Config.INFERENCE_MAX_CONCURRENT_BATCHES)
+        self.registry = ModelRegistry(
+            Config.MODEL_MANIFEST_PATH,
+            self.executor,
+            build_engine=self._build_engine,
+            make_batcher=self._make_batcher,
+            on_loaded=self._on_model_loaded
+        )
+        self.static_cache = PredictionCache() if Config.PREDICTION_CACHE_ENABLED else None
+        self.preprocessor = LandmarkPreprocessor()
+        self._audit_tasks = set()
 
     async def load_models(self):
-        log_info('Loading TensorFlow models and class mappings...')
+        logger.info('Loading model manifest and default models...')
         try:
-            def _load_model_h5_only(h5_path, model_name, custom_objects=None):
-                model = None
-                if os.path.exists(h5_path):
-                    log_info(f"Attempting to load {model_name} from H5: {h5_path}")
-                    try:
-                        model = tf.keras.models.load_model(h5_path, custom_objects=custom_objects)
-                        log_info(f"{model_name} loaded successfully from H5.")
-                        return model
-                    except Exception as e:
-                        log_error(f"Failed to load {model_name} from H5 at {h5_path}. Error: {e}.", e)
-                        raise FileNotFoundError(f"Failed to load {model_name} from H5: {e}")
-                else:
-                    raise FileNotFoundError(f"H5 model file not found for {model_name} at {h5_path}.")
-                
-                return model 
-
-            self.static_sign_model = _load_model_h5_only(
-                Config.H5_LANDMARK_MODEL_PATH,
-                "Static Sign Model (Landmark Model)"
-            )
-
-            self.video_lstm_model = _load_model_h5_only(
-                Config.H5_VIDEO_LSTM_MODEL_PATH,
-                "Video LSTM Model"
-            )
-
-            with open(Config.IMAGE_CLASS_MAPPING_PATH, 'r') as f:
-                self.image_class_mapping = {int(k): v for k, v in json.load(f).items()}
-            log_info('Image Class Mapping loaded successfully.')
-
-            with open(Config.VIDEO_CLASS_MAPPING_PATH, 'r') as f:
-                self.video_class_mapping = {int(k): v for k, v in json.load(f).items()}
-            log_info('Video Class Mapping loaded successfully.')
-            
+            self.registry.load_manifest()
+            static_model = await self.registry.get(task="static")
+            dynamic_model = await self.registry.get(task="dynamic")
+
+            self.models_warmed_up = True
             self.models_loaded = True
             return {
-                "landmark_model": bool(self.static_sign_model),
-                "video_lstm_model": bool(self.video_lstm_model),
+                "static_model": f"{static_model.name} v{static_model.version}",
+                "dynamic_model": f"{dynamic_model.name} v{dynamic_model.version}",
                 "image_class_mapping": bool(self.image_class_mapping),
                 "video_class_mapping": bool(self.video_class_mapping)
             }
         except Exception as e:
-            log_error('Error loading models or class mappings:', e)
+            logger.error('Error loading models or class mappings:', e)
             self.models_loaded = False
             raise
 
-    def get_model_status(self) -> Dict[str, bool]:
+    async def shutdown(self):
+        await self.registry.close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _build_engine(path: str, input_shape: Tuple[int, ...], custom_objects: List[str],
+                      backend: str = "keras"):
+        if backend == "tflite":
+            return TFLiteEngine(tflite_model_path(path), input_shape)
+        if backend == "numpy":
+            return NumpyEngine.from_h5(path, input_shape)
+        if backend != "keras":
+            raise ValueError(f"Unknown inference backend: {backend}")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"H5 model file not found at {path}.")
+
+        import tensorflow as tf
+        from handlers.custom_layers import CUSTOM_OBJECTS
+
+        model = tf.keras.models.load_model(
+            path,
+            custom_objects={name: CUSTOM_OBJECTS[name] for name in custom_objects}
+        )
+        return KerasEngine(model, input_shape)
+
+    def _make_batcher(self, model: LoadedModel) -> InferenceBatcher:
+        return InferenceBatcher(f"{model.name} v{model.version}", model.engine, self.executor, self.inference_slots)
+
+    def _on_model_loaded(self, model: LoadedModel):
+        defaults = self.registry.manifest.get("defaults", {})
+        if model.name == defaults.get("static"):
+            self.image_class_mapping = model.class_mapping
+            if self.static_cache is not None:
+                self.static_cache.clear()
+        if model.name == defaults.get("dynamic"):
+            self.video_class_mapping = model.class_mapping
+        self.lexicon = SignLexicon(self.video_class_mapping, self.image_class_mapping)
+
+    def _require_loaded(self):
+        if not self.models_loaded:
+            logger.error("Models not loaded for prediction.")
+            raise HTTPException(status_code=500, detail="Models not loaded.")
+
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        return self.static_cache.stats() if self.static_cache is not None else None
+
+    def get_cascade_stats(self) -> Optional[Dict[str, Any]]:
+        if not self.registry.manifest:
+            return None
+        model = self.registry.loaded.get(self.registry.default_model("static"))
+        if model is None or model.cascade is None:
+            return None
+        return {"model": model.name, "version": model.version, **model.cascade.stats()}
+
+    def get_model_status(self) -> Dict[str, Any]:
         return {
-            "landmark_model": self.static_sign_model is not None,
-            "video_lstm_model": self.video_lstm_model is not None,
-            "video_transformer_model": False, # Always False as it's removed
+            "models_loaded": self.models_loaded,
+            "inference_backend": Config.INFERENCE_BACKEND,
             "image_class_mapping": bool(self.image_class_mapping),
-            "video_class_mapping": bool(self.video_class_mapping)
+            "video_class_mapping": bool(self.video_class_mapping),
+            "warmed_up": self.models_warmed_up,
+            "registry": self.registry.status() if self.registry.manifest else None
+        }
+
+    @staticmethod
+    def _format_static_result(model: LoadedModel, probabilities: np.ndarray, predicted_index: int) -> Dict[str, Union[str, float, int]]:
+        predicted_index = int(predicted_index)
+        return {
+            "class": model.class_mapping.get(predicted_index, "Unknown"),
+            "confidence": float(probabilities[predicted_index]),
+            "index": predicted_index
+        }
+
+    @staticmethod
+    def _format_dynamic_result(model: LoadedModel, probabilities: np.ndarray, predicted_index: int) -> Dict[str, Union[str, float, int]]:
+        predicted_index = int(predicted_index)
+        return {
+            "class": model.class_mapping.get(predicted_index, "Unknown"),
+            "confidence": float(probabilities[predicted_index]),
+            "index": predicted_index,
+            "modelUsed": model.name,
+            "modelVersion": model.version
         }
 
-    async def predict_static_sign(self, landmarks: List[float]) -> Dict[str, Union[str, float, int, None]]:
-        if not self.static_sign_model:
-            log_error("Static sign model not loaded for prediction.")
-            raise HTTPException(status_code=500, detail="Static sign model not loaded.")
-        if not landmarks or len(landmarks) != Config.NUM_LANDMARK_FEATURES:
-            raise HTTPException(status_code=400, detail=f"Invalid landmark array length. Expected {Config.NUM_LANDMARK_FEATURES}, got {len(landmarks)}.")
+    async def _run_bulk(self, model: LoadedModel, inputs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Runs a large, already-assembled batch in chunks on the inference executor."""
+        loop = asyncio.get_running_loop()
+        chunk_size = max(1, Config.INFERENCE_BULK_BATCH_SIZE)
+        label = f"{model.name} v{model.version}"
+        probabilities, indices = [], []
 
+        for start in range(0, len(inputs), chunk_size):
+            chunk = inputs[start:start + chunk_size]
+            async with self.inference_slots:
+                started = time.perf_counter()
+                with profiling.stage("model_forward", model=label, batchSize=len(chunk)):
+                    chunk_probabilities, chunk_indices = await loop.run_in_executor(self.executor, model.engine, chunk)
+            INFERENCE_BATCH_SECONDS.labels(model=label, path="bulk").observe(time.perf_counter() - started)
+            INFERENCE_BATCH_SIZE.labels(model=label, path="bulk").observe(len(chunk))
+            probabilities.append(chunk_probabilities)
+            indices.append(chunk_indices)
+
+        return np.concatenate(probabilities), np.concatenate(indices)
+
+    async def predict_static_sign_batch(self, landmarks_batch: List[List[float]]) -> List[Dict[str, Any]]:
+        self._require_loaded()
+        model = await self.registry.get(task="static")
+
+        results: List[Dict[str, Any]] = [{} for _ in landmarks_batch]
+        valid_items, valid_positions = [], []
+        for position, landmarks in enumerate(landmarks_batch):
+            if not landmarks or len(landmarks) != Config.NUM_LANDMARK_FEATURES:
+                results[position] = {
+                    "success": False,
+                    "error": f"Invalid landmark array length. Expected {Config.NUM_LANDMARK_FEATURES}, got {len(landmarks)}."
+                }
+            else:
+                valid_items.append(landmarks)
+                valid_positions.append(position)
+
+        if valid_items:
+            inputs, finite = self.preprocessor.static_batch(valid_items, model.normalize)
+            if not finite.all():
+                for position in np.asarray(valid_positions)[~finite]:
+                    results[position] = {"success": False, "error": "Landmarks contain NaN or infinite values."}
+                inputs = inputs[finite]
+                valid_positions = [position for position, ok in zip(valid_positions, finite) if ok]
+
+        if valid_positions and model.cascade is not None:
+            cascade_probabilities, cascade_indices, answered, _ = model.cascade.predict(inputs)
+            model.cascade.record(int(answered.sum()), int((~answered).sum()))
+            for position, item_probabilities, item_index in zip(
+                    np.asarray(valid_positions)[answered], cascade_probabilities[answered], cascade_indices[answered]):
+                results[position] = {"success": True, "result": self._format_static_result(model, item_probabilities, item_index)}
+            inputs = inputs[~answered]
+            valid_positions = [position for position, done in zip(valid_positions, answered) if not done]
+
+        if valid_positions:
+            try:
+                probabilities, indices = await self._run_bulk(model, inputs)
+            except Exception as e:
+                logger.error("Error in predict_static_sign_batch:", e)
+                raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+            for position, item_probabilities, item_index in zip(valid_positions, probabilities, indices):
+                results[position] = {"success": True, "result": self._format_static_result(model, item_probabilities, item_index)}
+
+        logger.info(f"Static sign batch prediction: items={len(landmarks_batch)}, valid={len(valid_positions)}")
+        return results
+
+    async def predict_dynamic_sign_batch(self, landmark_sequences: List[List[List[float]]],
+                                         model_choice: Optional[str] = None) -> List[Dict[str, Any]]:
+        self._require_loaded()
+        model = await self.registry.get(model_choice, task="dynamic")
+
+        results: List[Dict[str, Any]] = [{} for _ in landmark_sequences]
+        valid_items, valid_positions = [], []
+        for position, landmark_sequence in enumerate(landmark_sequences):
+            if not landmark_sequence:
+                results[position] = {"success": False, "error": "Landmark sequence is empty."}
+            else:
+                valid_items.append(landmark_sequence)
+                valid_positions.append(position)
+
+        if valid_items:
+            try:
+                inputs = self.preprocessor.sequence_batch(valid_items, model.normalize)
+            except ValueError:
+                # Some item is malformed; fit them one by one so only the bad ones fail.
+                rows, kept_positions = [], []
+                for position, landmark_sequence in zip(valid_positions, valid_items):
+                    try:
+                        rows.append(self.preprocessor.sequence(landmark_sequence, model.normalize))
+                        kept_positions.append(position)
+                    except ValueError as e:
+                        results[position] = {"success": False, "error": f"Invalid landmark sequence: {e}"}
+                valid_positions = kept_positions
+                inputs = np.stack(rows) if rows else None
+
+        if valid_positions:
+            try:
+                probabilities, indices = await self._run_bulk(model, inputs)
+            except Exception as e:
+                logger.error("Error in predict_dynamic_sign_batch:", e)
+                raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+            for position, item_probabilities, item_index in zip(valid_positions, probabilities, indices):
+                results[position] = {"success": True, "result": self._format_dynamic_result(model, item_probabilities, item_index)}
+
+        logger.info(f"Dynamic sign batch prediction ({model.name}): items={len(landmark_sequences)}, valid={len(valid_positions)}")
+        return results
+
+    async def classify_sequences(self, sequences: np.ndarray, model_choice: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Classifies an already-shaped (N, frames, features) array with the dynamic model."""
+        self._require_loaded()
+        model = await self.registry.get(model_choice, task="dynamic")
+        probabilities, indices = await self._run_bulk(model, self.preprocessor.sequence_batch(sequences, model.normalize))
+        return [self._format_dynamic_result(model, p, i) for p, i in zip(probabilities, indices)]
+
+    def _try_cascade(self, model: LoadedModel, landmarks: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Returns the first-stage result when its margin is high enough, or None to escalate."""
+        probabilities, indices, answered, _ = model.cascade.predict(landmarks)
+        if not answered[0]:
+            model.cascade.record(0, 1)
+            profiling.annotate(cascade="escalated")
+            return None
+
+        model.cascade.record(1, 0)
+        profiling.annotate(cascade="answered")
+        if Config.STATIC_CASCADE_AUDIT_RATE > 0 and random.random() < Config.STATIC_CASCADE_AUDIT_RATE:
+            task = asyncio.get_running_loop().create_task(self._audit_cascade(model, landmarks.copy(), int(indices[0])))
+            self._audit_tasks.add(task)
+            task.add_done_callback(self._audit_tasks.discard)
+        return self._format_static_result(model, probabilities[0], indices[0])
+
+    async def _audit_cascade(self, model: LoadedModel, landmarks: np.ndarray, cascade_index: int):
         try:
-            input_tensor = tf.constant([landmarks], dtype=tf.float32)
-            predictions = self.static_sign_model.predict(input_tensor, verbose=0)
-            probabilities = tf.nn.softmax(predictions).numpy()[0]
+            if model.normalize:
+                normalize_landmarks(landmarks)
+            _, predicted_index = await model.batcher.submit(landmarks)
+            model.cascade.record_audit(int(predicted_index) == cascade_index)
+        except Exception as e:
+            logger.warning("Static cascade audit failed: %s", e)
 
-            predicted_index = np.argmax(probabilities)
-            predicted_class = self.image_class_mapping.get(predicted_index, "Unknown")
-            confidence = float(probabilities[predicted_index])
+    async def predict_static_sign(self, landmarks: Union[List[float], np.ndarray]) -> Dict[str, Union[str, float, int, None]]:
+        self._require_loaded()
+        if landmarks is None or len(landmarks) != Config.NUM_LANDMARK_FEATURES:
+            raise HTTPException(status_code=400, detail=f"Invalid landmark array length. Expected {Config.NUM_LANDMARK_FEATURES}, got {0 if landmarks is None else len(landmarks)}.")
 
-            log_info(f"Static sign prediction: Class={predicted_class}, Confidence={confidence:.4f}")
+        try:
+            with profiling.stage("preprocess"):
+                landmarks = self.preprocessor.static(landmarks)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-            return {
-                "class": predicted_class,
-                "confidence": confidence,
-                "index": int(predicted_index)
-            }
+        try:
+            model = await self.registry.get(task="static")
+            cache_key = None
+            if self.static_cache is not None:
+                with profiling.stage("cache_lookup"):
+                    cache_key = self.static_cache.make_key(landmarks, model.normalize)
+                    cached_result = self.static_cache.get(cache_key)
+                if cached_result is not None:
+                    profiling.annotate(cacheHit=True)
+                    return cached_result
+
+            if model.cascade is not None:
+                with profiling.stage("cascade"):
+                    result = self._try_cascade(model, landmarks)
+                if result is not None:
+                    if cache_key is not None:
+                        self.static_cache.put(cache_key, result)
+                    return result
+
+            if model.normalize:
+                normalize_landmarks(landmarks)
+            with profiling.stage("inference", model=model.name):
+                probabilities, predicted_index = await model.batcher.submit(landmarks)
+            with profiling.stage("format_result"):
+                result = self._format_static_result(model, probabilities, predicted_index)
+            if cache_key is not None:
+                self.static_cache.put(cache_key, result)
+
+            logger.debug("Static sign prediction: Class=%s, Confidence=%.4f", result["class"], result["confidence"])
+
+            return result
+        except HTTPException:
+            raise
         except Exception as e:
-            log_error("Error in predict_static_sign:", e)
+            logger.error("Error in predict_static_sign:", e)
             raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
-    async def predict_dynamic_sign(self, landmark_sequence: List[List[float]]) -> Dict[str, Union[str, float, int, None]]:
-        model_to_use = self.video_lstm_model
-
-        if not model_to_use:
-            log_error(f"Video LSTM model not loaded for prediction.")
-            raise HTTPException(status_code=500, detail=f"Video LSTM model not loaded.")
+    async def predict_dynamic_sign(self, landmark_sequence: Union[List[List[float]], np.ndarray],
+                                   model_choice: Optional[str] = None) -> Dict[str, Union[str, float, int, None]]:
+        self._require_loaded()
 
-        if not landmark_sequence or len(landmark_sequence) == 0:
+        if landmark_sequence is None or len(landmark_sequence) == 0:
             raise HTTPException(status_code=400, detail='Landmark sequence is empty.')
 
-        num_frames_expected = Config.NUM_FRAMES_VIDEO
-        num_features = Config.NUM_LANDMARK_FEATURES
-
-        processed_sequence = list(landmark_sequence)
-
-        if len(processed_sequence) > num_frames_expected:
-            processed_sequence = processed_sequence[len(processed_sequence) - num_frames_expected:]
-        elif len(processed_sequence) < num_frames_expected:
-            padding = [0.0] * num_features
-            while len(processed_sequence) < num_frames_expected:
-                processed_sequence.append(padding)
-        
-        processed_sequence = [
-            (frame[:num_features] + [0.0] * (num_features - len(frame))) if len(frame) != num_features
-            else frame
-            for frame in processed_sequence
-        ]
-        
+        model = await self.registry.get(model_choice, task="dynamic")
         try:
-            input_tensor = tf.constant([processed_sequence], dtype=tf.float32)
-            predictions = model_to_use.predict(input_tensor, verbose=0)
-            probabilities = tf.nn.softmax(predictions).numpy()[0]
+            with profiling.stage("preprocess"):
+                sequence = self.preprocessor.sequence(landmark_sequence, model.normalize)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid landmark sequence: {e}")
 
-            predicted_index = np.argmax(probabilities)
-            predicted_class = self.video_class_mapping.get(predicted_index, "Unknown")
-            confidence = float(probabilities[predicted_index])
+        try:
+            with profiling.stage("inference", model=model.name):
+                probabilities, predicted_index = await model.batcher.submit(sequence)
+            with profiling.stage("format_result"):
+                result = self._format_dynamic_result(model, probabilities, predicted_index)
 
-            log_info(f"Dynamic sign prediction (LSTM): Class={predicted_class}, Confidence={confidence:.4f}")
+            logger.debug("Dynamic sign prediction (%s): Class=%s, Confidence=%.4f", model.name, result["class"], result["confidence"])
 
-            return {
-                "class": predicted_class,
-                "confidence": confidence,
-                "index": int(predicted_index),
-                "modelUsed": "lstm"
-            }
+            return result
+        except HTTPException:
+            raise
         except Exception as e:
-            log_error("Error in predict_dynamic_sign:", e)
+            logger.error("Error in predict_dynamic_sign:", e)
             raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
     def text_to_sign(self, text: str) -> Dict[str, Any]:
         if not text:
             raise HTTPException(status_code=400, detail="No text provided")
-        
-        words = text.strip().lower().split()
-        result_signs = []
-
-        for word in words:
-            is_known_word = False
-            mapped_word = word
-            
-            for k, v in self.video_class_mapping.items():
-                if v.lower() == word:
-                    is_known_word = True
-                    mapped_word = v
-                    break
-            
-            if is_known_word:
-                result_signs.append({
-                    "type": "word",
-                    "original": word,
-                    "mapped": mapped_word,
-                    "knownInDataset": True
-                })
-            else:
-                letters = []
-                for letter in word:
-                    letter_exists = False
-                    mapped_letter = letter.upper()
-                    
-                    for k, v in self.image_class_mapping.items():
-                        if v.lower() == letter.lower():
-                            letter_exists = True
-                            mapped_letter = v
-                            break
-                    
-                    letters.append({
-                        "letter": letter,
-                        "mapped": mapped_letter,
-                        "exists": letter_exists
-                    })
-                
-                result_signs.append({
-                    "type": "fingerspell",
-                    "original": word,
-                    "letters": letters
-                })
-        
+
         return {
             "text": text,
-            "signs": result_signs
+            "signs": self.lexicon.translate(text)
         }
 
+    async def text_to_sign_stream(self, sentences: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[str]:
+        """Yields one NDJSON line per ``(textIndex, sentence)`` pair."""
+        sentence_count = 0
+        current_text, sentence_index = None, 0
+        async for text_index, sentence in sentences:
+            if text_index != current_text:
+                current_text, sentence_index = text_index, 0
+            yield json.dumps({
+                "textIndex": text_index,
+                "sentenceIndex": sentence_index,
+                "text": sentence,
+                "signs": self.lexicon.translate(sentence)
+            }) + "\n"
+            sentence_index += 1
+            sentence_count += 1
+            if sentence_count % 64 == 0:
+                await asyncio.sleep(0)
+        logger.info(f"Text to sign stream finished: sentences={sentence_count}")
+
     def get_available_words(self) -> List[Dict[str, Union[int, str]]]:
         return [{"id": k, "word": v} for k, v in self.video_class_mapping.items()]
 
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from fastapi import HTTPException
+
+from config import Config
+from logger import get_logger
+from handlers.static_cascade import CentroidCascade
+
+logger = get_logger(__name__)
+
+class LoadedModel:
+    """One loaded model version together with its engine, class mapping and batcher."""
+
+    def __init__(self, name: str, version: str, task: str, engine, class_mapping: Dict[int, str],
+                 input_shape: Tuple[int, ...], path: str, normalize: bool = False,
+                 cascade: Optional[CentroidCascade] = None):
+        self.name = name
+        self.version = version
+        self.task = task
+        self.engine = engine
+        self.class_mapping = class_mapping
+        self.input_shape = input_shape
+        self.path = path
+        self.normalize = normalize
+        self.cascade = cascade
+        self.batcher = None
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+
+class ModelRegistry:
+    """Loads models described by a manifest file on demand and swaps versions in place.
+
+    The manifest maps each model name to its task ("static" or "dynamic"),
+    its active version, and per-version files, class mappings and input
+    shapes. Models are loaded on first use on ``executor``, so loading never
+    blocks the event loop. ``activate`` loads and warms a new version before
+    replacing the old one, so in-flight requests finish on the old version and
+    new requests go to the new one. Workers share the manifest on disk and pick
+    up activations from other workers in ``refresh``.
+    """
+
+    def __init__(self, manifest_path: str, executor: Executor,
+                 build_engine: Callable[[str, Tuple[int, ...], List[str], str], Any],
+                 make_batcher: Callable[[LoadedModel], Any],
+                 on_loaded: Optional[Callable[[LoadedModel], None]] = None):
+        self.manifest_path = manifest_path
+        self.executor = executor
+        self.build_engine = build_engine
+        self.make_batcher = make_batcher
+        self.on_loaded = on_loaded
+        self.manifest: Dict[str, Any] = {}
+        self.manifest_mtime: Optional[float] = None
+        self.loaded: Dict[str, LoadedModel] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Drain task -> the replaced model whose batcher it drains.
+        self._retiring: Dict[asyncio.Task, LoadedModel] = {}
+
+    def load_manifest(self):
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+
+        for name, entry in manifest.get("models", {}).items():
+            if entry.get("task") not in ("static", "dynamic"):
+                raise ValueError(f"Model '{name}' in manifest has invalid task: {entry.get('task')}")
+            if entry.get("active") not in entry.get("versions", {}):
+                raise ValueError(f"Model '{name}' in manifest has no version '{entry.get('active')}'.")
+        for task, name in manifest.get("defaults", {}).items():
+            if name not in manifest.get("models", {}):
+                raise ValueError(f"Default {task} model '{name}' is not in the manifest.")
+
+        self.manifest = manifest
+        self.manifest_mtime = os.path.getmtime(self.manifest_path)
+
+    def _write_manifest(self):
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+        self.manifest_mtime = os.path.getmtime(self.manifest_path)
+
+    def default_model(self, task: str) -> str:
+        return self.manifest["defaults"][task]
+
+    def entry(self, name: str, task: Optional[str] = None) -> Dict[str, Any]:
+        entry = self.manifest["models"].get(name)
+        if entry is None or (task is not None and entry["task"] != task):
+            available = [
+                model_name for model_name, model_entry in self.manifest["models"].items()
+                if task is None or model_entry["task"] == task
+            ]
+            raise HTTPException(status_code=400, detail=f"Unknown model '{name}'. Available: {', '.join(available)}")
+        return entry
+
+    def version_available(self, name: str, version: str) -> bool:
+        """Whether the model file of a version is present, i.e. whether it can be loaded at all."""
+        spec = self.manifest["models"][name]["versions"].get(version)
+        return spec is not None and os.path.exists(os.path.join(Config.MODELS_DIR, spec["path"]))
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        if name not in self._locks:
+            self._locks[name] = asyncio.Lock()
+        return self._locks[name]
+
+    @staticmethod
+    def resolve_backend(name: str, version: str, spec: Dict[str, Any]) -> str:
+        preferred = spec.get("engine")
+        if Config.INFERENCE_BACKEND == "auto":
+            return preferred or "keras"
+        if preferred and preferred != Config.INFERENCE_BACKEND:
+            logger.warning(f"INFERENCE_BACKEND={Config.INFERENCE_BACKEND} overrides the {preferred} engine "
+                           f"set in the manifest for {name} v{version}.")
+        return Config.INFERENCE_BACKEND
+
+    def _load_version(self, name: str, version: str) -> LoadedModel:
+        entry = self.manifest["models"][name]
+        spec = entry["versions"][version]
+        path = os.path.join(Config.MODELS_DIR, spec["path"])
+        input_shape = tuple(spec["inputShape"])
+
+        backend = self.resolve_backend(name, version, spec)
+        logger.info(f"Loading model {name} v{version} from {path} with the {backend} engine")
+        engine = self.build_engine(path, input_shape, spec.get("customObjects", []), backend)
+
+        with open(os.path.join(Config.MODELS_DIR, spec["classMapping"]), "r") as f:
+            class_mapping = {int(k): v for k, v in json.load(f).items()}
+
+        for batch_size in sorted({1, Config.INFERENCE_MAX_BATCH_SIZE}):
+            engine(np.zeros((batch_size, *input_shape), dtype=np.float32))
+
+        cascade = None
+        if spec.get("cascade") and Config.STATIC_CASCADE_ENABLED:
+            cascade_path = os.path.join(Config.MODELS_DIR, spec["cascade"])
+            if os.path.exists(cascade_path):
+                cascade = CentroidCascade.load(cascade_path)
+            else:
+                logger.warning("Cascade file %s for %s v%s not found; using the full model only.", cascade_path, name, version)
+
+        logger.info(f"Model {name} v{version} loaded and warmed up.")
+        return LoadedModel(name, version, entry["task"], engine, class_mapping, input_shape, path,
+                           normalize=bool(spec.get("normalizeLandmarks", False)), cascade=cascade)
+
+    async def _load(self, name: str, version: str) -> LoadedModel:
+        try:
+            model = await asyncio.get_running_loop().run_in_executor(self.executor, self._load_version, name, version)
+        except Exception as e:
+            logger.error(f"Failed to load model {name} v{version}:", e)
+            raise HTTPException(status_code=503, detail=f"Model '{name}' version {version} is not available: {e}")
+
+        model.batcher = self.make_batcher(model)
+        if self.on_loaded is not None:
+            self.on_loaded(model)
+        return model
+
+    def _install(self, model: LoadedModel):
+        previous = self.loaded.get(model.name)
+        self.loaded[model.name] = model
+        if previous is not None and previous is not model:
+            self._retire(previous)
+
+    def _retire(self, model: LoadedModel):
+        task = asyncio.get_running_loop().create_task(model.batcher.drain())
+        self._retiring[task] = model
+        task.add_done_callback(lambda done: self._retiring.pop(done, None))
+
+    async def get(self, name: Optional[str] = None, task: Optional[str] = None) -> LoadedModel:
+        name = name or self.default_model(task)
+        entry = self.entry(name, task)
+
+        model = self.loaded.get(name)
+        if model is None or model.version != entry["active"]:
+            async with self._lock(name):
+                model = self.loaded.get(name)
+                if model is None or model.version != entry["active"]:
+                    model = await self._load(name, entry["active"])
+                    self._install(model)
+
+        model.last_used = time.monotonic()
+        return model
+
+    async def activate(self, name: str, version: str, persist: bool = True) -> LoadedModel:
+        entry = self.entry(name)
+        if version not in entry["versions"]:
+            raise HTTPException(status_code=404, detail=f"Model '{name}' has no version '{version}'.")
+
+        async with self._lock(name):
+            model = await self._load(name, version)
+            self._install(model)
+            entry["active"] = version
+            if persist:
+                self._write_manifest()
+
+        logger.info(f"Model {name} switched to version {version}.")
+        return model
+
+    async def unload(self, name: str) -> bool:
+        self.entry(name)
+        async with self._lock(name):
+            model = self.loaded.pop(name, None)
+            if model is None:
+                return False
+            self._retire(model)
+        logger.info(f"Model {name} v{model.version} unloaded.")
+        return True
+
+    async def unload_idle(self, idle_seconds: float = Config.MODEL_IDLE_UNLOAD_SECONDS) -> List[str]:
+        """Unloads models unused for ``idle_seconds``. Default models stay loaded."""
+        if idle_seconds <= 0:
+            return []
+        pinned = set(self.manifest.get("defaults", {}).values())
+        now = time.monotonic()
+        idle = [
+            name for name, model in self.loaded.items()
+            if name not in pinned and now - model.last_used > idle_seconds
+        ]
+        for name in idle:
+            await self.unload(name)
+        return idle
+
+    async def refresh(self):
+        """Reloads the manifest if it changed on disk and switches loaded models to their new active versions."""
+        if os.path.getmtime(self.manifest_path) == self.manifest_mtime:
+            return
+
+        self.load_manifest()
+        logger.info("Model manifest changed on disk; reloaded.")
+        for name, model in list(self.loaded.items()):
+            active = self.manifest["models"].get(name, {}).get("active")
+            if active is None:
+                await self.unload(name)
+            elif active != model.version:
+                await self.activate(name, active, persist=False)
+
+    async def close(self):
+        for model in self.loaded.values():
+            await model.batcher.close()
+        self.loaded.clear()
+        # Stop waiting on the drains, then close their batchers so nothing they hold is left unanswered.
+        retiring = list(self._retiring.items())
+        for task, _ in retiring:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in retiring), return_exceptions=True)
+        for _, model in retiring:
+            await model.batcher.close()
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        models = {}
+        for name, entry in self.manifest.get("models", {}).items():
+            model = self.loaded.get(name)
+            models[name] = {
+                "task": entry["task"],
+                "activeVersion": entry["active"],
+                "versions": list(entry["versions"].keys()),
+                "available": self.version_available(name, entry["active"]),
+                "loaded": model is not None,
+                "loadedVersion": model.version if model else None,
+                "engine": model.engine.name if model else None,
+                "idleSeconds": round(now - model.last_used, 1) if model else None
+            }
+        return {"defaults": self.manifest.get("defaults", {}), "models": models}
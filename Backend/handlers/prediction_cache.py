@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from handlers.preprocessing import normalize_landmarks
+
+_MAX_CELL = np.iinfo(np.int32).max
+_CONFIGURED_NORMALIZE = {"true": True, "false": False}.get(Config.PREDICTION_CACHE_NORMALIZE)
+
+class PredictionCache:
+    """Bounded LRU cache of static-sign predictions keyed by quantized landmarks.
+
+    Landmarks are snapped to a grid of ``grid_size``, so held hand shapes that
+    jitter by less than one grid cell share an entry. When normalizing, they
+    are made wrist-relative and scale-normalized first, which is only sound
+    for a model that normalizes its own input: a model on raw coordinates may
+    answer differently for the same shape at another position or scale.
+    ``normalize=None`` therefore follows the model, via ``make_key``.
+    Entries older than ``ttl_seconds`` are treated as misses.
+
+    Grid cells are stored as int32. Landmarks too large for that are not
+    cached at all (``make_key`` returns None), so distinct inputs never wrap
+    onto the same key.
+    """
+
+    def __init__(self, capacity: int = Config.PREDICTION_CACHE_CAPACITY,
+                 ttl_seconds: float = Config.PREDICTION_CACHE_TTL_SECONDS,
+                 grid_size: float = Config.PREDICTION_CACHE_GRID_SIZE,
+                 normalize: Optional[bool] = _CONFIGURED_NORMALIZE):
+        self.capacity = max(1, int(capacity))
+        self.ttl_seconds = float(ttl_seconds)
+        self.grid_size = float(grid_size)
+        self.normalize = normalize
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, landmarks: np.ndarray, model_normalizes: bool = False) -> Optional[bytes]:
+        points = np.array(landmarks, dtype=np.float32).reshape(-1)
+        if self.normalize if self.normalize is not None else model_normalizes:
+            normalize_landmarks(points)
+        cells = np.round(points.astype(np.float64) / self.grid_size)
+        if not np.isfinite(cells).all() or np.abs(cells).max(initial=0) > _MAX_CELL:
+            return None
+        return cells.astype(np.int32).tobytes()
+
+    def get(self, key: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key) if key is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+
+    def put(self, key: bytes, value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic(), dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hitRate": self.hits / lookups if lookups else 0.0
+        }
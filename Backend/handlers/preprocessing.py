@@ -0,0 +1,136 @@
+import itertools
+from typing import Any, Sequence, Tuple, Union
+
+import numpy as np
+
+from config import Config
+
+LandmarkFrames = Union[np.ndarray, Sequence[Sequence[float]]]
+
+def normalize_landmarks(frames: np.ndarray) -> np.ndarray:
+    """Makes (..., 21 * 3) landmarks wrist-relative and scales each frame into [-1, 1], in place.
+
+    All-zero frames (padding, or no hand detected) stay zero.
+    """
+    points = frames.reshape(*frames.shape[:-1], -1, 3)
+    points -= points[..., :1, :]
+    scale = np.abs(points).max(axis=(-2, -1), keepdims=True)
+    np.divide(points, scale, out=points, where=scale > 0)
+    return frames
+
+def _repair_ragged(rows: Sequence[Sequence[float]], num_features: int) -> np.ndarray:
+    lengths = np.fromiter((min(len(row), num_features) for row in rows), dtype=np.intp, count=len(rows))
+    values = np.fromiter(
+        itertools.chain.from_iterable(row[:num_features] for row in rows),
+        dtype=np.float32, count=int(lengths.sum())
+    )
+    frames = np.zeros((len(rows), num_features), dtype=np.float32)
+    frames[np.arange(num_features) < lengths[:, np.newaxis]] = values
+    return frames
+
+def fit_frames(frames: LandmarkFrames, num_features: int = Config.NUM_LANDMARK_FEATURES) -> np.ndarray:
+    """Copies ``frames`` into a contiguous (N, num_features) float32 array.
+
+    Rows of the wrong width, ragged lists included, are truncated or zero-padded.
+    """
+    if len(frames) == 0:
+        return np.zeros((0, num_features), dtype=np.float32)
+    try:
+        array = np.array(frames, dtype=np.float32)
+    except ValueError:
+        return _repair_ragged(frames, num_features)
+    if array.ndim != 2:
+        raise ValueError(f"Expected a list of landmark frames, got an array of shape {array.shape}.")
+    if array.shape[1] == num_features:
+        return array
+
+    fitted = np.zeros((array.shape[0], num_features), dtype=np.float32)
+    width = min(array.shape[1], num_features)
+    fitted[:, :width] = array[:, :width]
+    return fitted
+
+def finite_rows(array: np.ndarray) -> np.ndarray:
+    """Boolean mask over the leading axes marking items whose values are all finite."""
+    return np.isfinite(array).all(axis=-1)
+
+class LandmarkPreprocessor:
+    """Turns request landmarks into the contiguous float32 tensors the models take.
+
+    Sequences keep their last ``num_frames`` frames and are zero-padded at the
+    end, as in training. Frames containing NaN or infinite values are zeroed,
+    i.e. treated like frames without a detected hand. Static frames with such
+    values are rejected instead, since there is nothing left to classify.
+    ``normalize`` applies :func:`normalize_landmarks` for models trained on
+    wrist-relative coordinates (``normalizeLandmarks`` in the model manifest).
+    """
+
+    def __init__(self, num_frames: int = Config.NUM_FRAMES_VIDEO,
+                 num_features: int = Config.NUM_LANDMARK_FEATURES):
+        self.num_frames = num_frames
+        self.num_features = num_features
+
+    def static_batch(self, items: LandmarkFrames, normalize: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the (N, features) batch and a mask of the items holding only finite values.
+
+        Items must already have ``num_features`` values each.
+        """
+        batch = np.array(items, dtype=np.float32).reshape(-1, self.num_features)
+        valid = finite_rows(batch)
+        if not valid.all():
+            batch[~valid] = 0.0
+        if normalize:
+            normalize_landmarks(batch)
+        return batch, valid
+
+    def static(self, landmarks: Union[Sequence[float], np.ndarray], normalize: bool = False) -> np.ndarray:
+        batch, valid = self.static_batch(landmarks, normalize)
+        if not valid[0]:
+            raise ValueError("Landmarks contain NaN or infinite values.")
+        return batch[0]
+
+    def frame(self, frame: Union[Sequence[float], np.ndarray], normalize: bool = False) -> np.ndarray:
+        """Prepares one frame of a sequence, e.g. for streaming inference."""
+        fitted = fit_frames(np.reshape(frame, (1, -1)), self.num_features)
+        return self._finish_sequences(fitted, normalize)[0]
+
+    def _fill_sequence(self, out: np.ndarray, sequence: Any):
+        frames = fit_frames(sequence[-self.num_frames:], self.num_features)
+        out[:len(frames)] = frames
+
+    @staticmethod
+    def _finish_sequences(batch: np.ndarray, normalize: bool) -> np.ndarray:
+        invalid = ~finite_rows(batch)
+        if invalid.any():
+            batch[invalid] = 0.0
+        if normalize:
+            normalize_landmarks(batch)
+        return batch
+
+    def sequence_batch(self, sequences: Union[np.ndarray, Sequence[LandmarkFrames]], normalize: bool = False) -> np.ndarray:
+        """Fits every sequence to (num_frames, num_features); an evenly shaped batch takes one array copy."""
+        if isinstance(sequences, np.ndarray) and sequences.ndim == 3:
+            array = sequences
+        else:
+            try:
+                array = np.array(sequences, dtype=np.float32)
+            except ValueError:
+                array = None
+
+        if array is not None and array.ndim == 3:
+            array = array[:, -self.num_frames:]
+            if array.shape[1:] == (self.num_frames, self.num_features):
+                batch = np.array(array, dtype=np.float32)
+            else:
+                batch = np.zeros((len(array), self.num_frames, self.num_features), dtype=np.float32)
+                width = min(array.shape[2], self.num_features)
+                batch[:, :array.shape[1], :width] = array[:, :, :width]
+        else:
+            batch = np.zeros((len(sequences), self.num_frames, self.num_features), dtype=np.float32)
+            for out, sequence in zip(batch, sequences):
+                self._fill_sequence(out, sequence)
+        return self._finish_sequences(batch, normalize)
+
+    def sequence(self, sequence: LandmarkFrames, normalize: bool = False) -> np.ndarray:
+        batch = np.zeros((1, self.num_frames, self.num_features), dtype=np.float32)
+        self._fill_sequence(batch[0], sequence)
+        return self._finish_sequences(batch, normalize)[0]
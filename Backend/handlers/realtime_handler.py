@@ -1,225 +1,382 @@
 import time
 import asyncio
+import numpy as np
+from collections import Counter
 from uuid import uuid4
 from typing import List, Dict, Union, Any, Optional
-from fastapi import WebSocket, HTTPException
+from fastapi import WebSocket, HTTPException, status
 from config import Config
-import traceback 
+from logger import get_logger
+import profiling
 from handlers.model_handler import ModelHandler
+from handlers.session_state import SessionState, mean_abs_movement
+from handlers.session_store import SessionStore, InMemorySessionStore, SessionLockTimeout
+from handlers.streaming_lstm import StreamingRecognizer
 
 model_handler: Optional[ModelHandler] = None 
+streaming_recognizer: Optional[StreamingRecognizer] = None
 def set_model_handler_instance(handler: ModelHandler):
-    global model_handler
+    global model_handler, streaming_recognizer
     model_handler = handler
+    if Config.REALTIME_STREAMING_MODEL:
+        streaming_recognizer = StreamingRecognizer(handler, Config.REALTIME_STREAMING_MODEL)
 
-def log_info(message: str, meta: Optional[Dict] = None):
-    print(f"[INFO] {message}", meta if meta else "")
+async def close_streaming_recognizer():
+    if streaming_recognizer is not None:
+        await streaming_recognizer.close()
 
-def log_error(message: str, error: Union[Exception, Dict] = None):
-    meta = {"message": str(error), "stack": traceback.format_exc()} if isinstance(error, Exception) else error
-    print(f"[ERROR] {message}", meta if meta else "")
+logger = get_logger(__name__)
 
-user_sessions: Dict[str, Dict[str, Any]] = {}
+class WebSocketSender:
+    """The only writer for one socket.
+
+    The receive loop, the relay of updates from other workers and
+    publish_update all send on the same socket, so every frame and the
+    final close go through this lock and never interleave.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.lock = asyncio.Lock()
+
+    async def send_json(self, message: Dict[str, Any]):
+        async with self.lock:
+            await self.websocket.send_json(message)
+
+    async def close(self, code: int, reason: str):
+        async with self.lock:
+            await self.websocket.close(code=code, reason=reason)
+
+# Sockets accepted by this worker; see SessionStore for what is shared.
+session_websockets: Dict[str, WebSocketSender] = {}
+
+def on_session_removed(session_id: str, reason: str):
+    logger.info(f"Session {session_id} removed by session store ({reason}).")
+    if streaming_recognizer is not None:
+        streaming_recognizer.reset(session_id)
+    sender = session_websockets.pop(session_id, None)
+    if sender is not None:
+        asyncio.get_running_loop().create_task(
+            sender.close(code=status.WS_1001_GOING_AWAY, reason=f"Session {reason}")
+        )
+
+session_store: SessionStore = InMemorySessionStore()
+session_store.on_remove = on_session_removed
+def set_session_store(store: SessionStore):
+    global session_store
+    store.on_remove = on_session_removed
+    session_store = store
+
+realtime_stats = {
+    "static_inferences": 0,
+    "static_inferences_skipped": 0
+}
 
 async def cleanup_inactive_sessions():
-    now = time.time() * 1000
-    inactive_threshold = Config.REALTIME_SESSION_TIMEOUT_MS
-    
-    sessions_to_delete = []
-    for session_id, session_data in user_sessions.items():
-        if now - session_data['last_activity'] > inactive_threshold:
-            sessions_to_delete.append(session_id)
-            log_info(f"Cleaned up inactive session: {session_id}")
-            
-    for session_id in sessions_to_delete:
-        del user_sessions[session_id]
-
-def create_session(user_id: Optional[str] = None) -> Dict[str, Any]:
-    session_id = user_id if user_id else str(uuid4())
-    session_data = {
-        "user_id": user_id,
-        "static_buffer": [],
-        "dynamic_buffer": [],
-        "last_letter": None,
-        "last_word": None,
-        "current_word": "",
-        "full_text": "",
-        "stable_frames": 0,
-        "is_in_motion": False,
-        "last_activity": time.time() * 1000,
-        "websocket": None
+    await session_store.cleanup()
+
+def seconds_until_next_cleanup() -> float:
+    """Sleeps until the earliest session deadline, capped at REALTIME_CLEANUP_MAX_INTERVAL_S."""
+    delay = Config.REALTIME_CLEANUP_MAX_INTERVAL_S
+    next_expiry = session_store.next_expiry_ms()
+    if next_expiry is not None:
+        delay = min(delay, max(0.0, next_expiry / 1000 - time.time()))
+    return delay
+
+async def get_session_store_stats() -> Dict[str, Any]:
+    stats = {
+        **await session_store.stats(),
+        "websockets": len(session_websockets),
+        "staticInferences": realtime_stats["static_inferences"],
+        "staticInferencesSkipped": realtime_stats["static_inferences_skipped"]
     }
-    user_sessions[session_id] = session_data
-    log_info(f"New user session created: {session_id}")
+    if streaming_recognizer is not None:
+        stats["streaming"] = streaming_recognizer.stats()
+    return stats
+
+async def create_session(user_id: Optional[str] = None) -> Dict[str, Any]:
+    session_id = user_id if user_id else str(uuid4())
+    await session_store.create(SessionState(session_id, user_id))
+    logger.info(f"New user session created: {session_id}")
     return {"success": True, "sessionId": session_id}
 
-def get_session(session_id: str) -> Optional[Dict[str, Any]]:
-    session = user_sessions.get(session_id)
-    if session:
-        session['last_activity'] = time.time() * 1000
-    return session
+async def get_session(session_id: str) -> Optional[SessionState]:
+    return await session_store.get(session_id)
 
-def end_session(session_id: str) -> Dict[str, Any]:
-    session = user_sessions.pop(session_id, None)
+async def end_session(session_id: str) -> Dict[str, Any]:
+    # Under the session lock, so a frame in flight saves before the delete rather than after it.
+    try:
+        async with session_store.lock(session_id):
+            session = await session_store.delete(session_id)
+    except SessionLockTimeout:
+        return dict(SESSION_BUSY)
     if not session:
         return {"success": False, "error": "Session not found"}
+    if streaming_recognizer is not None:
+        streaming_recognizer.reset(session_id)
     
-    if session.get("current_word"):
+    if session.current_word:
         asyncio.create_task(complete_word_in_session(session)) 
 
-    log_info(f"Session ended: {session_id}")
-    return {"success": True, "fullText": session.get("full_text", ""), "sessionId": session_id}
+    logger.info(f"Session ended: {session_id}")
+    return {"success": True, "fullText": session.full_text, "sessionId": session_id}
 
-def get_session_status(session_id: str) -> Dict[str, Any]:
-    session = user_sessions.get(session_id)
+async def get_session_status(session_id: str) -> Dict[str, Any]:
+    session = await session_store.get(session_id, touch=False)
     if not session:
         return {"success": False, "error": "Session not found"}
     
     return {
         "success": True,
         "sessionId": session_id,
-        "currentWord": session.get("current_word", ""),
-        "fullText": session.get("full_text", ""),
-        "lastLetter": session.get("last_letter", None),
-        "lastWord": session.get("last_word", None)
+        "currentWord": session.current_word,
+        "fullText": session.full_text,
+        "lastLetter": session.last_letter,
+        "lastWord": session.last_word,
+        "staticInferences": session.static_inferences,
+        "staticInferencesSkipped": session.static_inferences_skipped
     }
 
+def attach_websocket(session_id: str, websocket: WebSocket) -> WebSocketSender:
+    sender = WebSocketSender(websocket)
+    session_websockets[session_id] = sender
+    return sender
+
+def detach_websocket(session_id: str, sender: WebSocketSender):
+    if session_websockets.get(session_id) is sender:
+        del session_websockets[session_id]
+
 async def publish_update(session_id: str, update: Dict[str, Any]):
-    session = user_sessions.get(session_id)
-    if session and session.get("websocket"):
+    message = {"timestamp": int(time.time() * 1000), **update}
+    sender = session_websockets.get(session_id)
+    with profiling.stage("publish_update", type=update.get("type")):
+        if sender is None:
+            if session_store.shared:
+                await session_store.publish(session_id, message)
+            return
+
         try:
-            await session["websocket"].send_json({
-                "timestamp": int(time.time() * 1000),
-                **update
-            })
+            await sender.send_json(message)
         except Exception as e:
-            log_error(f"Failed to send WebSocket update for session {session_id}:", e)
-            session["websocket"] = None
+            logger.error(f"Failed to send WebSocket update for session {session_id}:", e)
+            detach_websocket(session_id, sender)
 
-def is_stable_pose(session: Dict[str, Any], landmarks: List[float]) -> bool:
-    if not session["static_buffer"]:
-        session["static_buffer"].append(landmarks)
+def is_stable_pose(session: SessionState, frame: np.ndarray) -> bool:
+    if not len(session.static_buffer):
+        session.static_buffer.append(frame)
         return False
     
-    last_landmarks = session["static_buffer"][-1]
-    diff_sum = sum(abs(landmarks[i] - last_landmarks[i]) for i in range(min(len(landmarks), len(last_landmarks))))
-    avg_diff = diff_sum / len(landmarks)
-    
-    session["static_buffer"].append(landmarks)
-    if len(session["static_buffer"]) > 10:
-        session["static_buffer"].pop(0)
+    avg_diff = mean_abs_movement(frame, session.static_buffer.last())
+    session.static_buffer.append(frame)
 
     is_stable = avg_diff < (Config.REALTIME_MOVEMENT_THRESHOLD or 0.015)
     
     if is_stable:
-        session["stable_frames"] += 1
+        session.stable_frames += 1
     else:
-        session["stable_frames"] = 0
+        session.stable_frames = 0
     
-    return session["stable_frames"] >= (Config.REALTIME_STABLE_FRAME_THRESHOLD or 5)
+    return session.stable_frames >= (Config.REALTIME_STABLE_FRAME_THRESHOLD or 5)
 
-def detect_dynamic_sign(session: Dict[str, Any], landmarks: List[float]) -> Dict[str, bool]:
-    if not session["dynamic_buffer"]:
-        session["dynamic_buffer"].append(landmarks)
+def detect_dynamic_sign(session: SessionState, frame: np.ndarray) -> Dict[str, bool]:
+    if not len(session.dynamic_buffer):
+        session.dynamic_buffer.append(frame)
         return {"isStarting": False, "isEnding": False}
     
-    last_landmarks = session["dynamic_buffer"][-1]
-    diff_sum = sum(abs(landmarks[i] - last_landmarks[i]) for i in range(min(len(landmarks), len(last_landmarks))))
-    avg_diff = diff_sum / len(landmarks)
-    
-    session["dynamic_buffer"].append(landmarks)
-    if len(session["dynamic_buffer"]) > 30: 
-        session["dynamic_buffer"].pop(0)
+    avg_diff = mean_abs_movement(frame, session.dynamic_buffer.last())
+    session.dynamic_buffer.append(frame)
 
     movement_threshold = Config.REALTIME_MOVEMENT_THRESHOLD or 0.03
     is_moving = avg_diff > movement_threshold
     
-    was_in_motion = session["is_in_motion"]
-    session["is_in_motion"] = is_moving
+    was_in_motion = session.is_in_motion
+    session.is_in_motion = is_moving
     
     return {
         "isStarting": is_moving and not was_in_motion,
-        "isEnding": not is_moving and was_in_motion and len(session["dynamic_buffer"]) >= (Config.REALTIME_MIN_SEQUENCE_FRAMES or 15)
+        "isEnding": not is_moving and was_in_motion and len(session.dynamic_buffer) >= (Config.REALTIME_MIN_SEQUENCE_FRAMES or 15)
     }
 
-async def add_letter_to_word(session: Dict[str, Any], letter: str):
-    if letter == session["last_letter"]:
+def should_run_static_inference(session: SessionState, frame: np.ndarray) -> bool:
+    """Stability gate for the static model in "stable" mode.
+
+    Frames are skipped while the hand is moving, and again once a letter has
+    been emitted for the current stable pose. Any movement resets the votes.
+    """
+    if not is_stable_pose(session, frame):
+        if session.stable_frames == 0:
+            session.static_votes.clear()
+            session.letter_emitted = False
+        return False
+    return not session.letter_emitted
+
+def _static_gate(session: SessionState, frame: np.ndarray) -> bool:
+    with profiling.stage("motion_detection", gate="static"):
+        return should_run_static_inference(session, frame)
+
+def vote_static_letter(session: SessionState, static_result: Dict[str, Any]) -> Optional[str]:
+    """Collects confident predictions over the stable window and returns the majority letter once decided."""
+    if static_result["confidence"] > (Config.REALTIME_CONFIDENCE_THRESHOLD or 0.7):
+        session.static_votes.append(static_result["class"])
+
+    vote_frames = max(1, Config.REALTIME_STATIC_VOTE_FRAMES)
+    if len(session.static_votes) < vote_frames:
+        return None
+
+    letter, count = Counter(session.static_votes).most_common(1)[0]
+    session.static_votes.clear()
+    if count * 2 <= vote_frames:
+        return None
+
+    session.letter_emitted = True
+    return letter
+
+async def add_letter_to_word(session: SessionState, letter: str):
+    if letter == session.last_letter:
         return
     
-    session["last_letter"] = letter
-    session["current_word"] += letter
+    session.last_letter = letter
+    session.current_word += letter
     
-    await publish_update(session["user_id"], {
+    await publish_update(session.session_id, {
         "type": "letter",
         "letter": letter,
-        "currentWord": session["current_word"],
-        "fullText": session["full_text"]
+        "currentWord": session.current_word,
+        "fullText": session.full_text
     })
 
-async def complete_word_in_session(session: Dict[str, Any], word: Optional[str] = None):
-    word_to_add = word if word else session["current_word"]
+async def complete_word_in_session(session: SessionState, word: Optional[str] = None):
+    word_to_add = word if word else session.current_word
     
     if not word_to_add:
         return
     
-    if session["full_text"]:
-        session["full_text"] += " "
+    if session.full_text:
+        session.full_text += " "
     
-    session["full_text"] += word_to_add
-    session["last_word"] = word_to_add
-    session["current_word"] = ""
+    session.full_text += word_to_add
+    session.last_word = word_to_add
+    session.current_word = ""
     
-    await publish_update(session["user_id"], {
+    await publish_update(session.session_id, {
         "type": "word",
         "word": word_to_add,
-        "fullText": session["full_text"]
+        "fullText": session.full_text
     })
 
-async def process_realtime_landmarks(session_id: str, landmarks: List[float]):
-    session = get_session(session_id)
+async def stream_dynamic_sign(session: SessionState, frame: np.ndarray, dynamic_status: Dict[str, bool]):
+    """Streaming counterpart of the segment re-run: one LSTM step per frame while the hand moves.
+
+    The stream restarts when motion starts, so its prediction covers the current
+    movement, and the word is committed from it when the motion ends.
+    """
+    if dynamic_status["isStarting"]:
+        streaming_recognizer.reset(session.session_id)
+    if not (session.is_in_motion or dynamic_status["isEnding"]):
+        return
+
+    with profiling.stage("streaming_step"):
+        prediction = await streaming_recognizer.step(session.session_id, frame)
+    await publish_update(session.session_id, {"type": "dynamicPrediction", "prediction": prediction})
+
+    if dynamic_status["isEnding"]:
+        if prediction["frames"] >= Config.REALTIME_MIN_SEQUENCE_FRAMES \
+                and prediction["confidence"] > (Config.REALTIME_CONFIDENCE_THRESHOLD or 0.7):
+            await complete_word_in_session(session, prediction["class"])
+        streaming_recognizer.reset(session.session_id)
+        session.dynamic_buffer.clear()
+
+SESSION_BUSY = {"success": False, "error": "Session is busy; another frame is still being processed."}
+
+async def process_realtime_landmarks(session_id: str, landmarks: Union[List[float], np.ndarray]):
+    with profiling.session_trace("realtime.landmarks", session_id):
+        try:
+            async with session_store.lock(session_id):
+                return await _process_realtime_landmarks(session_id, landmarks)
+        except SessionLockTimeout:
+            return dict(SESSION_BUSY)
+
+async def _process_realtime_landmarks(session_id: str, landmarks: Union[List[float], np.ndarray]):
+    with profiling.stage("session_load"):
+        session = await get_session(session_id)
     if not session:
-        log_error(f"Session {session_id} not found for landmark processing.")
+        logger.error(f"Session {session_id} not found for landmark processing.")
         return {"success": False, "error": "Session not found"}
 
     if not model_handler:
-        log_error("ModelHandler not initialized in realtime_handler.")
+        logger.error("ModelHandler not initialized in realtime_handler.")
         return {"success": False, "error": "Internal server error: Model handler not ready."}
 
     try:
-        static_result = await model_handler.predict_static_sign(landmarks)
-        
-        if static_result and static_result["confidence"] > (Config.REALTIME_CONFIDENCE_THRESHOLD or 0.7):
-            await add_letter_to_word(session, static_result["class"])
+        frame = np.asarray(landmarks, dtype=np.float32)
+        # Checked before the movement gates, which would otherwise fail to broadcast against the buffered frames.
+        if frame.ndim != 1 or frame.size != Config.NUM_LANDMARK_FEATURES:
+            raise HTTPException(status_code=400, detail=f"Invalid landmark array length. Expected {Config.NUM_LANDMARK_FEATURES}, got {frame.size}.")
+
+        if Config.REALTIME_STATIC_GATING == "always":
+            with profiling.stage("static_inference"):
+                static_result = await model_handler.predict_static_sign(frame)
+            session.static_inferences += 1
+            realtime_stats["static_inferences"] += 1
 
+            if static_result and static_result["confidence"] > (Config.REALTIME_CONFIDENCE_THRESHOLD or 0.7):
+                await add_letter_to_word(session, static_result["class"])
+        elif _static_gate(session, frame):
+            with profiling.stage("static_inference"):
+                static_result = await model_handler.predict_static_sign(frame)
+            session.static_inferences += 1
+            realtime_stats["static_inferences"] += 1
 
-        dynamic_status = detect_dynamic_sign(session, landmarks)
+            letter = vote_static_letter(session, static_result)
+            if letter:
+                await add_letter_to_word(session, letter)
+        else:
+            session.static_inferences_skipped += 1
+            realtime_stats["static_inferences_skipped"] += 1
+
+        with profiling.stage("motion_detection"):
+            dynamic_status = detect_dynamic_sign(session, frame)
         
-        if dynamic_status["isEnding"]:
-            if len(session["dynamic_buffer"]) >= Config.REALTIME_MIN_SEQUENCE_FRAMES:
-                dynamic_result = await model_handler.predict_dynamic_sign(session["dynamic_buffer"])
+        if streaming_recognizer is not None and streaming_recognizer.available():
+            await stream_dynamic_sign(session, frame, dynamic_status)
+        elif dynamic_status["isEnding"]:
+            if len(session.dynamic_buffer) >= Config.REALTIME_MIN_SEQUENCE_FRAMES:
+                with profiling.stage("dynamic_inference", frames=len(session.dynamic_buffer)):
+                    dynamic_result = await model_handler.predict_dynamic_sign(session.dynamic_buffer.view())
                 
                 if dynamic_result and dynamic_result["confidence"] > (Config.REALTIME_CONFIDENCE_THRESHOLD or 0.7):
                     await complete_word_in_session(session, dynamic_result["class"])
-                session["dynamic_buffer"] = [] 
+                session.dynamic_buffer.clear()
             else:
-                log_info(f"Dynamic sequence too short for prediction ({len(session['dynamic_buffer'])} frames). Clearing buffer.")
-                session["dynamic_buffer"] = []
+                logger.debug("Dynamic sequence too short for prediction (%d frames). Clearing buffer.", len(session.dynamic_buffer))
+                session.dynamic_buffer.clear()
 
+        with profiling.stage("session_save"):
+            await session_store.save(session)
         return {"success": True, "sessionId": session_id}
     except Exception as e:
-        log_error(f"Error processing realtime landmarks for session {session_id}:", e)
+        logger.error(f"Error processing realtime landmarks for session {session_id}:", e)
         if isinstance(e, HTTPException):
             raise e
         return {"success": False, "error": str(e)}
 
-async def process_realtime_landmark_sequence(session_id: str, landmark_sequence: List[List[float]]):
-    session = get_session(session_id)
+async def process_realtime_landmark_sequence(session_id: str, landmark_sequence: Union[List[List[float]], np.ndarray]):
+    with profiling.session_trace("realtime.landmarkSequence", session_id):
+        try:
+            async with session_store.lock(session_id):
+                return await _process_realtime_landmark_sequence(session_id, landmark_sequence)
+        except SessionLockTimeout:
+            return dict(SESSION_BUSY)
+
+async def _process_realtime_landmark_sequence(session_id: str, landmark_sequence: Union[List[List[float]], np.ndarray]):
+    with profiling.stage("session_load"):
+        session = await get_session(session_id)
     if not session:
-        log_error(f"Session {session_id} not found for landmark sequence processing.")
+        logger.error(f"Session {session_id} not found for landmark sequence processing.")
         return {"success": False, "error": "Session not found"}
     
     if not model_handler:
-        log_error("ModelHandler not initialized in realtime_handler.")
+        logger.error("ModelHandler not initialized in realtime_handler.")
         return {"success": False, "error": "Internal server error: Model handler not ready."}
 
     try:
@@ -227,46 +384,56 @@ async def process_realtime_landmark_sequence(session_id: str, landmark_sequence:
         if dynamic_result and dynamic_result["confidence"] > (Config.REALTIME_CONFIDENCE_THRESHOLD or 0.7):
             await complete_word_in_session(session, dynamic_result["class"])
         
+        with profiling.stage("session_save"):
+            await session_store.save(session)
         return {"success": True, "sessionId": session_id, "result": dynamic_result}
     except Exception as e:
-        log_error(f"Error processing realtime landmark sequence for session {session_id}:", e)
+        logger.error(f"Error processing realtime landmark sequence for session {session_id}:", e)
         if isinstance(e, HTTPException):
             raise e
         return {"success": False, "error": str(e)}
 
-def correct_prediction(session_id: str, correction_type: str, correction_value: str) -> Dict[str, Any]:
-    session = user_sessions.get(session_id)
+async def correct_prediction(session_id: str, correction_type: str, correction_value: str) -> Dict[str, Any]:
+    try:
+        async with session_store.lock(session_id):
+            return await _correct_prediction(session_id, correction_type, correction_value)
+    except SessionLockTimeout:
+        return dict(SESSION_BUSY)
+
+async def _correct_prediction(session_id: str, correction_type: str, correction_value: str) -> Dict[str, Any]:
+    session = await session_store.get(session_id, touch=False)
     if not session:
         return {"success": False, "error": "Session not found"}
     
     if correction_type == 'letter':
-        if session["current_word"]:
-            session["current_word"] = session["current_word"][:-1] + correction_value
+        if session.current_word:
+            session.current_word = session.current_word[:-1] + correction_value
         else:
-            session["current_word"] = correction_value
+            session.current_word = correction_value
     elif correction_type == 'word':
-        words = session["full_text"].split(' ')
+        words = session.full_text.split(' ')
         if words and words[-1]: 
             words[-1] = correction_value
-            session["full_text"] = ' '.join(words)
+            session.full_text = ' '.join(words)
         else: 
-            session["full_text"] = correction_value
+            session.full_text = correction_value
     elif correction_type == 'clearWord':
-        session["current_word"] = ''
+        session.current_word = ''
     elif correction_type == 'clearText':
-        session["full_text"] = ''
-        session["current_word"] = ''
+        session.full_text = ''
+        session.current_word = ''
     else:
         return {"success": False, "error": "Invalid correction type"}
     
+    await session_store.save(session)
     asyncio.create_task(publish_update(session_id, {
         "type": "correction",
-        "currentWord": session["current_word"],
-        "fullText": session["full_text"]
+        "currentWord": session.current_word,
+        "fullText": session.full_text
     }))
     
     return {
         "success": True,
-        "currentWord": session["current_word"],
-        "fullText": session["full_text"]
+        "currentWord": session.current_word,
+        "fullText": session.full_text
     }
\ No newline at end of file
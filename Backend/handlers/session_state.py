@@ -0,0 +1,134 @@
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+
+STATIC_BUFFER_FRAMES = 10
+SESSION_OVERHEAD_BYTES = 1024
+
+class LandmarkRingBuffer:
+    """Fixed-capacity float32 frame buffer whose contents are always one contiguous slice.
+
+    Every frame is written twice, at ``i`` and ``i + capacity``, so the frames
+    in arrival order are ``_data[start:start + size]`` without any copying or
+    wrap-around handling.
+    """
+    __slots__ = ("capacity", "num_features", "size", "_start", "_data")
+
+    def __init__(self, capacity: int, num_features: int = Config.NUM_LANDMARK_FEATURES):
+        self.capacity = capacity
+        self.num_features = num_features
+        self.size = 0
+        self._start = 0
+        self._data = np.zeros((2 * capacity, num_features), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, frame: np.ndarray):
+        if self.size < self.capacity:
+            position = self._start + self.size
+            self.size += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        length = min(len(frame), self.num_features)
+        for row in (position, position + self.capacity):
+            self._data[row, :length] = frame[:length]
+            self._data[row, length:] = 0.0
+
+    def last(self) -> np.ndarray:
+        return self._data[self._start + self.size - 1]
+
+    def view(self) -> np.ndarray:
+        """Frames oldest-first; only valid until the next append or clear."""
+        return self._data[self._start:self._start + self.size]
+
+    def clear(self):
+        self.size = 0
+        self._start = 0
+
+    def load(self, frames: np.ndarray):
+        """Replaces the contents with ``frames`` (oldest-first), keeping the newest ``capacity``."""
+        frames = frames[-self.capacity:]
+        self.clear()
+        self.size = len(frames)
+        self._data[:self.size] = frames
+        self._data[self.capacity:self.capacity + self.size] = frames
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+class SessionState:
+    __slots__ = (
+        "session_id", "user_id", "static_buffer", "dynamic_buffer",
+        "last_letter", "last_word", "current_word", "full_text",
+        "stable_frames", "is_in_motion", "last_activity",
+        "static_votes", "letter_emitted", "static_inferences", "static_inferences_skipped"
+    )
+
+    # Scalar fields carried in a serialized record's "meta" entry.
+    META_FIELDS = (
+        "user_id", "last_letter", "last_word", "current_word", "full_text",
+        "stable_frames", "is_in_motion", "static_votes", "letter_emitted",
+        "static_inferences", "static_inferences_skipped"
+    )
+
+    def __init__(self, session_id: str, user_id: Optional[str] = None):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.static_buffer = LandmarkRingBuffer(STATIC_BUFFER_FRAMES)
+        self.dynamic_buffer = LandmarkRingBuffer(Config.NUM_FRAMES_VIDEO)
+        self.last_letter: Optional[str] = None
+        self.last_word: Optional[str] = None
+        self.current_word = ""
+        self.full_text = ""
+        self.stable_frames = 0
+        self.is_in_motion = False
+        self.last_activity = time.time() * 1000
+        self.static_votes: List[str] = []
+        self.letter_emitted = False
+        self.static_inferences = 0
+        self.static_inferences_skipped = 0
+
+    def touch(self):
+        self.last_activity = time.time() * 1000
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint, used for the session store's byte budget."""
+        text_bytes = len(self.current_word) + len(self.full_text) + sum(len(vote) for vote in self.static_votes)
+        return SESSION_OVERHEAD_BYTES + self.static_buffer.nbytes + self.dynamic_buffer.nbytes + text_bytes
+
+    def to_record(self) -> Dict[str, bytes]:
+        """Serializes the session into flat byte fields, e.g. for a Redis hash."""
+        meta = {field: getattr(self, field) for field in self.META_FIELDS}
+        return {
+            "meta": json.dumps(meta).encode(),
+            "last_activity": repr(self.last_activity).encode(),
+            "static": self.static_buffer.view().tobytes(),
+            "dynamic": self.dynamic_buffer.view().tobytes()
+        }
+
+    @classmethod
+    def from_record(cls, session_id: str, record: Dict[bytes, bytes]) -> "SessionState":
+        record = {key.decode() if isinstance(key, bytes) else key: value for key, value in record.items()}
+        session = cls(session_id)
+        for field, value in json.loads(record["meta"]).items():
+            if field in cls.META_FIELDS:
+                setattr(session, field, value)
+        session.last_activity = float(record["last_activity"])
+
+        for name in ("static", "dynamic"):
+            buffer: LandmarkRingBuffer = getattr(session, f"{name}_buffer")
+            frames = np.frombuffer(record.get(name, b""), dtype=np.float32)
+            buffer.load(frames.reshape(-1, buffer.num_features))
+        return session
+
+def mean_abs_movement(frame: np.ndarray, previous: np.ndarray) -> float:
+    return float(np.abs(frame - previous).mean())
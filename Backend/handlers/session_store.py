@@ -0,0 +1,422 @@
+import json
+import time
+import heapq
+import asyncio
+from uuid import uuid4
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from logger import get_logger
+from handlers.session_state import SessionState
+
+logger = get_logger(__name__)
+
+class SessionLockTimeout(Exception):
+    """Raised when a session stays locked for longer than SESSION_LOCK_WAIT_S."""
+
+class _LocalLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+class SessionStore:
+    """Storage backend for realtime sessions.
+
+    ``get`` returns a session that the caller may mutate; changes are only
+    guaranteed to be visible to other workers after ``save``. ``save`` only
+    updates a session that is still stored: one ended, expired or evicted
+    while a frame was in flight stays gone. Callers doing
+    get, mutate and save across awaits hold ``lock(session_id)`` around it,
+    so concurrent frames for one session are applied one after the other.
+    ``shared`` is True for backends reachable from several processes, which
+    also carry WebSocket updates between workers through
+    ``publish``/``subscribe``.
+
+    Only the serialized ``SessionState`` is shared. What cannot be
+    serialized stays in the worker that set it up: the session's WebSocket,
+    its streaming LSTM state and its profiling switch.
+    """
+    shared = False
+
+    def __init__(self):
+        self._locks: Dict[str, _LocalLock] = {}
+        # Called with (session_id, reason) whenever the store drops a session on its own.
+        self.on_remove: Optional[Callable[[str, str], None]] = None
+        self.expired_total = 0
+        self.evicted_capacity_total = 0
+        self.evicted_memory_total = 0
+
+    def _removed(self, session_id: str, reason: str):
+        if reason == "expired":
+            self.expired_total += 1
+        elif reason == "capacity":
+            self.evicted_capacity_total += 1
+        elif reason == "memory":
+            self.evicted_memory_total += 1
+        if self.on_remove is not None:
+            self.on_remove(session_id, reason)
+
+    def next_expiry_ms(self) -> Optional[float]:
+        """Wall-clock time (ms) at which the next session expires, if the store knows it."""
+        return None
+
+    def _shared_lock(self, session_id: str, wait_seconds: float):
+        return nullcontext()
+
+    @asynccontextmanager
+    async def lock(self, session_id: str, wait_seconds: float = Config.SESSION_LOCK_WAIT_S):
+        """Serializes read-modify-write cycles on one session, within this process and, for shared stores, across workers."""
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _LocalLock()
+        entry.users += 1
+        try:
+            try:
+                await asyncio.wait_for(entry.lock.acquire(), wait_seconds)
+            except asyncio.TimeoutError:
+                raise SessionLockTimeout(session_id) from None
+            try:
+                async with self._shared_lock(session_id, wait_seconds):
+                    yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                self._locks.pop(session_id, None)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "active": await self.count(),
+            "expired": self.expired_total,
+            "evictedCapacity": self.evicted_capacity_total,
+            "evictedMemory": self.evicted_memory_total
+        }
+
+    async def create(self, session: SessionState):
+        raise NotImplementedError
+
+    async def get(self, session_id: str, touch: bool = True) -> Optional[SessionState]:
+        raise NotImplementedError
+
+    async def save(self, session: SessionState):
+        raise NotImplementedError
+
+    async def delete(self, session_id: str) -> Optional[SessionState]:
+        raise NotImplementedError
+
+    async def cleanup(self, now_ms: Optional[float] = None) -> List[str]:
+        """Removes sessions idle for longer than the session timeout and returns their IDs."""
+        raise NotImplementedError
+
+    async def count(self) -> int:
+        raise NotImplementedError
+
+    async def publish(self, session_id: str, message: Dict[str, Any]):
+        pass
+
+    async def subscribe(self, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        pass
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; sessions are only visible to the worker that created them.
+
+    ``deadlines`` is a min-heap of ``(last_activity, session_id)`` holding one
+    entry per session, pushed on ``create``. A touch only updates the
+    session, so it stays O(1); when an entry whose session has been touched
+    since reaches the top, it is pushed back with the current activity
+    time, and entries of removed sessions are dropped there too. The top is
+    then both the next session to expire and the least recently active one,
+    so expiry and LRU eviction cost O(log n) per session instead of a scan.
+    Entries left by removed sessions are compacted away once they outnumber
+    the live ones.
+    """
+
+    def __init__(self, timeout_ms: float = Config.REALTIME_SESSION_TIMEOUT_MS,
+                 max_sessions: int = Config.REALTIME_MAX_SESSIONS,
+                 max_bytes: int = int(Config.REALTIME_SESSION_MEMORY_BUDGET_MB * 1024 * 1024)):
+        super().__init__()
+        self.timeout_ms = timeout_ms
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sessions: Dict[str, SessionState] = {}
+        self.deadlines: List[Tuple[float, str]] = []
+        self.session_bytes: Dict[str, int] = {}
+        self.total_bytes = 0
+
+    def _account(self, session: SessionState):
+        size = session.nbytes
+        self.total_bytes += size - self.session_bytes.get(session.session_id, 0)
+        self.session_bytes[session.session_id] = size
+
+    def _pop(self, session_id: str) -> Optional[SessionState]:
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.total_bytes -= self.session_bytes.pop(session_id, 0)
+        return session
+
+    def _insert(self, session: SessionState):
+        self.sessions[session.session_id] = session
+        heapq.heappush(self.deadlines, (session.last_activity, session.session_id))
+        if len(self.deadlines) > 2 * len(self.sessions) + 64:
+            self.deadlines = [(other.last_activity, session_id) for session_id, other in self.sessions.items()]
+            heapq.heapify(self.deadlines)
+
+    def _oldest(self) -> Optional[SessionState]:
+        """The least recently active session, bringing stale heap entries up to date on the way."""
+        while self.deadlines:
+            last_activity, session_id = self.deadlines[0]
+            session = self.sessions.get(session_id)
+            if session is None:
+                heapq.heappop(self.deadlines)
+            elif session.last_activity != last_activity:
+                heapq.heapreplace(self.deadlines, (session.last_activity, session_id))
+            else:
+                return session
+        return None
+
+    def _enforce_limits(self):
+        while self.sessions and self.max_sessions and len(self.sessions) > self.max_sessions:
+            self._evict(self._oldest(), "capacity")
+        while len(self.sessions) > 1 and self.max_bytes and self.total_bytes > self.max_bytes:
+            self._evict(self._oldest(), "memory")
+
+    def _evict(self, session: SessionState, reason: str):
+        self._pop(session.session_id)
+        self._removed(session.session_id, reason)
+
+    def _is_expired(self, session: SessionState, now_ms: float) -> bool:
+        return now_ms - session.last_activity > self.timeout_ms
+
+    async def create(self, session: SessionState):
+        self._pop(session.session_id)
+        self._insert(session)
+        self._account(session)
+        self._enforce_limits()
+
+    async def get(self, session_id: str, touch: bool = True) -> Optional[SessionState]:
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if self._is_expired(session, time.time() * 1000):
+            self._evict(session, "expired")
+            return None
+        if touch:
+            session.touch()
+        return session
+
+    async def save(self, session: SessionState):
+        # Anything but the stored object is a session removed (or replaced) since it was read.
+        if self.sessions.get(session.session_id) is not session:
+            logger.debug(f"Session {session.session_id} was removed while in use; not saving it.")
+            return
+        self._account(session)
+        self._enforce_limits()
+
+    async def delete(self, session_id: str) -> Optional[SessionState]:
+        return self._pop(session_id)
+
+    async def cleanup(self, now_ms: Optional[float] = None) -> List[str]:
+        now_ms = now_ms if now_ms is not None else time.time() * 1000
+        expired = []
+        while self.sessions:
+            session = self._oldest()
+            if not self._is_expired(session, now_ms):
+                break
+            self._evict(session, "expired")
+            expired.append(session.session_id)
+        return expired
+
+    def next_expiry_ms(self) -> Optional[float]:
+        session = self._oldest()
+        if session is None:
+            return None
+        return session.last_activity + self.timeout_ms
+
+    async def count(self) -> int:
+        return len(self.sessions)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {**await super().stats(), "bytes": self.total_bytes, "maxBytes": self.max_bytes, "maxSessions": self.max_sessions}
+
+class RedisSessionStore(SessionStore):
+    """Shared store on any Redis-protocol server.
+
+    Each session is a hash under ``{prefix}{session_id}`` with a TTL equal to
+    the session timeout, plus a sorted-set index of last activity used for
+    counting and cleanup. ``client`` is a ``redis.asyncio`` compatible client,
+    so ``fakeredis.aioredis.FakeRedis`` can stand in for a real server locally.
+    ``lock`` adds a Redis lock under ``{prefix}lock:{session_id}``, so a frame
+    handled by one worker waits for another worker's frame of the same session
+    to be saved. The lock expires after SESSION_LOCK_TIMEOUT_S in case its
+    holder dies. The session-count cap is enforced on create by evicting
+    the least recently active sessions; the byte budget is left to the
+    server's own ``maxmemory`` policy.
+    """
+    shared = True
+
+    def __init__(self, client, prefix: str = Config.SESSION_STORE_PREFIX,
+                 timeout_ms: float = Config.REALTIME_SESSION_TIMEOUT_MS,
+                 max_sessions: int = Config.REALTIME_MAX_SESSIONS):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.index_key = f"{prefix}index"
+        self.timeout_ms = int(timeout_ms)
+        self.max_sessions = max_sessions
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def _channel(self, session_id: str) -> str:
+        return f"{self.prefix}updates:{session_id}"
+
+    @asynccontextmanager
+    async def _shared_lock(self, session_id: str, wait_seconds: float):
+        # SET NX PX to take the lock and WATCH/MULTI to drop it only while still ours; no Lua is
+        # needed, so any Redis-protocol server (fakeredis included) will do.
+        key = f"{self.prefix}lock:{session_id}"
+        token = uuid4().hex
+        deadline = time.monotonic() + wait_seconds
+        while not await self.client.set(key, token, nx=True, px=int(Config.SESSION_LOCK_TIMEOUT_S * 1000)):
+            if time.monotonic() >= deadline:
+                raise SessionLockTimeout(session_id)
+            await asyncio.sleep(0.005)
+        try:
+            yield
+        finally:
+            async with self.client.pipeline(transaction=True) as pipe:
+                await pipe.watch(key)
+                holder = await pipe.get(key)
+                if holder in (token, token.encode()):
+                    pipe.multi()
+                    pipe.delete(key)
+                    await pipe.execute()
+                else:
+                    await pipe.unwatch()
+                    # The lock expired while held, so another worker may have written in between.
+                    logger.warning(f"Lock on session {session_id} expired before it was released.")
+
+    async def _write_if_present(self, key: str, write: Callable[[Any], None]) -> bool:
+        # WATCH/MULTI so that a session deleted or expired in between is not recreated by the write.
+        from redis.exceptions import WatchError
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    if not await pipe.exists(key):
+                        await pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    write(pipe)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+    def _write_session(self, pipe, session: SessionState):
+        key = self._key(session.session_id)
+        pipe.delete(key)
+        pipe.hset(key, mapping=session.to_record())
+        pipe.pexpire(key, self.timeout_ms)
+        pipe.zadd(self.index_key, {session.session_id: session.last_activity})
+
+    async def create(self, session: SessionState):
+        async with self.client.pipeline(transaction=True) as pipe:
+            self._write_session(pipe, session)
+            await pipe.execute()
+        if not self.max_sessions:
+            return
+
+        excess = await self.client.zcard(self.index_key) - self.max_sessions
+        if excess > 0:
+            for session_id, _ in await self.client.zpopmin(self.index_key, excess):
+                session_id = session_id.decode() if isinstance(session_id, bytes) else session_id
+                await self.client.delete(self._key(session_id))
+                self._removed(session_id, "capacity")
+
+    async def get(self, session_id: str, touch: bool = True) -> Optional[SessionState]:
+        record = await self.client.hgetall(self._key(session_id))
+        if not record:
+            return None
+
+        session = SessionState.from_record(session_id, record)
+        if touch:
+            session.touch()
+
+            def write_touch(pipe):
+                pipe.hset(self._key(session_id), "last_activity", repr(session.last_activity))
+                pipe.pexpire(self._key(session_id), self.timeout_ms)
+                pipe.zadd(self.index_key, {session_id: session.last_activity})
+
+            if not await self._write_if_present(self._key(session_id), write_touch):
+                return None
+        return session
+
+    async def save(self, session: SessionState):
+        if not await self._write_if_present(self._key(session.session_id), lambda pipe: self._write_session(pipe, session)):
+            logger.debug(f"Session {session.session_id} was removed while in use; not saving it.")
+
+    async def delete(self, session_id: str) -> Optional[SessionState]:
+        session = await self.get(session_id, touch=False)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(session_id))
+            pipe.zrem(self.index_key, session_id)
+            await pipe.execute()
+        return session
+
+    async def cleanup(self, now_ms: Optional[float] = None) -> List[str]:
+        now_ms = now_ms if now_ms is not None else time.time() * 1000
+        cutoff = now_ms - self.timeout_ms
+        expired = await self.client.zrangebyscore(self.index_key, "-inf", cutoff)
+        if not expired:
+            return []
+
+        expired = [session_id.decode() if isinstance(session_id, bytes) else session_id for session_id in expired]
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(*[self._key(session_id) for session_id in expired])
+            pipe.zremrangebyscore(self.index_key, "-inf", cutoff)
+            await pipe.execute()
+        for session_id in expired:
+            self._removed(session_id, "expired")
+        return expired
+
+    async def count(self) -> int:
+        return await self.client.zcard(self.index_key)
+
+    async def publish(self, session_id: str, message: Dict[str, Any]):
+        await self.client.publish(self._channel(session_id), json.dumps(message))
+
+    async def subscribe(self, session_id: str) -> AsyncIterator[Dict[str, Any]]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self._channel(session_id))
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield json.loads(message["data"])
+        finally:
+            await pubsub.unsubscribe(self._channel(session_id))
+            await pubsub.aclose()
+
+    async def close(self):
+        await self.client.aclose()
+
+def create_session_store() -> SessionStore:
+    backend = Config.SESSION_STORE_BACKEND.lower()
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "redis":
+        if Config.SESSION_STORE_URL.startswith("fakeredis://"):
+            from fakeredis import aioredis as fake_aioredis
+            return RedisSessionStore(fake_aioredis.FakeRedis())
+        from redis import asyncio as redis_asyncio
+        return RedisSessionStore(redis_asyncio.from_url(Config.SESSION_STORE_URL))
+    raise ValueError(f"Unknown SESSION_STORE_BACKEND: {Config.SESSION_STORE_BACKEND}")
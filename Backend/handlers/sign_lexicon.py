@@ -0,0 +1,133 @@
+import re
+import codecs
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+from config import Config
+
+_PHRASE_END = None
+_SENTENCE_END = re.compile(r"[.!?\n]+")
+_TOKEN = re.compile(r"\w+")
+
+def split_sentences(text: str) -> Iterator[str]:
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        yield tail
+
+async def stream_sentences(chunks: AsyncIterator[bytes],
+                           max_chars: int = Config.TEXT_TO_SIGN_MAX_SENTENCE_CHARS) -> AsyncIterator[str]:
+    """Splits a streamed UTF-8 body into sentences without holding the whole text.
+
+    A run longer than ``max_chars`` without sentence punctuation is cut at
+    its last space so the buffer stays bounded.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        last_end = None
+        for last_end in _SENTENCE_END.finditer(buffer):
+            pass
+        if last_end is not None:
+            for sentence in split_sentences(buffer[:last_end.end()]):
+                yield sentence
+            buffer = buffer[last_end.end():]
+        while len(buffer) > max_chars:
+            cut = buffer.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if buffer[:cut].strip():
+                yield buffer[:cut].strip()
+            buffer = buffer[cut:]
+
+    buffer += decoder.decode(b"", final=True)
+    for sentence in split_sentences(buffer):
+        yield sentence
+
+class SignLexicon:
+    """Lowercase lookup indexes over the word and letter class mappings.
+
+    Word glosses, including multi-word ones such as "Selamat Pagi", are
+    stored in a token trie whose root doubles as the single-word hash
+    index. ``translate`` makes one greedy longest-match pass over the
+    tokens, so each token costs a dictionary lookup regardless of how many
+    classes the models have. Fingerspelled tokens are memoized in a bounded
+    LRU, which is dropped along with the lexicon when the mappings change.
+    The LRU holds immutable letter tuples; every call returns fresh dicts, so
+    callers may modify a result without touching the cache.
+    """
+
+    def __init__(self, word_mapping: Dict[int, str], letter_mapping: Dict[int, str],
+                 token_cache_size: int = Config.TEXT_TO_SIGN_TOKEN_CACHE_SIZE):
+        self.phrase_trie: Dict[Any, Any] = {}
+        self.max_phrase_tokens = 0
+        for word in word_mapping.values():
+            tokens = word.lower().split()
+            if not tokens:
+                continue
+            node = self.phrase_trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_PHRASE_END] = word
+            self.max_phrase_tokens = max(self.max_phrase_tokens, len(tokens))
+
+        self.letter_index = {letter.lower(): letter for letter in letter_mapping.values()}
+        self.token_cache_size = max(0, token_cache_size)
+        self._fingerspell_cache: "OrderedDict[str, Tuple[Tuple[str, str, bool], ...]]" = OrderedDict()
+
+    def _longest_match(self, tokens: List[str], start: int):
+        node = self.phrase_trie
+        match, match_end = None, start
+        for position in range(start, min(len(tokens), start + self.max_phrase_tokens)):
+            node = node.get(tokens[position])
+            if node is None:
+                break
+            if _PHRASE_END in node:
+                match, match_end = node[_PHRASE_END], position + 1
+        return match, match_end
+
+    def fingerspell(self, word: str) -> Dict[str, Any]:
+        letters = self._fingerspell_cache.get(word)
+        if letters is not None:
+            self._fingerspell_cache.move_to_end(word)
+        else:
+            spelled = []
+            for letter in word:
+                mapped_letter = self.letter_index.get(letter.lower())
+                spelled.append((letter, mapped_letter if mapped_letter is not None else letter.upper(), mapped_letter is not None))
+            letters = tuple(spelled)
+            if self.token_cache_size:
+                self._fingerspell_cache[word] = letters
+                if len(self._fingerspell_cache) > self.token_cache_size:
+                    self._fingerspell_cache.popitem(last=False)
+
+        return {
+            "type": "fingerspell",
+            "original": word,
+            "letters": [{"letter": letter, "mapped": mapped, "exists": exists} for letter, mapped, exists in letters]
+        }
+
+    def translate(self, text: str) -> List[Dict[str, Any]]:
+        tokens = _TOKEN.findall(text.lower())
+        signs = []
+        position = 0
+        while position < len(tokens):
+            mapped_word, end = self._longest_match(tokens, position)
+            if mapped_word is None:
+                signs.append(self.fingerspell(tokens[position]))
+                position += 1
+                continue
+
+            signs.append({
+                "type": "word",
+                "original": " ".join(tokens[position:end]),
+                "mapped": mapped_word,
+                "knownInDataset": True
+            })
+            position = end
+        return signs
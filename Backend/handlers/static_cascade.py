@@ -0,0 +1,109 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from handlers.inference_engines import softmax
+from handlers.preprocessing import normalize_landmarks
+
+class CentroidCascade:
+    """Nearest-centroid first stage in front of the static model.
+
+    Frames are normalized to wrist-relative, scale-free coordinates and
+    compared with one centroid per class. That is a single (N, 63) x
+    (63, classes) product. Distances become probabilities through
+    ``softmax(-d^2 / temperature)``. A frame is answered here when the
+    margin between the top two of these scores reaches ``min_margin``.
+    Otherwise it is escalated to the full model.
+
+    The scores stand in for the model's output layer. The returned
+    probabilities therefore get the same extra ``softmax`` the inference
+    engines apply to the model output. This puts a cascade answer's
+    ``confidence`` on the full model's scale, so confidence thresholds and
+    voting downstream treat both stages alike. The margin is returned
+    separately and is the only thing the answer/escalate gate looks at.
+    Centroids and temperature come from ``tools/build_cascade.py``.
+
+    The counters track how many frames were answered or escalated. Audits
+    are answered frames that were also run through the full model; they
+    track how often the two stages agree.
+    """
+
+    def __init__(self, centroids: np.ndarray, classes: np.ndarray, temperature: float,
+                 min_margin: float = Config.STATIC_CASCADE_MIN_MARGIN, metadata: Optional[Dict[str, Any]] = None,
+                 num_classes: Optional[int] = None):
+        if len(centroids) < 2:
+            raise ValueError("A cascade needs at least two class centroids.")
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.classes = np.asarray(classes, dtype=np.int32)
+        self.temperature = float(temperature)
+        self.min_margin = float(min_margin)
+        self.metadata = metadata or {}
+        # The model's output width, which also sets the scale of its extra softmax.
+        self.num_classes = max(int(num_classes or 0), int(self.classes.max()) + 1)
+        self._centroids_t = self.centroids.T.copy()
+        self._centroid_norms = (self.centroids ** 2).sum(axis=1)
+        self.answered = 0
+        self.escalated = 0
+        self.audited = 0
+        self.agreed = 0
+
+    @classmethod
+    def fit(cls, landmarks: np.ndarray, labels: np.ndarray, **kwargs) -> "CentroidCascade":
+        points = normalize_landmarks(np.array(landmarks, dtype=np.float32))
+        classes = np.unique(labels)
+        centroids = np.stack([points[labels == label].mean(axis=0) for label in classes])
+        cascade = cls(centroids, classes, 1.0, **kwargs)
+        nearest = cascade.squared_distances(landmarks).min(axis=1)
+        cascade.temperature = float(max(np.median(nearest), 1e-6))
+        return cascade
+
+    @classmethod
+    def load(cls, path: str, min_margin: float = Config.STATIC_CASCADE_MIN_MARGIN) -> "CentroidCascade":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["classes"], float(data["temperature"]), min_margin,
+                       json.loads(str(data["metadata"])) if "metadata" in data else None,
+                       int(data["num_classes"]) if "num_classes" in data else None)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, classes=self.classes, temperature=self.temperature,
+                     metadata=json.dumps(self.metadata), num_classes=self.num_classes)
+
+    def squared_distances(self, landmarks: np.ndarray) -> np.ndarray:
+        points = normalize_landmarks(np.array(landmarks, dtype=np.float32).reshape(-1, self.centroids.shape[1]))
+        distances = (points ** 2).sum(axis=1, keepdims=True) - 2 * points @ self._centroids_t + self._centroid_norms
+        return np.maximum(distances, 0.0)
+
+    def predict(self, landmarks: np.ndarray, min_margin: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (N, num_classes) probabilities on the model's scale and indexed like it, the model
+        class indices, the answered mask and the top-2 score margins."""
+        scores = softmax(-self.squared_distances(landmarks) / self.temperature)
+        top_two = np.partition(scores, -2, axis=1)[:, -2:]
+        margins = top_two[:, 1] - top_two[:, 0]
+        answered = margins >= (self.min_margin if min_margin is None else min_margin)
+
+        outputs = np.zeros((len(scores), self.num_classes), dtype=np.float32)
+        outputs[:, self.classes] = scores
+        return softmax(outputs), self.classes[scores.argmax(axis=1)], answered, margins
+
+    def record(self, answered: int, escalated: int):
+        self.answered += answered
+        self.escalated += escalated
+
+    def record_audit(self, agreed: bool):
+        self.audited += 1
+        self.agreed += int(agreed)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.answered + self.escalated
+        return {
+            "minMargin": self.min_margin,
+            "answered": self.answered,
+            "escalated": self.escalated,
+            "escalationRate": self.escalated / total if total else 0.0,
+            "audited": self.audited,
+            "agreement": self.agreed / self.audited if self.audited else None,
+            "build": self.metadata
+        }
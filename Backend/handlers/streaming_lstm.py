@@ -0,0 +1,237 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fastapi import HTTPException
+
+from config import Config
+from logger import get_logger
+from handlers.inference_engines import activation, softmax
+from handlers.model_handler import InferenceBatcher, ModelHandler
+from handlers.model_registry import LoadedModel
+
+logger = get_logger(__name__)
+
+class LSTMStepper:
+    """NumPy forward pass of a stacked LSTM + Dense Keras model, one timestep at a time.
+
+    The recurrent state of every LSTM layer (``h`` and ``c``) is packed into a
+    single flat vector per stream. ``step`` advances any number of independent
+    streams by one frame in one batched call. Because dropout is inactive at
+    inference, running a stream over a full sequence gives the same outputs
+    as the Keras model. As in the inference engines, ``softmax`` is applied
+    to the model output.
+    """
+
+    def __init__(self, lstm_layers: List[Dict[str, Any]], dense_layers: List[Dict[str, Any]], num_features: int):
+        if not lstm_layers:
+            raise ValueError("Streaming inference needs at least one LSTM layer.")
+        self.lstm_layers = lstm_layers
+        self.dense_layers = dense_layers
+        self.num_features = num_features
+        self.state_size = sum(2 * layer["units"] for layer in lstm_layers)
+
+    @classmethod
+    def from_keras_model(cls, model) -> "LSTMStepper":
+        """Reads the weights of a linear stack of InputLayer, LSTM, Dropout and Dense layers."""
+        lstm_layers, dense_layers = [], []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            if kind in ("InputLayer", "Dropout"):
+                continue
+            if kind == "LSTM":
+                if dense_layers:
+                    raise ValueError(f"LSTM layer {layer.name} follows a Dense layer; only Dense heads are supported.")
+                if config.get("go_backwards") or not config.get("use_bias", True):
+                    raise ValueError(f"LSTM layer {layer.name} must run forwards and use a bias.")
+                kernel, recurrent_kernel, bias = layer.get_weights()
+                lstm_layers.append({
+                    "units": recurrent_kernel.shape[0],
+                    "kernel": kernel.astype(np.float32),
+                    "recurrent_kernel": recurrent_kernel.astype(np.float32),
+                    "bias": bias.astype(np.float32),
+                    "activation": activation(config.get("activation", "tanh"), layer.name),
+                    "recurrent_activation": activation(config.get("recurrent_activation", "sigmoid"), layer.name),
+                    "return_sequences": bool(config.get("return_sequences"))
+                })
+            elif kind == "Dense":
+                weights = layer.get_weights()
+                dense_layers.append({
+                    "kernel": weights[0].astype(np.float32),
+                    "bias": weights[1].astype(np.float32) if len(weights) > 1 else None,
+                    "activation": activation(config.get("activation", "linear"), layer.name)
+                })
+            else:
+                raise ValueError(f"Layer {layer.name} ({kind}) is not supported for streaming inference.")
+
+        if not lstm_layers:
+            raise ValueError("Model has no LSTM layers.")
+        if any(not layer["return_sequences"] for layer in lstm_layers[:-1]) or lstm_layers[-1]["return_sequences"]:
+            raise ValueError("Only stacks whose last LSTM layer alone drops the time axis are supported.")
+        return cls(lstm_layers, dense_layers, lstm_layers[0]["kernel"].shape[0])
+
+    def initial_state(self, count: Optional[int] = None) -> np.ndarray:
+        shape = (self.state_size,) if count is None else (count, self.state_size)
+        return np.zeros(shape, dtype=np.float32)
+
+    def step(self, frames: np.ndarray, states: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Advances (N, features) frames one timestep from (N, state_size) states.
+
+        Returns the (N, classes) probabilities after this frame and the new states.
+        """
+        inputs = frames
+        new_states = np.empty_like(states)
+        offset = 0
+        for layer in self.lstm_layers:
+            units = layer["units"]
+            h = states[:, offset:offset + units]
+            c = states[:, offset + units:offset + 2 * units]
+            z = inputs @ layer["kernel"] + h @ layer["recurrent_kernel"] + layer["bias"]
+            gate = layer["recurrent_activation"]
+            i, f, o = gate(z[:, :units]), gate(z[:, units:2 * units]), gate(z[:, 3 * units:])
+            c = f * c + i * layer["activation"](z[:, 2 * units:3 * units])
+            h = o * layer["activation"](c)
+            new_states[:, offset:offset + units] = h
+            new_states[:, offset + units:offset + 2 * units] = c
+            inputs = h
+            offset += 2 * units
+
+        for layer in self.dense_layers:
+            inputs = inputs @ layer["kernel"]
+            if layer["bias"] is not None:
+                inputs = inputs + layer["bias"]
+            inputs = layer["activation"](inputs)
+        return softmax(inputs.astype(np.float32)), new_states
+
+    def run_packed(self, packed: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``run_batch`` for :class:`InferenceBatcher`: each row is a frame followed by its stream's state."""
+        probabilities, states = self.step(packed[:, :self.num_features], packed[:, self.num_features:])
+        return probabilities, probabilities.argmax(axis=-1).astype(np.int32), states
+
+    def run_sequences(self, sequences: np.ndarray) -> np.ndarray:
+        """Streams whole (N, frames, features) sequences; returns (N, frames, classes) rolling probabilities."""
+        states = self.initial_state(len(sequences))
+        rolling = []
+        for t in range(sequences.shape[1]):
+            probabilities, states = self.step(sequences[:, t], states)
+            rolling.append(probabilities)
+        return np.stack(rolling, axis=1)
+
+def load_stepper(model: LoadedModel) -> LSTMStepper:
+    keras_model = getattr(model.engine, "model", None)
+    if keras_model is None:
+        # The TFLite engine has no Keras model to read weights from.
+        import tensorflow as tf
+        keras_model = tf.keras.models.load_model(model.path, compile=False)
+    return LSTMStepper.from_keras_model(keras_model)
+
+class _StreamState:
+    __slots__ = ("model", "vector", "frames", "lock")
+
+    def __init__(self, model: LoadedModel, vector: np.ndarray):
+        self.model = model
+        self.vector = vector
+        self.frames = 0
+        self.lock = asyncio.Lock()
+
+class StreamingRecognizer:
+    """Carries LSTM state per realtime session and classifies every frame in O(1).
+
+    Steps from all sessions share one :class:`InferenceBatcher`, so concurrent
+    sessions advance in a single batched call. State restarts whenever the
+    model version changes. Steps of one session are serialized, so each frame advances the state left
+    by the previous one. While the model file of the active version is missing,
+    ``available`` is False and callers keep the buffered-sequence path.
+    """
+
+    def __init__(self, model_handler: ModelHandler, model_name: str = Config.REALTIME_STREAMING_MODEL):
+        self.model_handler = model_handler
+        self.model_name = model_name
+        self.sessions: Dict[str, _StreamState] = {}
+        self.steps = 0
+        self._model: Optional[LoadedModel] = None
+        self._stepper: Optional[LSTMStepper] = None
+        self._batcher: Optional[InferenceBatcher] = None
+        self._build_lock = asyncio.Lock()
+        self._availability: Optional[Tuple[Optional[str], bool]] = None
+
+    async def _current(self) -> Tuple[LoadedModel, LSTMStepper, InferenceBatcher]:
+        model = await self.model_handler.registry.get(self.model_name, task="dynamic")
+        if model is not self._model:
+            async with self._build_lock:
+                if model is not self._model:
+                    stepper = await asyncio.get_running_loop().run_in_executor(
+                        self.model_handler.executor, load_stepper, model
+                    )
+                    previous = self._batcher
+                    self._batcher = InferenceBatcher(
+                        f"{model.name} v{model.version} streaming", stepper.run_packed,
+                        self.model_handler.executor, self.model_handler.inference_slots
+                    )
+                    self._model, self._stepper = model, stepper
+                    if previous is not None:
+                        asyncio.get_running_loop().create_task(previous.drain())
+                    logger.info(f"Streaming recognition uses {model.name} v{model.version}.")
+        return self._model, self._stepper, self._batcher
+
+    def available(self) -> bool:
+        """Whether the active version of the streaming model can be loaded; checked once per version."""
+        registry = self.model_handler.registry
+        try:
+            version = registry.entry(self.model_name, task="dynamic")["active"]
+        except HTTPException:
+            version = None
+        if self._availability is None or self._availability[0] != version:
+            available = version is not None and registry.version_available(self.model_name, version)
+            if not available:
+                reason = "is not a dynamic model in the manifest" if version is None else f"v{version} has no model file"
+                logger.warning(f"Streaming model '{self.model_name}' {reason}; "
+                               "dynamic signs fall back to re-running the buffered sequence.")
+            self._availability = (version, available)
+        return self._availability[1]
+
+    async def step(self, session_id: str, frame: np.ndarray) -> Dict[str, Any]:
+        while True:
+            model, stepper, batcher = await self._current()
+            state = self.sessions.get(session_id)
+            if state is None or state.model is not model:
+                state = self.sessions[session_id] = _StreamState(model, stepper.initial_state())
+
+            async with state.lock:
+                # A reset or a model switch while waiting replaced this stream; start from the new one.
+                if self.sessions.get(session_id) is not state:
+                    continue
+                inputs = self.model_handler.preprocessor.frame(frame, model.normalize)
+                probabilities, predicted_index, new_state = await batcher.submit(np.concatenate([inputs, state.vector]))
+                state.vector = new_state.copy()
+                state.frames += 1
+                frames = state.frames
+            break
+        self.steps += 1
+
+        result = self.model_handler._format_dynamic_result(model, probabilities, predicted_index)
+        result["frames"] = frames
+        result["topK"] = [
+            {"class": model.class_mapping.get(int(index), "Unknown"), "confidence": float(probabilities[index])}
+            for index in np.argsort(probabilities)[::-1][:Config.REALTIME_STREAMING_TOP_K]
+        ]
+        return result
+
+    def reset(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "available": self._availability[1] if self._availability is not None else None,
+            "loadedVersion": self._model.version if self._model is not None else None,
+            "sessions": len(self.sessions),
+            "steps": self.steps
+        }
+
+    async def close(self):
+        if self._batcher is not None:
+            await self._batcher.close()
+        self.sessions.clear()
@@ -1,66 +1,268 @@
 import os
+import json
+import time
+import hashlib
 import aiofiles
 from uuid import uuid4
-from typing import Dict, Any, Optional, Union
-from fastapi import UploadFile, HTTPException, status
+from typing import Dict, Any, Optional, Set, Union
+from fastapi import HTTPException, Request, status
 from config import Config
-import traceback 
+from logger import get_logger
+from schemas.multipart_stream import PART_BEGIN, PART_DATA, PART_END, FormPart, stream_form
 
-def log_info(message: str, meta: Optional[Dict] = None):
-    print(f"[INFO] {message}", meta if meta else "")
+logger = get_logger(__name__)
 
-def log_error(message: str, error: Union[Exception, Dict] = None):
-    meta = {"message": str(error), "stack": traceback.format_exc()} if isinstance(error, Exception) else error
-    print(f"[ERROR] {message}", meta if meta else "")
+UPLOAD_TEMP_PREFIX = "upload-"
+
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware enforcing a body size limit on upload routes while the body is received.
+
+    ``limits`` maps a request path to the largest file payload it accepts;
+    UPLOAD_MULTIPART_OVERHEAD_BYTES is allowed on top for the multipart
+    framing. A declared Content-Length over the limit is rejected before any
+    body is read. Otherwise the bytes are counted as they arrive and the
+    request is cut off with a 413 at the first chunk over the limit, before
+    the rest of it is parsed or written anywhere.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({"detail": f"Request body too large. Max size is {limit // (1024 * 1024)}MB."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        file_limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if file_limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = file_limit + Config.UPLOAD_MULTIPART_OVERHEAD_BYTES
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            await self._reject(send, file_limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def counted_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Once the limit is hit, whatever error the app makes of the aborted body is replaced by the 413.
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, counted_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded and not response_started:
+            logger.warning(f"Rejected an upload to {scope['path']} after {received} bytes.")
+            await self._reject(send, file_limit)
+
+FILE_FIELD = "file"
+FILE_TYPE_FIELD = "fileType"
+
+def _is_allowed_type(mime_type: Optional[str], file_type: str) -> bool:
+    if file_type == 'image':
+        return mime_type in Config.ALLOWED_IMAGE_TYPES
+    if file_type == 'video':
+        return mime_type in Config.ALLOWED_VIDEO_TYPES
+    # unknown, check both
+    return mime_type in Config.ALLOWED_IMAGE_TYPES or mime_type in Config.ALLOWED_VIDEO_TYPES
 
 class UploadHandler:
-    async def handle_file_upload(self, file: UploadFile, file_type: str = 'unknown') -> Dict[str, Any]:
+    """Stores uploads by content hash and keeps the upload and temp directories within bounds.
+
+    Request bodies are capped while they arrive by
+    :class:`UploadSizeLimitMiddleware`. The multipart body is parsed as it is
+    received and the file part is written straight to a temp file, hashed
+    and counted chunk by chunk, so each upload is written once and never
+    read back. The per-file limit holds however the client labels the
+    request. The file is then moved to ``<sha256><ext>``; an identical
+    re-upload only refreshes the existing file's mtime.
+    """
+
+    def __init__(self):
+        self.uploads_in_progress: Set[str] = set()
+
+    async def handle_file_upload(self, request: Request) -> Dict[str, Any]:
+        temp_path = None
+        out_file = None
         try:
-            file_extension = os.path.splitext(file.filename)[1].lower()
-            mime_type = file.content_type
-
-            is_valid_type = False
-            if file_type == 'image':
-                is_valid_type = mime_type in Config.ALLOWED_IMAGE_TYPES
-            elif file_type == 'video':
-                is_valid_type = mime_type in Config.ALLOWED_VIDEO_TYPES
-            else: # unknown, check both
-                is_valid_type = (mime_type in Config.ALLOWED_IMAGE_TYPES or
-                                 mime_type in Config.ALLOWED_VIDEO_TYPES)
-            
-            if not is_valid_type:
+            file_part: Optional[FormPart] = None
+            file_type = bytearray()
+            field = None
+            digest = hashlib.sha256()
+            file_size = 0
+
+            async for event, value in stream_form(request):
+                if event == PART_BEGIN:
+                    field = value.name
+                    if field != FILE_FIELD:
+                        continue
+                    if file_part is not None:
+                        raise HTTPException(status_code=400, detail="Only one file can be uploaded per request.")
+                    # Every fileType accepts a subset of these, so anything else is refused before it is written.
+                    if not _is_allowed_type(value.content_type, 'unknown'):
+                        allowed_types_str = ", ".join(Config.ALLOWED_IMAGE_TYPES + Config.ALLOWED_VIDEO_TYPES)
+                        raise HTTPException(status_code=400, detail=f"Invalid file type: {value.content_type}. Allowed types: {allowed_types_str}")
+                    file_part = value
+                    temp_path = os.path.join(Config.TEMP_DIR, f"{UPLOAD_TEMP_PREFIX}{uuid4()}")
+                    self.uploads_in_progress.add(temp_path)
+                    out_file = await aiofiles.open(temp_path, "wb")
+                elif event == PART_DATA:
+                    if field == FILE_FIELD:
+                        file_size += len(value)
+                        if file_size > Config.MAX_FILE_SIZE_BYTES:
+                            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"File too large. Max size is {Config.MAX_FILE_SIZE_MB}MB.")
+                        digest.update(value)
+                        await out_file.write(value)
+                    elif field == FILE_TYPE_FIELD and len(file_type) < 64:
+                        file_type += value
+                elif event == PART_END:
+                    if field == FILE_FIELD:
+                        await out_file.close()
+                        out_file = None
+                    field = None
+
+            if file_part is None or out_file is not None:
+                raise HTTPException(status_code=400, detail="No file provided.")
+
+            file_type = file_type.decode("utf-8", errors="replace") or 'unknown'
+            mime_type = file_part.content_type
+            if not _is_allowed_type(mime_type, file_type):
                 allowed_types_str = ", ".join(Config.ALLOWED_IMAGE_TYPES + Config.ALLOWED_VIDEO_TYPES)
                 raise HTTPException(status_code=400, detail=f"Invalid file type: {mime_type}. Allowed types: {allowed_types_str}")
-            
-            if file.size > Config.MAX_FILE_SIZE_BYTES:
-                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"File too large. Max size is {Config.MAX_FILE_SIZE_MB}MB.")
 
-            filename = f"{uuid4()}{file_extension}"
+            file_extension = os.path.splitext(file_part.filename or "")[1].lower()
+            content_hash = digest.hexdigest()
+            filename = f"{content_hash}{file_extension}"
             filepath = os.path.join(Config.UPLOADS_DIR, filename)
 
-            async with aiofiles.open(filepath, "wb") as out_file:
-                while content := await file.read(1024 * 1024):
-                    await out_file.write(content)
-
-            file_size = os.path.getsize(filepath)
+            deduplicated = os.path.exists(filepath)
+            if deduplicated:
+                os.remove(temp_path)
+                os.utime(filepath)
+            else:
+                os.replace(temp_path, filepath)
+            self.uploads_in_progress.discard(temp_path)
+            temp_path = None
 
-            log_info(f"File uploaded: {filename}", {
-                "originalName": file.filename,
+            logger.info(f"File uploaded: {filename}", meta={
+                "originalName": file_part.filename,
                 "mimeType": mime_type,
                 "type": file_type,
-                "size": file_size
+                "size": file_size,
+                "deduplicated": deduplicated
             })
 
             return {
                 "success": True,
                 "filename": filename,
                 "filepath": filepath,
-                "originalName": file.filename,
+                "originalName": file_part.filename,
                 "mimeType": mime_type,
-                "type": file_type
+                "type": file_type,
+                "size": file_size,
+                "sha256": content_hash,
+                "deduplicated": deduplicated
             }
         except HTTPException:
             raise
         except Exception as e:
-            log_error("Error uploading file:", e)
-            raise HTTPException(status_code=500, detail=f"Error processing file upload: {e}")
\ No newline at end of file
+            logger.error("Error uploading file:", e)
+            raise HTTPException(status_code=500, detail=f"Error processing file upload: {e}")
+        finally:
+            if out_file is not None:
+                await out_file.close()
+            if temp_path is not None:
+                self.uploads_in_progress.discard(temp_path)
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    @staticmethod
+    def _sweep_dir(directory: str, max_age_seconds: float, quota_bytes: int, protected: Set[str], now: float) -> Dict[str, int]:
+        removed, removed_bytes = 0, 0
+        entries = []
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                if not entry.is_file(follow_symlinks=False) or entry.path in protected:
+                    continue
+                stat = entry.stat()
+                # Uploads being written by another worker are only known by their recent mtime.
+                if entry.name.startswith(UPLOAD_TEMP_PREFIX) and now - stat.st_mtime < Config.UPLOAD_TEMP_GRACE_SECONDS:
+                    continue
+                if max_age_seconds > 0 and now - stat.st_mtime > max_age_seconds:
+                    try:
+                        os.remove(entry.path)
+                        removed += 1
+                        removed_bytes += stat.st_size
+                    except FileNotFoundError:
+                        pass
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        if quota_bytes > 0 and total_bytes > quota_bytes:
+            for _, size, path in sorted(entries):
+                if total_bytes <= quota_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    removed += 1
+                    removed_bytes += size
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+        return {"removed": removed, "removedBytes": removed_bytes, "remainingBytes": total_bytes}
+
+    def sweep_storage(self, protected: Optional[Set[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Deletes files past their retention age, then the oldest files until each directory is within quota.
+
+        Paths in ``protected`` (e.g. videos waiting for a job) are never deleted
+        and do not count toward the quota, nor are upload temp files modified in
+        the last UPLOAD_TEMP_GRACE_SECONDS, which may belong to an upload in
+        another worker. This does blocking file I/O.
+        """
+        protected = (protected or set()) | self.uploads_in_progress
+        now = time.time()
+        results = {
+            "uploads": self._sweep_dir(
+                Config.UPLOADS_DIR, Config.UPLOAD_RETENTION_HOURS * 3600,
+                int(Config.UPLOADS_QUOTA_MB * 1024 * 1024), protected, now
+            ),
+            "temp": self._sweep_dir(
+                Config.TEMP_DIR, Config.TEMP_RETENTION_HOURS * 3600,
+                int(Config.TEMP_QUOTA_MB * 1024 * 1024), protected, now
+            )
+        }
+        if any(result["removed"] for result in results.values()):
+            logger.info("Storage sweep removed files", meta=results)
+        return results
@@ -0,0 +1,441 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from uuid import uuid4
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+import cv2
+import numpy as np
+from fastapi import HTTPException
+
+from config import Config
+from logger import get_logger
+from handlers.landmark_extractor import HandsPool, extract_hand_landmarks
+from handlers.session_state import LandmarkRingBuffer
+
+logger = get_logger(__name__)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+class VideoJob:
+    def __init__(self, job_id: str, filename: str, path: str, model_choice: Optional[str]):
+        self.job_id = job_id
+        self.filename = filename
+        self.path = path
+        self.model_choice = model_choice
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.fps: Optional[float] = None
+        self.frames_total = 0
+        self.frames_read = 0
+        self.frames_with_hand = 0
+        self.windows_classified = 0
+        self.transcript: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def add_window_result(self, start: float, end: float, result: Dict[str, Any]):
+        """Merges overlapping windows with the same word into one transcript segment."""
+        self.windows_classified += 1
+        if result["confidence"] < Config.MODEL_CONFIDENCE_THRESHOLD:
+            return
+
+        last = self.transcript[-1] if self.transcript else None
+        if last is not None and last["word"] == result["class"] and start <= last["end"]:
+            last["end"] = round(end, 3)
+            last["confidence"] = max(last["confidence"], result["confidence"])
+            last["windows"] += 1
+            return
+
+        self.transcript.append({
+            "word": result["class"],
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "confidence": result["confidence"],
+            "windows": 1
+        })
+
+    def to_dict(self, include_transcript: bool = False) -> Dict[str, Any]:
+        job = {
+            "jobId": self.job_id,
+            "filename": self.filename,
+            "modelChoice": self.model_choice,
+            "status": self.status,
+            "error": self.error,
+            "progress": {
+                "framesRead": self.frames_read,
+                "framesTotal": self.frames_total,
+                "percent": round(100.0 * self.frames_read / self.frames_total, 1) if self.frames_total else None,
+                "framesWithHand": self.frames_with_hand,
+                "windowsClassified": self.windows_classified
+            },
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+        if include_transcript:
+            job["transcript"] = self.transcript
+            job["text"] = " ".join(segment["word"] for segment in self.transcript)
+        return job
+
+class VideoFrameReader:
+    """Decodes a video one chunk at a time, keeping only the landmarks of sampled frames.
+
+    Frames are sampled down to VIDEO_JOB_SAMPLE_FPS; skipped frames are only
+    grabbed, not decoded. Nothing but the current frame is ever held, so
+    memory does not grow with the video's length.
+    """
+
+    def __init__(self, path: str):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise ValueError("Could not open video file.")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frames_total = max(0, int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.step = max(1, round(self.fps / Config.VIDEO_JOB_SAMPLE_FPS)) if Config.VIDEO_JOB_SAMPLE_FPS > 0 else 1
+        self.frame_index = 0
+        self.finished = False
+
+    def read_chunk(self, hands, max_samples: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (landmarks, timestamps, hand_detected) for up to ``max_samples`` sampled frames."""
+        landmarks = np.zeros((max_samples, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+        timestamps = np.zeros(max_samples, dtype=np.float64)
+        detected = np.zeros(max_samples, dtype=bool)
+        count = 0
+
+        while count < max_samples:
+            if self.frame_index % self.step:
+                if not self.capture.grab():
+                    self.finished = True
+                    break
+                self.frame_index += 1
+                continue
+
+            ok, frame = self.capture.read()
+            if not ok:
+                self.finished = True
+                break
+            hand = extract_hand_landmarks(hands, frame)
+            if hand is not None:
+                landmarks[count] = hand
+                detected[count] = True
+            timestamps[count] = self.frame_index / self.fps
+            self.frame_index += 1
+            count += 1
+
+        return landmarks[:count], timestamps[:count], detected[:count]
+
+    def close(self):
+        self.capture.release()
+
+class RedisVideoJobIndex:
+    """Job snapshots shared by all workers through the redis session store's client.
+
+    Each job is a JSON snapshot under ``{prefix}{job_id}``, rewritten by the
+    worker running the job whenever its status or progress changes, plus a
+    sorted-set index by creation time trimmed to VIDEO_JOB_MAX_RETAINED.
+    Cancellations are published on ``{prefix}cancel`` for the owning worker
+    to apply.
+    """
+
+    def __init__(self, client, prefix: str = Config.VIDEO_JOB_STORE_PREFIX,
+                 retention_s: int = Config.VIDEO_JOB_RETENTION_S,
+                 max_retained: int = Config.VIDEO_JOB_MAX_RETAINED):
+        self.client = client
+        self.prefix = prefix
+        self.index_key = f"{prefix}index"
+        self.cancel_channel = f"{prefix}cancel"
+        self.retention_s = retention_s
+        self.max_retained = max(1, max_retained)
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}"
+
+    async def save(self, job: VideoJob):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(job.job_id), json.dumps(job.to_dict(include_transcript=True)), ex=self.retention_s)
+            pipe.zadd(self.index_key, {job.job_id: job.created_at})
+            pipe.zremrangebyrank(self.index_key, 0, -self.max_retained - 1)
+            await pipe.execute()
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        record = await self.client.get(self._key(job_id))
+        return json.loads(record) if record else None
+
+    async def load_all(self) -> List[Dict[str, Any]]:
+        job_ids = await self.client.zrange(self.index_key, 0, -1)
+        if not job_ids:
+            return []
+        records = await self.client.mget([self._key(job_id.decode() if isinstance(job_id, bytes) else job_id) for job_id in job_ids])
+        return [json.loads(record) for record in records if record]
+
+    async def request_cancel(self, job_id: str):
+        await self.client.publish(self.cancel_channel, job_id)
+
+    async def cancel_requests(self) -> AsyncIterator[str]:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.cancel_channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    data = message["data"]
+                    yield data.decode() if isinstance(data, bytes) else data
+        finally:
+            await pubsub.unsubscribe(self.cancel_channel)
+            await pubsub.aclose()
+
+def _strip_transcript(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in job.items() if key not in ("transcript", "text")}
+
+class VideoJobManager:
+    """Runs recognition jobs over uploaded videos on a bounded queue and worker pool.
+
+    Each job streams its video through ``VideoFrameReader`` on the job
+    executor, slides a NUM_FRAMES_VIDEO window over the sampled landmarks
+    with a stride of VIDEO_JOB_WINDOW_STRIDE, and classifies windows in
+    batches with the dynamic model. A job runs on the worker that accepted
+    it. Without an ``index`` jobs are only visible to that worker, and
+    finished jobs are kept until VIDEO_JOB_MAX_RETAINED newer ones push them
+    out. With a :class:`RedisVideoJobIndex`, every worker reads jobs from the
+    index and forwards cancellations to the owner.
+    """
+
+    def __init__(self, model_handler, workers: int = Config.VIDEO_JOB_WORKERS,
+                 max_queued: int = Config.VIDEO_JOB_MAX_QUEUED,
+                 max_retained: int = Config.VIDEO_JOB_MAX_RETAINED):
+        self.model_handler = model_handler
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.max_retained = max(1, max_retained)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="video-job")
+        self.hands_pool = HandsPool(self.workers, static_image_mode=False)
+        self.jobs: "OrderedDict[str, VideoJob]" = OrderedDict()
+        self.index: Optional[RedisVideoJobIndex] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def start(self, index: Optional[RedisVideoJobIndex] = None):
+        self.index = index
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if index is not None:
+            self._worker_tasks.append(asyncio.create_task(self._listen_for_cancels()))
+        logger.info(f"Video job workers started: {self.workers}", meta={"shared": index is not None})
+
+    async def close(self):
+        for job in self.jobs.values():
+            job.cancel_event.set()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.hands_pool.close()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_retained)]:
+            del self.jobs[job_id]
+
+    async def _publish(self, job: VideoJob):
+        if self.index is None:
+            return
+        try:
+            await self.index.save(job)
+        except Exception as e:
+            logger.error(f"Could not publish video job {job.job_id}:", e)
+
+    async def submit(self, filename: str, model_choice: Optional[str] = None) -> Dict[str, Any]:
+        safe_name = os.path.basename(filename)
+        path = os.path.join(Config.UPLOADS_DIR, safe_name)
+        if safe_name != filename or not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail=f"Uploaded file not found: {filename}")
+        if os.path.splitext(safe_name)[1].lower() not in Config.ALLOWED_VIDEO_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Not a video file: {filename}")
+        if model_choice is not None:
+            self.model_handler.registry.entry(model_choice, task="dynamic")
+
+        job = VideoJob(str(uuid4()), safe_name, path, model_choice)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Video job queue is full. Try again later.")
+
+        self.jobs[job.job_id] = job
+        self._prune()
+        await self._publish(job)
+        logger.info(f"Video job queued: {job.job_id}", meta={"filename": safe_name, "queued": self._queue.qsize()})
+        return job.to_dict()
+
+    async def get(self, job_id: str, include_transcript: bool = False) -> Dict[str, Any]:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict(include_transcript)
+        record = await self.index.load(job_id) if self.index is not None else None
+        if record is None:
+            raise HTTPException(status_code=404, detail="Video job not found")
+        return record if include_transcript else _strip_transcript(record)
+
+    async def list_jobs(self) -> List[Dict[str, Any]]:
+        if self.index is None:
+            return [job.to_dict() for job in self.jobs.values()]
+        records = {record["jobId"]: _strip_transcript(record) for record in await self.index.load_all()}
+        # This worker's own jobs are fresher than their last published snapshot.
+        records.update((job_id, job.to_dict()) for job_id, job in self.jobs.items() if job_id in records)
+        return list(records.values())
+
+    def _cancel_local(self, job: VideoJob) -> bool:
+        if job.finished:
+            return False
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return True
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            if self._cancel_local(job):
+                await self._publish(job)
+            return job.to_dict()
+
+        record = await self.get(job_id)
+        if record["status"] not in FINISHED_STATUSES:
+            # The owning worker applies it; until then the snapshot keeps its current status.
+            await self.index.request_cancel(job_id)
+        return record
+
+    async def _listen_for_cancels(self):
+        while True:
+            try:
+                async for job_id in self.index.cancel_requests():
+                    job = self.jobs.get(job_id)
+                    if job is not None and self._cancel_local(job):
+                        await self._publish(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Video job cancel listener failed; resubscribing:", e)
+                await asyncio.sleep(1)
+
+    async def active_paths(self) -> Set[str]:
+        paths = {job.path for job in self.jobs.values() if not job.finished}
+        if self.index is not None:
+            paths.update(
+                os.path.join(Config.UPLOADS_DIR, record["filename"])
+                for record in await self.index.load_all() if record["status"] not in FINISHED_STATUSES
+            )
+        return paths
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "shared": self.index is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "jobs": counts,
+            "detectors": self.hands_pool.stats()
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status == "cancelled":
+                continue
+
+            job.status = "running"
+            job.started_at = time.time()
+            await self._publish(job)
+            try:
+                await self._run(job)
+                job.status = "cancelled" if job.cancel_event.is_set() else "completed"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except HTTPException as e:
+                job.status, job.error = "failed", str(e.detail)
+            except Exception as e:
+                logger.error(f"Video job {job.job_id} failed:", e)
+                job.status, job.error = "failed", str(e)
+            finally:
+                job.finished_at = time.time()
+                logger.info(f"Video job {job.job_id} {job.status}", meta={
+                    "framesRead": job.frames_read,
+                    "segments": len(job.transcript),
+                    "seconds": round(job.finished_at - job.started_at, 2)
+                })
+                await self._publish(job)
+
+    async def _classify(self, job: VideoJob, windows: List[np.ndarray], spans: List[Tuple[float, float]]):
+        if not windows:
+            return
+        results = await self.model_handler.classify_sequences(np.stack(windows), job.model_choice)
+        for (start, end), result in zip(spans, results):
+            job.add_window_result(start, end, result)
+        windows.clear()
+        spans.clear()
+
+    async def _run(self, job: VideoJob):
+        loop = asyncio.get_running_loop()
+        reader = await loop.run_in_executor(self.executor, VideoFrameReader, job.path)
+        job.fps, job.frames_total = reader.fps, reader.frames_total
+
+        window_frames = Config.NUM_FRAMES_VIDEO
+        frames = LandmarkRingBuffer(window_frames)
+        times = LandmarkRingBuffer(window_frames, num_features=1)
+        hands_in_window = LandmarkRingBuffer(window_frames, num_features=1)
+        windows: List[np.ndarray] = []
+        spans: List[Tuple[float, float]] = []
+        since_last_window = 0
+        emitted_any = False
+
+        try:
+            with self.hands_pool.acquire() as hands:
+                while not reader.finished and not job.cancel_event.is_set():
+                    landmarks, timestamps, detected = await loop.run_in_executor(
+                        self.executor, reader.read_chunk, hands, Config.VIDEO_JOB_READ_CHUNK_FRAMES
+                    )
+                    job.frames_read = reader.frame_index
+                    job.frames_with_hand += int(detected.sum())
+
+                    for frame, timestamp, hand in zip(landmarks, timestamps, detected):
+                        frames.append(frame)
+                        times.append(np.array([timestamp], dtype=np.float32))
+                        hands_in_window.append(np.array([hand], dtype=np.float32))
+                        since_last_window += 1
+                        if len(frames) < window_frames or since_last_window < Config.VIDEO_JOB_WINDOW_STRIDE:
+                            continue
+
+                        since_last_window = 0
+                        emitted_any = True
+                        if hands_in_window.view().sum() >= Config.VIDEO_JOB_MIN_HAND_FRAMES:
+                            windows.append(frames.view().copy())
+                            spans.append((float(times.view()[0, 0]), float(times.view()[-1, 0])))
+
+                    if len(windows) >= Config.VIDEO_JOB_BATCH_SIZE:
+                        await self._classify(job, windows, spans)
+                    await self._publish(job)
+
+            # Cover the tail after the last full stride. Videos shorter than one window are
+            # classified once, zero-padded like the training clips.
+            if (since_last_window or not emitted_any) and len(frames) \
+                    and hands_in_window.view().sum() >= Config.VIDEO_JOB_MIN_HAND_FRAMES:
+                windows.append(self.model_handler.preprocessor.sequence(frames.view()))
+                spans.append((float(times.view()[0, 0]), float(times.view()[-1, 0])))
+            if not job.cancel_event.is_set():
+                await self._classify(job, windows, spans)
+        finally:
+            await loop.run_in_executor(self.executor, reader.close)
@@ -0,0 +1,114 @@
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Union
+
+from config import Config
+
+ROOT_LOGGER_NAME = "artisign"
+
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        meta = getattr(record, "meta", None)
+        if meta:
+            entry["meta"] = meta
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"[{record.levelname}] {record.getMessage()}"
+        meta = getattr(record, "meta", None)
+        if meta:
+            line += f" {meta}"
+        if record.exc_text:
+            line += f"\n{record.exc_text}"
+        return line
+
+class _BackgroundQueueHandler(QueueHandler):
+    """Renders the message and traceback on the calling thread, leaving only I/O to the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(level: str = Config.LOG_LEVEL, log_format: str = Config.LOG_FORMAT):
+    """Routes every ``artisign.*`` logger through a queue drained by one background thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(level.upper())
+    root.propagate = False
+    root.handlers = [_BackgroundQueueHandler(log_queue)]
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flushes queued records and stops the background thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+class StructuredLogger:
+    """Thin wrapper over a stdlib logger that attaches structured ``meta`` to records.
+
+    ``debug``/``info``/``warning`` take %-style ``args`` that are only
+    formatted if the level is enabled, so hot-path calls such as
+    ``logger.debug("Class=%s", name)`` are close to free when disabled.
+    """
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, message: str, args, meta: Optional[Dict[str, Any]], exc_info=None):
+        if self._logger.isEnabledFor(level):
+            self._logger._log(level, message, args, exc_info=exc_info, extra={"meta": meta} if meta else None)
+
+    def debug(self, message: str, *args, meta: Optional[Dict[str, Any]] = None):
+        self._log(logging.DEBUG, message, args, meta)
+
+    def info(self, message: str, *args, meta: Optional[Dict[str, Any]] = None):
+        self._log(logging.INFO, message, args, meta)
+
+    def warning(self, message: str, *args, meta: Optional[Dict[str, Any]] = None):
+        self._log(logging.WARNING, message, args, meta)
+
+    def error(self, message: str, error: Union[Exception, Dict[str, Any], None] = None):
+        if isinstance(error, BaseException):
+            self._log(logging.ERROR, message, (), {"error": str(error)}, exc_info=error)
+        else:
+            self._log(logging.ERROR, message, (), error)
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
@@ -10,26 +10,32 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
 from config import Config
+from logger import get_logger, setup_logging, stop_logging
+from metrics import MetricsMiddleware
+from profiling import ProfilingMiddleware
 
 from handlers.model_handler import ModelHandler
-from handlers.upload_handler import UploadHandler
+from handlers.upload_handler import UploadHandler, UploadSizeLimitMiddleware
 from handlers.realtime_handler import (
     create_session, end_session, get_session_status,
     process_realtime_landmarks, process_realtime_landmark_sequence,
-    correct_prediction, cleanup_inactive_sessions, user_sessions 
+    correct_prediction, cleanup_inactive_sessions, seconds_until_next_cleanup,
+    set_model_handler_instance, set_session_store, close_streaming_recognizer
 )
+from handlers.session_store import create_session_store
+from handlers.video_jobs import VideoJobManager, RedisVideoJobIndex
+from handlers.image_sign_handler import ImageSignHandler
 
-from routes import general, prediction, upload, realtime, test
+from routes import general, prediction, upload, realtime, models, video_jobs, metrics as metrics_routes, debug, test
 
-def log_info(message: str, meta: Optional[Dict] = None):
-    print(f"[INFO] {message}", meta if meta else "")
-
-def log_error(message: str, error: Union[Exception, Dict] = None):
-    meta = {"message": str(error), "stack": traceback.format_exc()} if isinstance(error, Exception) else error
-    print(f"[ERROR] {message}", meta if meta else "")
+setup_logging()
+logger = get_logger(__name__)
 
 model_handler = ModelHandler()
 upload_handler = UploadHandler()
+video_job_manager = VideoJobManager(model_handler)
+image_sign_handler = ImageSignHandler(model_handler)
+set_model_handler_instance(model_handler)
 
 app = FastAPI(
     title="Artisign BISINDO Translator API",
@@ -45,40 +51,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    "/api/upload": Config.MAX_FILE_SIZE_BYTES,
+    "/api/predict-image-sign": Config.MAX_IMAGE_SIZE_BYTES * Config.MAX_IMAGE_BATCH_ITEMS
+})
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+app.state.model_handler = model_handler
+app.state.upload_handler = upload_handler
+app.state.video_jobs = video_job_manager
+app.state.image_sign_handler = image_sign_handler
+
 app.include_router(general.router)
 app.include_router(prediction.router)
 app.include_router(upload.router)
 app.include_router(realtime.router)
+app.include_router(models.router)
+app.include_router(video_jobs.router)
+app.include_router(metrics_routes.router)
+app.include_router(debug.router)
 app.include_router(test.router)
 
 @app.on_event("startup")
 async def startup_event():
-    log_info("Starting up FastAPI application...")
+    logger.info("Starting up FastAPI application...")
     Config.create_dirs() 
     app.state.start_time = time.time()
     try:
         await model_handler.load_models() 
-        log_info("All models and mappings loaded successfully.")
+        logger.info("All models and mappings loaded successfully.")
     except Exception as e:
-        log_error("Failed to load models during startup. Exiting...", e)
+        logger.error("Failed to load models during startup. Exiting...", e)
         raise RuntimeError("Failed to load AI models, cannot start application.")
 
+    app.state.session_store = create_session_store()
+    shared_store = app.state.session_store.shared and not Config.SESSION_STORE_URL.startswith("fakeredis://")
+    if Config.WEB_CONCURRENCY > 1 and not shared_store:
+        raise RuntimeError(f"WEB_CONCURRENCY={Config.WEB_CONCURRENCY} needs SESSION_STORE_BACKEND=redis with a real server: "
+                           "realtime sessions and video jobs would otherwise only be visible to the worker that created them.")
+    set_session_store(app.state.session_store)
+    logger.info(f"Realtime session store: {Config.SESSION_STORE_BACKEND}")
+
+    video_job_manager.start(RedisVideoJobIndex(app.state.session_store.client) if app.state.session_store.shared else None)
     app.state.cleanup_task = asyncio.create_task(background_cleanup_task())
+    app.state.model_maintenance_task = asyncio.create_task(model_maintenance_task())
+    app.state.storage_sweep_task = asyncio.create_task(storage_sweep_task())
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    log_info("Shutting down FastAPI application...")
+    logger.info("Shutting down FastAPI application...")
     if hasattr(app.state, 'cleanup_task'):
         app.state.cleanup_task.cancel()
         try:
             await app.state.cleanup_task
         except asyncio.CancelledError:
-            log_info("Background cleanup task cancelled.")
+            logger.info("Background cleanup task cancelled.")
+    if hasattr(app.state, 'model_maintenance_task'):
+        app.state.model_maintenance_task.cancel()
+        try:
+            await app.state.model_maintenance_task
+        except asyncio.CancelledError:
+            logger.info("Model maintenance task cancelled.")
+    if hasattr(app.state, 'storage_sweep_task'):
+        app.state.storage_sweep_task.cancel()
+        try:
+            await app.state.storage_sweep_task
+        except asyncio.CancelledError:
+            logger.info("Storage sweep task cancelled.")
+    await video_job_manager.close()
+    await close_streaming_recognizer()
+    image_sign_handler.close()
+    await model_handler.shutdown()
+    if hasattr(app.state, 'session_store'):
+        await app.state.session_store.close()
+    stop_logging()
 
 async def background_cleanup_task():
     while True:
-        await asyncio.sleep(30 * 60) 
+        await asyncio.sleep(seconds_until_next_cleanup())
         await cleanup_inactive_sessions() 
 
+async def model_maintenance_task():
+    # Picks up model activations made by other workers and frees idle models.
+    while True:
+        await asyncio.sleep(Config.MODEL_MANIFEST_POLL_SECONDS)
+        try:
+            await model_handler.registry.refresh()
+            await model_handler.registry.unload_idle()
+        except Exception as e:
+            logger.error("Model maintenance failed:", e)
+
+async def storage_sweep_task():
+    while True:
+        try:
+            await asyncio.to_thread(upload_handler.sweep_storage, await video_job_manager.active_paths())
+        except Exception as e:
+            logger.error("Storage sweep failed:", e)
+        await asyncio.sleep(Config.STORAGE_SWEEP_INTERVAL_S)
+
 app.start_time = time.time()
 
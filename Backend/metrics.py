@@ -0,0 +1,206 @@
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_lock = threading.Lock()
+_registry: List["_Metric"] = []
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        with _lock:
+            _registry.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with _lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self):
+        with _lock:
+            self._children.clear()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with _lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with _lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+class _ValueMetric(_Metric):
+    _new_child = _Value
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+class Counter(_ValueMetric):
+    """Monotonic counter. ``set`` is only for mirroring a count kept elsewhere."""
+    kind = "counter"
+
+class Gauge(_ValueMetric):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        with _lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(child.buckets, child.counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {child.count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(child.sum)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {child.count}"
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric in list(_registry):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "artisign_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status")
+)
+INFERENCE_BATCH_SECONDS = Histogram(
+    "artisign_inference_batch_duration_seconds", "Time to run one forward pass, including executor wait.",
+    ("model", "path")
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "artisign_inference_batch_size", "Items per forward pass.",
+    ("model", "path"), buckets=BATCH_SIZE_BUCKETS
+)
+INFERENCE_QUEUE_DEPTH = Gauge("artisign_inference_queue_depth", "Requests waiting in a model's micro-batcher.", ("model",))
+MODELS_LOADED = Gauge("artisign_models_loaded", "Loaded model versions.", ("model", "version"))
+REALTIME_SESSIONS = Gauge("artisign_realtime_sessions", "Realtime sessions in the session store.")
+REALTIME_SESSIONS_REMOVED = Counter(
+    "artisign_realtime_sessions_removed_total", "Sessions dropped by the session store on expiry or eviction.", ("reason",)
+)
+WEBSOCKET_CONNECTIONS = Gauge("artisign_websocket_connections", "WebSocket connections open on this worker.")
+REALTIME_STATIC_INFERENCES = Counter(
+    "artisign_realtime_static_inferences_total", "Realtime frames run through or skipped by the static model gate.", ("outcome",)
+)
+PREDICTION_CACHE_REQUESTS = Counter(
+    "artisign_prediction_cache_requests_total", "Static prediction cache lookups.", ("result",)
+)
+PREDICTION_CACHE_HIT_RATIO = Gauge("artisign_prediction_cache_hit_ratio", "Static prediction cache hit rate.")
+STATIC_CASCADE_FRAMES = Counter(
+    "artisign_static_cascade_frames_total", "Static frames answered by the first stage or escalated to the full model.", ("outcome",)
+)
+STATIC_CASCADE_AGREEMENT = Gauge("artisign_static_cascade_agreement", "Share of audited first-stage answers the full model agreed with.")
+VIDEO_JOBS = Gauge("artisign_video_jobs", "Video jobs by status.", ("status",))
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by matched route template.
+
+    The label is the route's path template (``/api/video-jobs/{job_id}``),
+    not the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code[0]
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,309 @@
+"""Opt-in, sampled tracing of the prediction and realtime hot paths.
+
+A trace is a list of timed stages collected through a context variable.
+Hot-path code only calls ``stage(name)``; without an active trace that is
+a context variable lookup that returns a shared no-op context manager.
+
+Traces start for HTTP requests sent with ``X-Profile: 1``
+(``X-Profile: cprofile`` also captures a cProfile dump), for a
+PROFILING_SAMPLE_RATE fraction of other requests, and for each message of
+a realtime session that has profiling switched on through the debug routes.
+Every trace counts against PROFILING_MAX_TRACES_PER_SECOND, so the cost is
+bounded whatever clients send. Finished traces are kept in a bounded ring
+that ``/api/debug/traces`` serves.
+
+cProfile runs on the event loop thread. It therefore also sees coroutines
+of other requests that interleave with the traced one, but not the forward
+pass on the inference executor. The per-trace ``model_forward`` stage
+covers the forward pass instead.
+"""
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from itertools import count
+from typing import Any, Deque, Dict, List, Optional
+
+from config import Config
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("artisign_trace", default=None)
+_NO_STAGE = nullcontext()
+_ids = count(1)
+_profiler_lock = threading.Lock()
+
+traces: Deque["Trace"] = deque(maxlen=max(1, Config.PROFILING_TRACE_HISTORY))
+# session_id -> (capture cProfile, monotonic expiry).
+profiled_sessions: Dict[str, tuple] = {}
+
+class _RateLimiter:
+    """Token bucket holding one second's worth of traces, and at least one.
+
+    The floor lets fractional rates work: at 0.2 a trace is allowed every
+    five seconds.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = max(0.0, rate)
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity if self.rate else 0.0
+        self.updated = time.monotonic()
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.rejected += 1
+        return False
+
+_limiter = _RateLimiter(Config.PROFILING_MAX_TRACES_PER_SECOND)
+
+class Trace:
+    def __init__(self, name: str, cprofile: bool = False, **attributes):
+        self.id = f"{int(time.time() * 1000):x}-{next(_ids)}"
+        self.name = name
+        self.attributes: Dict[str, Any] = attributes
+        self.started_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.profile: Optional[str] = None
+        self._start = time.perf_counter()
+        self._token = None
+        self._profiler: Optional[cProfile.Profile] = None
+        if cprofile:
+            if _profiler_lock.acquire(blocking=False):
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            else:
+                self.attributes["cprofileSkipped"] = "Another cProfile capture is running."
+
+    def add_stage(self, name: str, start: float, end: float, **meta):
+        self.stages.append({
+            "stage": name,
+            "offsetMs": round((start - self._start) * 1000, 3),
+            "durationMs": round((end - start) * 1000, 3),
+            **meta
+        })
+
+    def _stop_profiler(self):
+        if self._profiler is None:
+            return
+        try:
+            self._profiler.disable()
+            output = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=output)
+            stats.sort_stats("cumulative").print_stats(Config.PROFILING_CPROFILE_TOP_N)
+            self.profile = output.getvalue()
+        finally:
+            self._profiler = None
+            _profiler_lock.release()
+
+    def stage_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for entry in self.stages:
+            totals[entry["stage"]] = round(totals.get(entry["stage"], 0.0) + entry["durationMs"], 3)
+        return totals
+
+    def to_dict(self, include_details: bool = True) -> Dict[str, Any]:
+        data = {
+            "traceId": self.id,
+            "name": self.name,
+            "startedAt": int(self.started_at * 1000),
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "stageTotalsMs": self.stage_totals(),
+            "hasProfile": self.profile is not None
+        }
+        if include_details:
+            data["stages"] = self.stages
+            data["profile"] = self.profile
+        return data
+
+class _Stage:
+    __slots__ = ("trace", "name", "meta", "start")
+
+    def __init__(self, trace: Trace, name: str, meta: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.meta = meta
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.add_stage(self.name, self.start, time.perf_counter(), **self.meta)
+        return False
+
+class _TraceScope:
+    __slots__ = ("name", "cprofile", "attributes", "trace")
+
+    def __init__(self, name: str, cprofile: bool, attributes: Dict[str, Any]):
+        self.name = name
+        self.cprofile = cprofile
+        self.attributes = attributes
+        self.trace = None
+
+    def __enter__(self) -> Optional[Trace]:
+        self.trace = start_trace(self.name, self.cprofile, **self.attributes)
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            finish_trace(self.trace)
+        return False
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+def stage(name: str, **meta):
+    """Times the enclosed block as ``name`` on the active trace, if any."""
+    trace = _current.get()
+    if trace is None:
+        return _NO_STAGE
+    return _Stage(trace, name, meta)
+
+def annotate(**attributes):
+    trace = _current.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+def start_trace(name: str, cprofile: bool = False, **attributes) -> Optional[Trace]:
+    """Makes a new trace current, or returns None when the rate limit is reached."""
+    if not _limiter.allow():
+        return None
+    trace = Trace(name, cprofile, **attributes)
+    trace._token = _current.set(trace)
+    return trace
+
+def finish_trace(trace: Trace):
+    trace.duration_ms = round((time.perf_counter() - trace._start) * 1000, 3)
+    trace._stop_profiler()
+    if trace._token is not None:
+        _current.reset(trace._token)
+        trace._token = None
+    traces.append(trace)
+
+def enable_session(session_id: str, cprofile: bool = False,
+                   ttl_seconds: float = Config.PROFILING_SESSION_TTL_SECONDS) -> float:
+    expires_at = time.monotonic() + ttl_seconds
+    profiled_sessions[session_id] = (cprofile, expires_at)
+    return time.time() + ttl_seconds
+
+def disable_session(session_id: str) -> bool:
+    return profiled_sessions.pop(session_id, None) is not None
+
+def session_trace(name: str, session_id: str):
+    """Traces the enclosed block when ``session_id`` has profiling switched on.
+
+    Inside an already active trace this only tags it with the session.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.attributes.setdefault("sessionId", session_id)
+        return _NO_STAGE
+    if not profiled_sessions:
+        return _NO_STAGE
+    toggle = profiled_sessions.get(session_id)
+    if toggle is None:
+        return _NO_STAGE
+    cprofile, expires_at = toggle
+    if time.monotonic() >= expires_at:
+        del profiled_sessions[session_id]
+        return _NO_STAGE
+    return _TraceScope(name, cprofile, {"sessionId": session_id})
+
+def recent_traces(limit: int = 50, name: Optional[str] = None, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    found = []
+    for trace in reversed(traces):
+        if name is not None and trace.name != name:
+            continue
+        if session_id is not None and trace.attributes.get("sessionId") != session_id:
+            continue
+        found.append(trace.to_dict(include_details=False))
+        if len(found) >= limit:
+            break
+    return found
+
+def get_trace(trace_id: str) -> Optional[Trace]:
+    for trace in reversed(traces):
+        if trace.id == trace_id:
+            return trace
+    return None
+
+def status() -> Dict[str, Any]:
+    now = time.monotonic()
+    return {
+        "sampleRate": Config.PROFILING_SAMPLE_RATE,
+        "maxTracesPerSecond": _limiter.rate,
+        "tracesStored": len(traces),
+        "traceHistory": traces.maxlen,
+        "rateLimited": _limiter.rejected,
+        "cprofileRunning": _profiler_lock.locked(),
+        "sessions": [
+            {"sessionId": session_id, "cprofile": cprofile, "expiresInSeconds": round(expires_at - now, 1)}
+            for session_id, (cprofile, expires_at) in profiled_sessions.items() if expires_at > now
+        ]
+    }
+
+class ProfilingMiddleware:
+    """ASGI middleware starting traces for ``X-Profile`` requests and sampled traffic.
+
+    ``X-Profile: cprofile`` needs a matching ``X-Admin-Token``, since the
+    profiler slows every request sharing the event loop. Without a configured
+    ADMIN_TOKEN such requests get a plain trace.
+    The trace ID is returned in the ``X-Trace-Id`` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = None
+        admin_token = None
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                requested = value.decode("latin-1").strip().lower()
+            elif key == b"x-admin-token":
+                admin_token = value.decode("latin-1")
+
+        if requested in ("1", "true", "cprofile"):
+            cprofile = (requested == "cprofile" and bool(Config.ADMIN_TOKEN) and admin_token is not None
+                        and hmac.compare_digest(admin_token, Config.ADMIN_TOKEN))
+        elif Config.PROFILING_SAMPLE_RATE > 0 and random.random() < Config.PROFILING_SAMPLE_RATE:
+            cprofile = False
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        trace = start_trace(f"{scope['method']} {scope['path']}", cprofile, sampled=requested is None)
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.attributes["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                trace.name = f"{scope['method']} {route.path}"
+            finish_trace(trace)
@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+
+import profiling
+from schemas.payloads import ProfileSessionPayload
+from routes.models import require_admin
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/api/debug/profiling")
+async def profiling_status_route():
+    return {"success": True, **profiling.status()}
+
+@router.put("/api/debug/profiling/sessions/{session_id}")
+async def enable_session_profiling_route(session_id: str, payload: ProfileSessionPayload):
+    expires_at = profiling.enable_session(session_id, payload.cprofile, payload.ttlSeconds)
+    return {"success": True, "sessionId": session_id, "cprofile": payload.cprofile, "expiresAt": int(expires_at * 1000)}
+
+@router.delete("/api/debug/profiling/sessions/{session_id}")
+async def disable_session_profiling_route(session_id: str):
+    return {"success": True, "sessionId": session_id, "disabled": profiling.disable_session(session_id)}
+
+@router.get("/api/debug/traces")
+async def list_traces_route(limit: int = Query(50, ge=1, le=1000), name: Optional[str] = None,
+                            sessionId: Optional[str] = None):
+    return {"success": True, "traces": profiling.recent_traces(limit, name, sessionId)}
+
+@router.get("/api/debug/traces/{trace_id}")
+async def get_trace_route(trace_id: str):
+    trace = profiling.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found.")
+    return {"success": True, "trace": trace.to_dict()}
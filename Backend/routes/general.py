@@ -1,11 +1,12 @@
 import time
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from handlers.model_handler import ModelHandler 
+from handlers import realtime_handler
 from typing import Dict, Any
 
 router = APIRouter()
 
-def get_model_handler(request: Any) -> ModelHandler:
+def get_model_handler(request: Request) -> ModelHandler:
     return request.app.state.model_handler
 
 @router.get("/")
@@ -13,10 +14,13 @@ async def root():
     return {"message": "Artisign BISINDO Translator API"}
 
 @router.get("/api/health")
-async def health_check(model_handler: ModelHandler = Depends(get_model_handler)):
+async def health_check(request: Request, model_handler: ModelHandler = Depends(get_model_handler)):
     return {
         "status": "ok",
         "timestamp": time.time(),
         "models": model_handler.get_model_status(),
-        "uptime": time.time() - router.parent.state.start_time 
+        "predictionCache": model_handler.get_cache_stats(),
+        "staticCascade": model_handler.get_cascade_stats(),
+        "sessions": await realtime_handler.get_session_store_stats(),
+        "uptime": time.time() - request.app.state.start_time
     }
\ No newline at end of file
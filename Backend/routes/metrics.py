@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+import metrics
+from handlers import realtime_handler
+
+router = APIRouter()
+
+async def refresh_session_gauges():
+    session_store = realtime_handler.session_store
+    metrics.REALTIME_SESSIONS.set(await session_store.count())
+    metrics.REALTIME_SESSIONS_REMOVED.labels(reason="expired").set(session_store.expired_total)
+    metrics.REALTIME_SESSIONS_REMOVED.labels(reason="capacity").set(session_store.evicted_capacity_total)
+    metrics.REALTIME_SESSIONS_REMOVED.labels(reason="memory").set(session_store.evicted_memory_total)
+    metrics.WEBSOCKET_CONNECTIONS.set(len(realtime_handler.session_websockets))
+    metrics.REALTIME_STATIC_INFERENCES.labels(outcome="run").set(realtime_handler.realtime_stats["static_inferences"])
+    metrics.REALTIME_STATIC_INFERENCES.labels(outcome="skipped").set(realtime_handler.realtime_stats["static_inferences_skipped"])
+
+async def refresh_gauges(request: Request):
+    """Copies point-in-time values (queue depths, session counts, cache stats) into their gauges."""
+    model_handler = request.app.state.model_handler
+
+    metrics.INFERENCE_QUEUE_DEPTH.clear()
+    metrics.MODELS_LOADED.clear()
+    for model in list(model_handler.registry.loaded.values()):
+        metrics.INFERENCE_QUEUE_DEPTH.labels(model=f"{model.name} v{model.version}").set(model.batcher.queue_depth)
+        metrics.MODELS_LOADED.labels(model=model.name, version=model.version).set(1)
+
+    await refresh_session_gauges()
+
+    cache_stats = model_handler.get_cache_stats()
+    if cache_stats is not None:
+        metrics.PREDICTION_CACHE_REQUESTS.labels(result="hit").set(cache_stats["hits"])
+        metrics.PREDICTION_CACHE_REQUESTS.labels(result="miss").set(cache_stats["misses"])
+        metrics.PREDICTION_CACHE_HIT_RATIO.set(cache_stats["hitRate"])
+
+    cascade_stats = model_handler.get_cascade_stats()
+    if cascade_stats is not None:
+        metrics.STATIC_CASCADE_FRAMES.labels(outcome="answered").set(cascade_stats["answered"])
+        metrics.STATIC_CASCADE_FRAMES.labels(outcome="escalated").set(cascade_stats["escalated"])
+        if cascade_stats["agreement"] is not None:
+            metrics.STATIC_CASCADE_AGREEMENT.set(cascade_stats["agreement"])
+
+    metrics.VIDEO_JOBS.clear()
+    for job_status, count in request.app.state.video_jobs.stats()["jobs"].items():
+        metrics.VIDEO_JOBS.labels(status=job_status).set(count)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_route(request: Request):
+    await refresh_gauges(request)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,36 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
+
+from config import Config
+from schemas.payloads import ActivateModelPayload
+from handlers.model_handler import ModelHandler
+
+router = APIRouter()
+
+def get_model_handler(request: Request) -> ModelHandler:
+    return request.app.state.model_handler
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Fails closed: without a configured ADMIN_TOKEN no request is an admin request."""
+    return bool(Config.ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, Config.ADMIN_TOKEN)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled until ADMIN_TOKEN is configured.")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token header.")
+
+@router.get("/api/models")
+async def list_models_route(model_handler: ModelHandler = Depends(get_model_handler)):
+    return {"success": True, **model_handler.registry.status()}
+
+@router.post("/api/models/{name}/activate", dependencies=[Depends(require_admin)])
+async def activate_model_route(name: str, payload: ActivateModelPayload, model_handler: ModelHandler = Depends(get_model_handler)):
+    model = await model_handler.registry.activate(name, payload.version)
+    return {"success": True, "model": name, "version": model.version}
+
+@router.post("/api/models/{name}/unload", dependencies=[Depends(require_admin)])
+async def unload_model_route(name: str, model_handler: ModelHandler = Depends(get_model_handler)):
+    unloaded = await model_handler.registry.unload(name)
+    return {"success": True, "model": name, "unloaded": unloaded}
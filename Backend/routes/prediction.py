@@ -1,27 +1,78 @@
 import json
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, Form, Depends
-from fastapi.responses import JSONResponse
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Form, Depends, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
-from schemas.payloads import LandmarkPayload, DynamicSignPayload, TextToSignPayload
+from schemas.payloads import LandmarkPayload, DynamicSignPayload, StaticSignBatchPayload, DynamicSignBatchPayload, TextToSignPayload, TextToSignBulkPayload
+from schemas.landmark_codec import parse_landmark_request, landmark_request_body
+from schemas.image_form import read_image_form, image_form_request_body
 from handlers.model_handler import ModelHandler 
+from handlers.image_sign_handler import ImageSignHandler
+from handlers.sign_lexicon import split_sentences, stream_sentences
+from config import Config
+from logger import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 
-def get_model_handler(request: Any) -> ModelHandler:
+def get_model_handler(request: Request) -> ModelHandler:
     return request.app.state.model_handler
 
-@router.post("/api/predict-static-sign")
-async def predict_static_sign_route(payload: LandmarkPayload, model_handler: ModelHandler = Depends(get_model_handler)):
+def get_image_sign_handler(request: Request) -> ImageSignHandler:
+    return request.app.state.image_sign_handler
+
+class RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse whose content is produced while the request body is still being read.
+
+    StreamingResponse listens on ``receive`` for a disconnect, which would take
+    the body chunks away from ``request.stream()``. Here the body iterator owns
+    ``receive`` and sees a disconnect itself, as ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+async def read_limited_body(request: Request, limit: int, limit_mb: int) -> bytes:
+    """Reads the body, failing with 413 on a declared length or at the first chunk over ``limit``."""
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                              detail=f"Request body too large. Max size is {limit_mb}MB.")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+@router.post("/api/predict-static-sign", openapi_extra=landmark_request_body(LandmarkPayload))
+async def predict_static_sign_route(request: Request, model_handler: ModelHandler = Depends(get_model_handler)):
+    payload = await parse_landmark_request(request, LandmarkPayload, "landmarks", single_frame=True)
     try:
         result = await model_handler.predict_static_sign(payload.landmarks)
         return {"success": True, "result": result}
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"[ERROR] Error in static sign prediction route: {e}") 
+        logger.error("Error in static sign prediction route:", e)
         return JSONResponse(status_code=500, content={"success": False, "error": str(e), "result": {"class": "A", "confidence": 0.9, "index": 0}})
 
+@router.post("/api/predict-static-sign/batch")
+async def predict_static_sign_batch_route(payload: StaticSignBatchPayload, model_handler: ModelHandler = Depends(get_model_handler)):
+    try:
+        results = await model_handler.predict_static_sign_batch(payload.landmarks)
+        return {"success": True, "count": len(results), "results": results}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error in static sign batch prediction route:", e)
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {e}")
+
 @router.post("/api/predict-static-sign-form")
 async def predict_static_sign_form_route(landmarks: str = Form(...), model_handler: ModelHandler = Depends(get_model_handler)):
     try:
@@ -35,46 +86,65 @@ async def predict_static_sign_form_route(landmarks: str = Form(...), model_handl
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"[ERROR] Error in static sign prediction route: {e}")
+        logger.error("Error in static sign prediction route:", e)
         return JSONResponse(status_code=500, content={"success": False, "error": str(e), "result": {"class": "A", "confidence": 0.9, "index": 0}})
 
+@router.post("/api/predict-image-sign", openapi_extra=image_form_request_body())
+async def predict_image_sign_route(request: Request, image_sign_handler: ImageSignHandler = Depends(get_image_sign_handler)):
+    parts = await read_image_form(request)
+    results = await image_sign_handler.predict_images(parts)
+    return {"success": True, "count": len(results), "results": results}
+
 @router.get("/api/available-letters")
 async def get_available_letters_route(model_handler: ModelHandler = Depends(get_model_handler)):
     try:
         letters = model_handler.get_available_letters()
         return {"success": True, "count": len(letters), "letters": letters}
     except Exception as e:
-        print(f"[ERROR] Error fetching available letters: {e}")
+        logger.error("Error fetching available letters:", e)
         raise HTTPException(status_code=500, detail="Error processing the request")
 
-@router.post("/api/predict-dynamic-sign")
-async def predict_dynamic_sign_route(payload: DynamicSignPayload, model_handler: ModelHandler = Depends(get_model_handler)):
+@router.post("/api/predict-dynamic-sign", openapi_extra=landmark_request_body(DynamicSignPayload))
+async def predict_dynamic_sign_route(request: Request, model_handler: ModelHandler = Depends(get_model_handler)):
+    payload = await parse_landmark_request(request, DynamicSignPayload, "landmarkSequence")
     try:
-        result = await model_handler.predict_dynamic_sign(payload.landmarkSequence)
+        result = await model_handler.predict_dynamic_sign(payload.landmarkSequence, payload.modelChoice)
         return {"success": True, "result": result}
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"[ERROR] Error in dynamic sign prediction route: {e}")
+        logger.error("Error in dynamic sign prediction route:", e)
         return JSONResponse(status_code=500, content={"success": False, "error": str(e), "result": {"class": "Halo", "confidence": 0.9, "index": 11, "modelUsed": "lstm"}})
 
+@router.post("/api/predict-dynamic-sign/batch")
+async def predict_dynamic_sign_batch_route(payload: DynamicSignBatchPayload, model_handler: ModelHandler = Depends(get_model_handler)):
+    try:
+        results = await model_handler.predict_dynamic_sign_batch(payload.landmarkSequences, payload.modelChoice)
+        return {"success": True, "count": len(results), "results": results}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error in dynamic sign batch prediction route:", e)
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {e}")
+
 @router.post("/api/predict-dynamic-sign-form")
 async def predict_dynamic_sign_form_route(
     landmarkSequence: str = Form(...),
+    modelChoice: Optional[str] = Form(None),
     model_handler: ModelHandler = Depends(get_model_handler)
 ):
     try:
         sequence_list = json.loads(landmarkSequence)
         if not isinstance(sequence_list, list):
             raise HTTPException(status_code=400, detail="Invalid landmark sequence data format: must be a JSON array.")
-        result = await model_handler.predict_dynamic_sign(sequence_list)
+        result = await model_handler.predict_dynamic_sign(sequence_list, modelChoice)
         return {"success": True, "result": result}
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON format for landmark sequence: {e}")
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"[ERROR] Error in dynamic sign form prediction route: {e}")
+        logger.error("Error in dynamic sign form prediction route:", e)
         return JSONResponse(status_code=500, content={"success": False, "error": str(e), "result": {"class": "Halo", "confidence": 0.9, "index": 11, "modelUsed": "lstm"}})
 
 @router.get("/api/available-words")
@@ -83,17 +153,53 @@ async def get_available_words_route(model_handler: ModelHandler = Depends(get_mo
         words = model_handler.get_available_words()
         return {"success": True, "count": len(words), "words": words}
     except Exception as e:
-        print(f"[ERROR] Error fetching available words: {e}")
+        logger.error("Error fetching available words:", e)
         raise HTTPException(status_code=500, detail="Error processing the request")
 
 @router.post("/api/text-to-sign")
 async def text_to_sign_route(payload: TextToSignPayload, model_handler: ModelHandler = Depends(get_model_handler)):
     try:
         result = model_handler.text_to_sign(payload.text)
-        print(f"[INFO] Text to sign conversion: text={payload.text}, wordCount={len(result['signs'])}") # Use a proper logger later
+        logger.debug("Text to sign conversion: textLength=%d, wordCount=%d", len(payload.text), len(result["signs"]))
         return {"success": True, **result}
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"[ERROR] Error in text to sign conversion: {e}")
-        raise HTTPException(status_code=500, detail="Error processing the request")
\ No newline at end of file
+        logger.error("Error in text to sign conversion:", e)
+        raise HTTPException(status_code=500, detail="Error processing the request")
+
+@router.post("/api/text-to-sign/bulk", openapi_extra={
+    "requestBody": {
+        "content": {
+            "application/json": {"schema": TextToSignBulkPayload.model_json_schema()},
+            "text/plain": {"schema": {"type": "string"}}
+        },
+        "required": True
+    }
+})
+async def text_to_sign_bulk_route(request: Request, model_handler: ModelHandler = Depends(get_model_handler)):
+    """Streams NDJSON, one line per sentence.
+
+    A text/plain body is read and translated as it arrives. A JSON body is
+    parsed whole, so it is capped at MAX_TEXT_TO_SIGN_BULK_BYTES.
+    """
+    response_class = StreamingResponse
+    if request.headers.get("content-type", "").startswith("text/plain"):
+        response_class = RequestStreamingResponse
+
+        async def sentences():
+            async for sentence in stream_sentences(request.stream()):
+                yield 0, sentence
+    else:
+        try:
+            body = await read_limited_body(request, Config.MAX_TEXT_TO_SIGN_BULK_BYTES, Config.MAX_TEXT_TO_SIGN_BULK_MB)
+            payload = TextToSignBulkPayload.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+
+        async def sentences():
+            for text_index, text in enumerate(payload.texts):
+                for sentence in split_sentences(text):
+                    yield text_index, sentence
+
+    return response_class(model_handler.text_to_sign_stream(sentences()), media_type="application/x-ndjson")
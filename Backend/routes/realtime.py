@@ -1,88 +1,163 @@
+import json
 import time
+import asyncio
 from typing import Dict, Any
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, status, Depends, Request
+from pydantic import ValidationError
 
-from schemas.payloads import CreateSessionPayload, EndSessionPayload, RealtimeLandmarksPayload, RealtimeLandmarkSequencePayload, CorrectionPayload
+from schemas.payloads import CreateSessionPayload, EndSessionPayload, RealtimeLandmarksPayload, RealtimeLandmarkSequencePayload, CorrectionPayload, LandmarkPayload, DynamicSignPayload
+from schemas.landmark_codec import parse_landmark_request, landmark_request_body, decode_landmarks
 from handlers import realtime_handler 
+from logger import get_logger
+import profiling
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 
 @router.post("/api/realtime/session/create")
 async def create_realtime_session_route(payload: CreateSessionPayload):
     try:
-        return realtime_handler.create_session(payload.userId)
+        return await realtime_handler.create_session(payload.userId)
     except Exception as e:
-        realtime_handler.log_error("Error creating realtime session:", e)
+        logger.error("Error creating realtime session:", e)
         raise HTTPException(status_code=500, detail=f"Error creating session: {e}")
 
 @router.post("/api/realtime/session/end")
 async def end_realtime_session_route(payload: EndSessionPayload):
     try:
-        return realtime_handler.end_session(payload.sessionId)
+        return await realtime_handler.end_session(payload.sessionId)
     except Exception as e:
-        realtime_handler.log_error("Error ending realtime session:", e)
+        logger.error("Error ending realtime session:", e)
         raise HTTPException(status_code=500, detail=f"Error ending session: {e}")
 
 @router.get("/api/realtime/session/{session_id}/status")
 async def get_realtime_session_status_route(session_id: str):
     try:
-        return realtime_handler.get_session_status(session_id)
+        return await realtime_handler.get_session_status(session_id)
     except Exception as e:
-        realtime_handler.log_error("Error getting session status:", e)
+        logger.error("Error getting session status:", e)
         raise HTTPException(status_code=500, detail=f"Error getting session status: {e}")
 
-@router.post("/api/realtime/landmarks")
-async def realtime_landmarks_route(payload: RealtimeLandmarksPayload):
+@router.post("/api/realtime/landmarks", openapi_extra=landmark_request_body(RealtimeLandmarksPayload))
+async def realtime_landmarks_route(request: Request):
+    payload = await parse_landmark_request(request, RealtimeLandmarksPayload, "landmarks", single_frame=True)
     try:
         result = await realtime_handler.process_realtime_landmarks(payload.sessionId, payload.landmarks)
         return result
     except HTTPException as e: 
         raise e
     except Exception as e:
-        realtime_handler.log_error("Error processing realtime landmarks:", e)
+        logger.error("Error processing realtime landmarks:", e)
         raise HTTPException(status_code=500, detail=f"Error processing landmarks: {e}")
 
-@router.post("/api/realtime/landmark-sequence")
-async def realtime_landmark_sequence_route(payload: RealtimeLandmarkSequencePayload):
+@router.post("/api/realtime/landmark-sequence", openapi_extra=landmark_request_body(RealtimeLandmarkSequencePayload))
+async def realtime_landmark_sequence_route(request: Request):
+    payload = await parse_landmark_request(request, RealtimeLandmarkSequencePayload, "landmarkSequence")
     try:
         result = await realtime_handler.process_realtime_landmark_sequence(payload.sessionId, payload.landmarkSequence)
         return result
     except HTTPException as e: 
         raise e
     except Exception as e:
-        realtime_handler.log_error("Error processing realtime landmark sequence:", e)
+        logger.error("Error processing realtime landmark sequence:", e)
         raise HTTPException(status_code=500, detail=f"Error processing landmark sequence: {e}")
 
 @router.post("/api/realtime/correction")
 async def realtime_correction_route(payload: CorrectionPayload):
     try:
-        result = realtime_handler.correct_prediction(payload.sessionId, payload.correctionType, payload.correction)
+        result = await realtime_handler.correct_prediction(payload.sessionId, payload.correctionType, payload.correction)
         return result
     except Exception as e:
-        realtime_handler.log_error("Error processing correction:", e)
+        logger.error("Error processing correction:", e)
         raise HTTPException(status_code=500, detail=f"Error processing correction: {e}")
 
+async def handle_websocket_message(session_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Routes one inbound WebSocket message into the realtime pipeline.
+
+    Binary messages use the landmark wire format: a single frame is processed
+    as live landmarks, several frames as a landmark sequence. Text messages are
+    JSON objects of the form ``{"type": "landmarks", "landmarks": [...]}`` or
+    ``{"type": "landmarkSequence", "landmarkSequence": [...]}``.
+    """
+    with profiling.session_trace("websocket.message", session_id):
+        return await _handle_websocket_message(session_id, message)
+
+async def _handle_websocket_message(session_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    if message.get("bytes") is not None:
+        with profiling.stage("parse", binary=True):
+            frames = decode_landmarks(message["bytes"])
+        if frames.shape[0] == 1:
+            return await realtime_handler.process_realtime_landmarks(session_id, frames[0])
+        return await realtime_handler.process_realtime_landmark_sequence(session_id, frames)
+
+    with profiling.stage("parse", binary=False):
+        data = json.loads(message.get("text") or "{}")
+    if not isinstance(data, dict):
+        return {"success": False, "error": "Invalid message: expected a JSON object."}
+    message_type = data.get("type")
+    if message_type == "landmarks":
+        with profiling.stage("parse", binary=False):
+            payload = LandmarkPayload.model_validate(data)
+        return await realtime_handler.process_realtime_landmarks(session_id, payload.landmarks)
+    if message_type == "landmarkSequence":
+        with profiling.stage("parse", binary=False):
+            payload = DynamicSignPayload.model_validate(data)
+        return await realtime_handler.process_realtime_landmark_sequence(session_id, payload.landmarkSequence)
+    if message_type == "ping":
+        return {"success": True, "type": "pong"}
+    return {"success": False, "error": f"Unknown message type: {message_type}"}
+
+async def forward_published_updates(session_id: str, sender: realtime_handler.WebSocketSender):
+    """Relays updates published by other workers for this session onto the local socket."""
+    async for update in realtime_handler.session_store.subscribe(session_id):
+        await sender.send_json(update)
+
 @router.websocket("/ws/realtime/sign/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    session = realtime_handler.get_session(session_id)
+    session = await realtime_handler.get_session(session_id)
     if not session:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid session ID")
         return
     
-    session["websocket"] = websocket
-    realtime_handler.log_info(f"WebSocket connected for session: {session_id}")
+    logger.info(f"WebSocket connected for session: {session_id}")
+    sender = None
+    forward_task = None
     
     try:
         await websocket.accept()
+        sender = realtime_handler.attach_websocket(session_id, websocket)
+        if realtime_handler.session_store.shared:
+            forward_task = asyncio.create_task(forward_published_updates(session_id, sender))
         while True:
-            await websocket.receive_text() 
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+
+            try:
+                result = await handle_websocket_message(session_id, message)
+            except HTTPException as e:
+                result = {"success": False, "error": e.detail}
+            except (json.JSONDecodeError, ValidationError, ValueError) as e:
+                result = {"success": False, "error": f"Invalid message: {e}"}
+            except Exception as e:
+                # One failing message is reported on the socket; it does not end the session.
+                logger.error(f"Error handling WebSocket message for session {session_id}:", e)
+                result = {"success": False, "error": "Internal error while processing the message."}
+
+            if not result.get("success"):
+                await sender.send_json({"type": "error", "timestamp": int(time.time() * 1000), "error": result.get("error")})
+            elif "result" in result:
+                await sender.send_json({"type": "sequenceResult", "timestamp": int(time.time() * 1000), "result": result["result"]})
+            elif result.get("type") == "pong":
+                await sender.send_json({"type": "pong", "timestamp": int(time.time() * 1000)})
     except WebSocketDisconnect:
-        realtime_handler.log_info(f"WebSocket disconnected for session: {session_id}")
-        session["websocket"] = None
+        logger.info(f"WebSocket disconnected for session: {session_id}")
     except Exception as e:
-        realtime_handler.log_error(f"WebSocket error for session {session_id}:", e)
-        session["websocket"] = None
+        logger.error(f"WebSocket error for session {session_id}:", e)
     finally:
-        realtime_handler.log_info(f"WebSocket connection closed for session: {session_id}")
-        session["websocket"] = None
\ No newline at end of file
+        logger.info(f"WebSocket connection closed for session: {session_id}")
+        if sender is not None:
+            realtime_handler.detach_websocket(session_id, sender)
+        if forward_task is not None:
+            forward_task.cancel()
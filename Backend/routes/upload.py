@@ -1,23 +1,28 @@
 from typing import Optional, Dict, Any
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends
-from handlers.upload_handler import UploadHandler 
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from handlers.upload_handler import UploadHandler, FILE_FIELD, FILE_TYPE_FIELD
+from schemas.multipart_stream import form_request_body
 from config import Config
+from logger import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 
-def get_upload_handler(request: Any) -> UploadHandler:
+def get_upload_handler(request: Request) -> UploadHandler:
     return request.app.state.upload_handler
 
-@router.post("/api/upload")
-async def upload_file_route(file: UploadFile = File(...), fileType: Optional[str] = Form('unknown'), upload_handler: UploadHandler = Depends(get_upload_handler)):
-    if file.size > Config.MAX_FILE_SIZE_BYTES:
-        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"File too large. Max size is {Config.MAX_FILE_SIZE_MB}MB.")
-    
+UPLOAD_REQUEST_BODY = form_request_body({
+    FILE_FIELD: {"type": "string", "format": "binary"},
+    FILE_TYPE_FIELD: {"type": "string", "default": "unknown"}
+}, [FILE_FIELD])
+
+@router.post("/api/upload", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_file_route(request: Request, upload_handler: UploadHandler = Depends(get_upload_handler)):
     try:
-        result = await upload_handler.handle_file_upload(file, fileType)
+        result = await upload_handler.handle_file_upload(request)
         return result
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"[ERROR] Error in upload route: {e}") 
-        raise HTTPException(status_code=500, detail=f"Error processing file upload: {e}")
\ No newline at end of file
+        logger.error("Error in upload route:", e)
+        raise HTTPException(status_code=500, detail=f"Error processing file upload: {e}")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+
+from schemas.payloads import VideoJobPayload
+from handlers.video_jobs import VideoJobManager
+
+router = APIRouter()
+
+def get_video_jobs(request: Request) -> VideoJobManager:
+    return request.app.state.video_jobs
+
+@router.post("/api/video-jobs", status_code=202)
+async def submit_video_job_route(payload: VideoJobPayload, video_jobs: VideoJobManager = Depends(get_video_jobs)):
+    job = await video_jobs.submit(payload.filename, payload.modelChoice)
+    return {"success": True, "job": job}
+
+@router.get("/api/video-jobs")
+async def list_video_jobs_route(video_jobs: VideoJobManager = Depends(get_video_jobs)):
+    jobs = await video_jobs.list_jobs()
+    return {"success": True, "count": len(jobs), "jobs": jobs, "stats": video_jobs.stats()}
+
+@router.get("/api/video-jobs/{job_id}")
+async def get_video_job_route(job_id: str, video_jobs: VideoJobManager = Depends(get_video_jobs)):
+    return {"success": True, "job": await video_jobs.get(job_id)}
+
+@router.get("/api/video-jobs/{job_id}/result")
+async def get_video_job_result_route(job_id: str, video_jobs: VideoJobManager = Depends(get_video_jobs)):
+    job = await video_jobs.get(job_id, include_transcript=True)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Video job is {job['status']}; no result available.")
+    return {"success": True, "job": job}
+
+@router.post("/api/video-jobs/{job_id}/cancel")
+async def cancel_video_job_route(job_id: str, video_jobs: VideoJobManager = Depends(get_video_jobs)):
+    return {"success": True, "job": await video_jobs.cancel(job_id)}
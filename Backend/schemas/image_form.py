@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, status
+
+from config import Config
+from schemas.multipart_stream import PART_BEGIN, PART_DATA, form_request_body, stream_form
+
+IMAGE_FIELD = "files"
+
+class ImagePart:
+    """One uploaded image, held in memory."""
+
+    def __init__(self, filename: Optional[str], content_type: Optional[str]):
+        self.filename = filename
+        self.content_type = content_type
+        self.data = bytearray()
+        self.too_large = False
+
+async def read_image_form(request: Request, max_parts: int = Config.MAX_IMAGE_BATCH_ITEMS,
+                          max_part_bytes: int = Config.MAX_IMAGE_SIZE_BYTES) -> List[ImagePart]:
+    """Reads the ``files`` parts of a multipart request body into memory as it streams in.
+
+    Starlette's form parser spools every file part over 1 MB to a temporary
+    file; here each part goes into a bytearray instead. A part stops growing
+    once it passes ``max_part_bytes`` and is reported as too large, and the
+    request fails with 413 as soon as it carries more than ``max_parts``
+    images. Other form fields are ignored.
+    """
+    parts: List[ImagePart] = []
+    current: Optional[ImagePart] = None
+    async for event, value in stream_form(request):
+        if event == PART_BEGIN:
+            current = None
+            if value.name != IMAGE_FIELD:
+                continue
+            if len(parts) >= max_parts:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Too many images. Max is {max_parts} per request."
+                )
+            current = ImagePart(value.filename, value.content_type)
+            parts.append(current)
+        elif event == PART_DATA and current is not None and not current.too_large:
+            if len(current.data) + len(value) > max_part_bytes:
+                current.too_large = True
+                current.data = bytearray()
+            else:
+                current.data += value
+    return parts
+
+def image_form_request_body() -> dict:
+    """OpenAPI ``openapi_extra`` for a multipart body of image files."""
+    return form_request_body(
+        {IMAGE_FIELD: {"type": "array", "items": {"type": "string", "format": "binary"}}}, [IMAGE_FIELD]
+    )
@@ -0,0 +1,133 @@
+import struct
+from typing import Optional, Type, TypeVar
+
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+import profiling
+
+LANDMARK_CONTENT_TYPE = "application/vnd.artisign.landmarks"
+
+# Little-endian header: magic, version, dtype code, frame count, features per frame.
+# int16 payloads carry an extra float32 dequantization scale right after it.
+HEADER = struct.Struct("<2sBBHH")
+SCALE = struct.Struct("<f")
+MAGIC = b"AL"
+VERSION = 1
+DTYPE_FLOAT32 = 0
+DTYPE_INT16 = 1
+
+PayloadT = TypeVar("PayloadT", bound=BaseModel)
+
+def encode_landmarks(frames: np.ndarray, dtype: str = "float32") -> bytes:
+    """Encodes a (frames, features) array, or a single frame, into the binary wire format."""
+    frames = np.asarray(frames, dtype=np.float32)
+    if frames.ndim == 1:
+        frames = frames[np.newaxis]
+    if frames.ndim != 2:
+        raise ValueError(f"Expected a 1-D frame or 2-D frame sequence, got shape {frames.shape}.")
+
+    num_frames, num_features = frames.shape
+    if dtype == "float32":
+        header = HEADER.pack(MAGIC, VERSION, DTYPE_FLOAT32, num_frames, num_features)
+        return header + frames.astype("<f4", copy=False).tobytes()
+    if dtype == "int16":
+        peak = float(np.abs(frames).max()) if frames.size else 0.0
+        scale = peak / 32767.0 if peak > 0 else 1.0
+        quantized = np.round(frames / scale).astype("<i2")
+        header = HEADER.pack(MAGIC, VERSION, DTYPE_INT16, num_frames, num_features)
+        return header + SCALE.pack(scale) + quantized.tobytes()
+    raise ValueError(f"Unsupported landmark encoding dtype: {dtype}")
+
+def decode_landmarks(body: bytes) -> np.ndarray:
+    """Decodes a binary landmark message into a float32 array of shape (frames, features).
+
+    float32 payloads are returned as a read-only view over ``body`` without copying.
+    """
+    if len(body) < HEADER.size:
+        raise ValueError("Landmark message is shorter than its header.")
+
+    magic, version, dtype_code, num_frames, num_features = HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unrecognized landmark message header.")
+
+    offset = HEADER.size
+    count = num_frames * num_features
+    if dtype_code == DTYPE_FLOAT32:
+        expected = offset + count * 4
+        if len(body) != expected:
+            raise ValueError(f"Landmark message length mismatch. Expected {expected} bytes, got {len(body)}.")
+        frames = np.frombuffer(body, dtype="<f4", count=count, offset=offset)
+    elif dtype_code == DTYPE_INT16:
+        expected = offset + SCALE.size + count * 2
+        if len(body) != expected:
+            raise ValueError(f"Landmark message length mismatch. Expected {expected} bytes, got {len(body)}.")
+        (scale,) = SCALE.unpack_from(body, offset)
+        if not np.isfinite(scale) or scale <= 0:
+            raise ValueError(f"Invalid int16 dequantization scale: {scale}. Must be finite and positive.")
+        quantized = np.frombuffer(body, dtype="<i2", count=count, offset=offset + SCALE.size)
+        frames = quantized.astype(np.float32) * np.float32(scale)
+    else:
+        raise ValueError(f"Unsupported landmark dtype code: {dtype_code}")
+
+    return frames.reshape(num_frames, num_features)
+
+def is_binary_landmark_request(request: Request) -> bool:
+    content_type = request.headers.get("content-type", "")
+    return content_type.split(";")[0].strip().lower() == LANDMARK_CONTENT_TYPE
+
+def landmark_request_body(payload_model: Type[BaseModel]) -> dict:
+    """OpenAPI ``openapi_extra`` documenting both the JSON and binary request bodies."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": payload_model.model_json_schema()},
+                LANDMARK_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}
+            }
+        }
+    }
+
+async def parse_landmark_request(request: Request, payload_model: Type[PayloadT], field: str,
+                                 single_frame: bool = False) -> PayloadT:
+    """Builds ``payload_model`` from either a JSON body or a binary landmark body.
+
+    Binary bodies are decoded straight into a NumPy array stored on ``field``,
+    skipping per-element pydantic validation. ``sessionId`` comes from the
+    query string or the ``X-Session-Id`` header for realtime payloads, and
+    other optional fields such as ``modelChoice`` from the query string.
+    """
+    with profiling.stage("read_body"):
+        body = await request.body()
+
+    binary = is_binary_landmark_request(request)
+    with profiling.stage("parse", binary=binary):
+        if not binary:
+            try:
+                return payload_model.model_validate_json(body)
+            except ValidationError as e:
+                raise RequestValidationError(e.errors(include_url=False))
+
+        try:
+            frames = decode_landmarks(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if single_frame:
+            if frames.shape[0] != 1:
+                raise HTTPException(status_code=400, detail=f"Expected a single landmark frame, got {frames.shape[0]}.")
+            frames = frames[0]
+
+        values = {field: frames}
+        if "sessionId" in payload_model.model_fields:
+            session_id: Optional[str] = request.query_params.get("sessionId") or request.headers.get("x-session-id")
+            if not session_id:
+                raise HTTPException(status_code=400, detail="sessionId query parameter or X-Session-Id header is required.")
+            values["sessionId"] = session_id
+        for name in payload_model.model_fields:
+            if name not in values and name in request.query_params:
+                values[name] = request.query_params[name]
+
+        return payload_model.model_construct(**values)
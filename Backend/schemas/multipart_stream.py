@@ -0,0 +1,108 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+PART_BEGIN = "begin"
+PART_DATA = "data"
+PART_END = "end"
+
+class FormPart:
+    """Name, filename and content type of one multipart part, known once its headers are in."""
+    __slots__ = ("name", "filename", "content_type")
+
+    def __init__(self, name: str, filename: Optional[str], content_type: Optional[str]):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+
+class _FormEvents:
+    """python-multipart callbacks that queue part events for ``stream_form`` to hand out."""
+
+    def __init__(self):
+        self.events: List[Tuple[str, Any]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        content_type = self._headers.get(b"content-type")
+        self.events.append((PART_BEGIN, FormPart(
+            options.get(b"name", b"").decode("utf-8", errors="replace"),
+            filename.decode("utf-8", errors="replace") if filename is not None else None,
+            content_type.decode("latin-1") if content_type is not None else None
+        )))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        self.events.append((PART_DATA, data[start:end]))
+
+    def on_part_end(self):
+        self.events.append((PART_END, None))
+
+async def stream_form(request: Request) -> AsyncIterator[Tuple[str, Any]]:
+    """Parses a multipart/form-data body as it is received, yielding part events.
+
+    Yields ``(PART_BEGIN, FormPart)``, then ``(PART_DATA, bytes)`` for each
+    piece of the part's body, then ``(PART_END, None)``. Unlike Starlette's
+    form parser nothing is buffered or spooled to disk, so the caller decides
+    where each part's bytes go.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body.")
+
+    form = _FormEvents()
+    parser = MultipartParser(boundary, form.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event in form.events:
+                yield event
+            form.events.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid multipart body: {e}")
+    for event in form.events:
+        yield event
+
+def form_request_body(properties: Dict[str, dict], required: List[str]) -> dict:
+    """OpenAPI ``openapi_extra`` for a multipart/form-data body read with ``stream_form``."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {"type": "object", "required": required, "properties": properties}
+                }
+            }
+        }
+    }
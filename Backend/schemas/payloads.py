@@ -2,15 +2,33 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from config import Config
 
+# Landmark payloads may also be sent in the binary format from schemas.landmark_codec,
+# in which case their landmark fields hold float32 NumPy arrays instead of lists.
+
 class LandmarkPayload(BaseModel):
     landmarks: List[float] = Field(..., description=f"Flattened array of {Config.NUM_LANDMARK_FEATURES} hand landmarks (x, y, z for each of 21 points).")
 
 class DynamicSignPayload(BaseModel):
     landmarkSequence: List[List[float]] = Field(..., description=f"Array of landmark arrays, each representing a frame. Expected inner array length: {Config.NUM_LANDMARK_FEATURES}.")
+    modelChoice: Optional[str] = Field(None, description="Name of the dynamic model to use (see /api/models). Defaults to the manifest's default dynamic model.")
+
+class StaticSignBatchPayload(BaseModel):
+    landmarks: List[List[float]] = Field(..., max_length=Config.MAX_PREDICTION_BATCH_ITEMS, description=f"Array of flattened hand landmark arrays, each of length {Config.NUM_LANDMARK_FEATURES}. Invalid items are reported individually.")
+
+class DynamicSignBatchPayload(BaseModel):
+    landmarkSequences: List[List[List[float]]] = Field(..., max_length=Config.MAX_PREDICTION_BATCH_ITEMS, description=f"Array of landmark sequences, each an array of frames. Expected inner array length: {Config.NUM_LANDMARK_FEATURES}.")
+    modelChoice: Optional[str] = Field(None, description="Name of the dynamic model to use (see /api/models). Defaults to the manifest's default dynamic model.")
 
 class TextToSignPayload(BaseModel):
     text: str = Field(..., min_length=1, description="Text to convert to sign language representation.")
 
+class TextToSignBulkPayload(BaseModel):
+    texts: List[str] = Field(..., max_length=Config.MAX_TEXT_TO_SIGN_BULK_ITEMS, description="Texts to convert. Each is split into sentences and streamed back as NDJSON, one line per sentence.")
+
+class VideoJobPayload(BaseModel):
+    filename: str = Field(..., description="Name of a video previously uploaded through /api/upload.")
+    modelChoice: Optional[str] = Field(None, description="Name of the dynamic model to use. Defaults to the manifest's default dynamic model.")
+
 class CreateSessionPayload(BaseModel):
     userId: Optional[str] = Field(None, description="Optional user ID to associate with the session.")
 
@@ -28,4 +46,11 @@ class RealtimeLandmarkSequencePayload(BaseModel):
 class CorrectionPayload(BaseModel):
     sessionId: str = Field(..., description="The ID of the real-time session.")
     correctionType: str = Field(..., description="Type of correction: 'letter', 'word', 'clearWord', 'clearText'.")
-    correction: str = Field(..., description="The correction value (e.g., corrected letter/word) or empty string for clear operations.")
\ No newline at end of file
+    correction: str = Field(..., description="The correction value (e.g., corrected letter/word) or empty string for clear operations.")
+
+class ActivateModelPayload(BaseModel):
+    version: str = Field(..., description="Manifest version of the model to load and switch traffic to.")
+
+class ProfileSessionPayload(BaseModel):
+    cprofile: bool = Field(False, description="Also capture a cProfile dump for each traced message.")
+    ttlSeconds: float = Field(Config.PROFILING_SESSION_TTL_SECONDS, gt=0, description="Seconds until profiling switches off again.")
@@ -0,0 +1,35 @@
+import asyncio
+import inspect
+
+import pytest
+
+from handlers.model_handler import ModelHandler
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Runs ``async def`` tests in a fresh event loop."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
+
+@pytest.fixture
+def static_model_handler():
+    """Returns a coroutine that loads the shipped static model into a new ModelHandler.
+
+    Only the static model is loaded, through the NumPy engine, so TensorFlow
+    is not needed. Call it inside the test's event loop and shut it down there.
+    """
+    pytest.importorskip("h5py")
+
+    async def load(**attributes) -> ModelHandler:
+        handler = ModelHandler()
+        for name, value in attributes.items():
+            setattr(handler, name, value)
+        handler.registry.load_manifest()
+        await handler.registry.get(task="static")
+        handler.models_loaded = True
+        return handler
+
+    return load
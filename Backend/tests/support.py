@@ -0,0 +1,35 @@
+import numpy as np
+from fastapi import Request
+
+from config import Config
+
+BOUNDARY = "artisign-test-boundary"
+
+def random_poses(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((count, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+
+
+def multipart_body(parts) -> bytes:
+    """Encodes ``(name, filename, content_type, data)`` parts as a multipart/form-data body."""
+    body = b""
+    for name, filename, content_type, data in parts:
+        body += f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"".encode()
+        if filename is not None:
+            body += f"; filename=\"{filename}\"".encode()
+        body += b"\r\n"
+        if content_type is not None:
+            body += f"Content-Type: {content_type}\r\n".encode()
+        body += b"\r\n" + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+def streamed_request(body: bytes, path: str = "/", chunk_size: int = 7,
+                     content_type: str = f"multipart/form-data; boundary={BOUNDARY}") -> Request:
+    """A POST request whose body arrives in ``chunk_size`` pieces."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    scope = {"type": "http", "method": "POST", "path": path, "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from config import Config
+from handlers.inference_engines import softmax
+from handlers.model_handler import ModelHandler
+from handlers.model_registry import LoadedModel
+from tests.support import random_poses
+
+NUM_CLASSES = 4
+
+def mean_engine(batch: np.ndarray):
+    """Stand-in dynamic model: class scores from the mean of the first features."""
+    scores = batch.mean(axis=1)[:, :NUM_CLASSES]
+    probabilities = softmax(scores.astype(np.float32))
+    return probabilities, probabilities.argmax(axis=-1)
+
+def dynamic_handler() -> ModelHandler:
+    handler = ModelHandler()
+    model = LoadedModel("stub", "1", "dynamic", mean_engine, {i: f"w{i}" for i in range(NUM_CLASSES)},
+                        (Config.NUM_FRAMES_VIDEO, Config.NUM_LANDMARK_FEATURES), "stub.h5")
+
+    async def get(name=None, task=None):
+        return model
+
+    handler.registry.get = get
+    handler.models_loaded = True
+    return handler
+
+def sequence(seed: int, frames: int = Config.NUM_FRAMES_VIDEO):
+    return np.random.default_rng(seed).random((frames, Config.NUM_LANDMARK_FEATURES)).tolist()
+
+async def test_dynamic_batch_reports_malformed_items_individually():
+    handler = dynamic_handler()
+    try:
+        good, short = sequence(0), sequence(1, frames=12)
+        malformed = [[[0.1, 0.2]]] * 3
+        results = await handler.predict_dynamic_sign_batch([good, malformed, [], short])
+
+        assert [result["success"] for result in results] == [True, False, False, True]
+        assert results[1]["error"].startswith("Invalid landmark sequence")
+        assert results[2]["error"] == "Landmark sequence is empty."
+        for position, item in ((0, good), (3, short)):
+            expected = mean_engine(handler.preprocessor.sequence(item)[np.newaxis])
+            assert results[position]["result"]["index"] == int(expected[1][0])
+            assert abs(results[position]["result"]["confidence"] - float(expected[0][0].max())) < 1e-6
+    finally:
+        await handler.shutdown()
+
+async def test_dynamic_batch_of_only_malformed_items_does_not_run_the_model():
+    handler = dynamic_handler()
+    calls = []
+
+    async def run_bulk(model, inputs):
+        calls.append(inputs)
+
+    handler._run_bulk = run_bulk
+    try:
+        results = await handler.predict_dynamic_sign_batch([[[[1.0]]], [[[2.0]]]])
+        assert [result["success"] for result in results] == [False, False]
+        assert calls == []
+    finally:
+        await handler.shutdown()
+
+async def test_static_batch_reports_bad_items_individually(static_model_handler):
+    handler = await static_model_handler(static_cache=None)
+    try:
+        good = random_poses(2, seed=5)
+        nan_pose = good[0].copy()
+        nan_pose[4] = np.nan
+        results = await handler.predict_static_sign_batch([good[0].tolist(), [0.1] * 10, nan_pose.tolist(), good[1].tolist()])
+        assert [result["success"] for result in results] == [True, False, False, True]
+        assert "Invalid landmark array length" in results[1]["error"]
+        assert "NaN" in results[2]["error"]
+        assert results[3]["result"] == await handler.predict_static_sign(good[1])
+    finally:
+        await handler.shutdown()
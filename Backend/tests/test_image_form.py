@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+
+from schemas.image_form import read_image_form
+from tests.support import multipart_body, streamed_request
+
+async def test_image_parts_are_collected_in_memory_across_chunk_boundaries():
+    body = multipart_body([
+        ("files", "a.png", "image/png", b"\x89PNG" + bytes(range(256)) * 3),
+        ("note", None, None, b"ignored"),
+        ("files", "b.jpg", "image/jpeg", b"\xff\xd8\xff" + b"jpeg-data"),
+    ])
+    parts = await read_image_form(streamed_request(body), max_parts=4, max_part_bytes=1024)
+    assert [(part.filename, part.content_type) for part in parts] == [("a.png", "image/png"), ("b.jpg", "image/jpeg")]
+    assert bytes(parts[0].data) == b"\x89PNG" + bytes(range(256)) * 3
+    assert bytes(parts[1].data) == b"\xff\xd8\xff" + b"jpeg-data"
+    assert not any(part.too_large for part in parts)
+
+async def test_oversized_part_is_flagged_without_failing_the_others():
+    body = multipart_body([
+        ("files", "big.png", "image/png", b"x" * 200),
+        ("files", "small.png", "image/png", b"y" * 10),
+    ])
+    big, small = await read_image_form(streamed_request(body), max_parts=4, max_part_bytes=100)
+    assert big.too_large and len(big.data) == 0
+    assert not small.too_large and bytes(small.data) == b"y" * 10
+
+async def test_too_many_images_is_413():
+    body = multipart_body([("files", f"{i}.png", "image/png", b"p") for i in range(3)])
+    with pytest.raises(HTTPException) as error:
+        await read_image_form(streamed_request(body), max_parts=2, max_part_bytes=100)
+    assert error.value.status_code == 413
+
+async def test_non_multipart_body_is_400():
+    with pytest.raises(HTTPException) as error:
+        await read_image_form(streamed_request(b"{}", content_type="application/json"))
+    assert error.value.status_code == 400
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from handlers.image_sign_handler import ImageSignHandler
+from schemas.image_form import ImagePart
+
+class FailingModelHandler:
+    """Rejects the second image it sees the way predict_static_sign does when the model is unavailable."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def predict_static_sign(self, landmarks):
+        self.calls += 1
+        if self.calls == 2:
+            raise HTTPException(status_code=503, detail="Static model is not loaded.")
+        return {"class": "A", "confidence": 0.1, "index": 0}
+
+def image_handler(model_handler) -> ImageSignHandler:
+    handler = ImageSignHandler.__new__(ImageSignHandler)
+    handler.model_handler = model_handler
+    handler.executor = ThreadPoolExecutor(max_workers=1)
+    handler._detect = lambda data: (np.zeros(63, dtype=np.float32), {"decodeMs": 0.0, "landmarksMs": 0.0})
+    return handler
+
+def image(name: str) -> ImagePart:
+    part = ImagePart(name, "image/png")
+    part.data += b"png"
+    return part
+
+async def test_http_errors_are_recorded_on_the_image_that_raised_them():
+    handler = image_handler(FailingModelHandler())
+    try:
+        results = await handler.predict_images([image("a.png"), image("b.png"), image("c.png")])
+    finally:
+        handler.executor.shutdown()
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["error"] == "Static model is not loaded."
+
+async def test_oversized_and_wrong_type_images_fail_individually():
+    handler = image_handler(FailingModelHandler())
+    too_large = image("big.png")
+    too_large.too_large = True
+    text = ImagePart("notes.txt", "text/plain")
+    try:
+        results = await handler.predict_images([too_large, text])
+    finally:
+        handler.executor.shutdown()
+    assert "too large" in results[0]["error"]
+    assert "Invalid file type" in results[1]["error"]
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from handlers.model_handler import InferenceBatcher
+
+def doubling_batcher(**options):
+    calls = []
+
+    def run_batch(batch):
+        calls.append(len(batch))
+        return batch * 2, batch.sum(axis=1)
+
+    return InferenceBatcher("double", run_batch, **options), calls
+
+def rows(count: int):
+    return [np.full(3, i, dtype=np.float32) for i in range(count)]
+
+async def test_concurrent_requests_share_a_forward_pass_and_get_their_own_rows():
+    batcher, calls = doubling_batcher(max_batch_size=8, max_wait_ms=20)
+    try:
+        results = await asyncio.gather(*(batcher.submit(row) for row in rows(5)))
+        assert calls == [5]
+        for i, (doubled, total) in enumerate(results):
+            np.testing.assert_array_equal(doubled, np.full(3, 2 * i))
+            assert total == 3 * i
+    finally:
+        await batcher.close()
+
+async def test_batches_are_capped_at_max_batch_size():
+    batcher, calls = doubling_batcher(max_batch_size=4, max_wait_ms=20)
+    try:
+        await asyncio.gather(*(batcher.submit(row) for row in rows(10)))
+        assert sorted(calls, reverse=True) == [4, 4, 2]
+    finally:
+        await batcher.close()
+
+async def test_a_failing_forward_pass_fails_every_request_in_the_batch():
+    def run_batch(batch):
+        raise RuntimeError("model exploded")
+
+    batcher = InferenceBatcher("broken", run_batch, max_wait_ms=20)
+    try:
+        results = await asyncio.gather(*(batcher.submit(row) for row in rows(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+    finally:
+        await batcher.close()
+
+async def test_full_queue_is_503():
+    batcher, _ = doubling_batcher(concurrency=asyncio.Semaphore(0), max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+    # The worker holds the first request, waiting for a free slot; the next two fill the queue.
+    waiting = [asyncio.create_task(batcher.submit(rows(1)[0]))]
+    await asyncio.sleep(0.01)
+    waiting += [asyncio.create_task(batcher.submit(row)) for row in rows(2)]
+    await asyncio.sleep(0.01)
+    assert batcher.queue_depth == 2
+    with pytest.raises(HTTPException) as error:
+        await batcher.submit(rows(1)[0])
+    assert error.value.status_code == 503
+    await asyncio.wait_for(batcher.close(), 1)
+    await asyncio.gather(*waiting, return_exceptions=True)
+
+async def test_close_fails_unanswered_requests_with_503_and_refuses_new_ones():
+    batcher, calls = doubling_batcher(concurrency=asyncio.Semaphore(0), max_wait_ms=0)
+    waiting = [asyncio.create_task(batcher.submit(row)) for row in rows(3)]
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(batcher.close(), 1)
+
+    results = await asyncio.gather(*waiting, return_exceptions=True)
+    assert [result.status_code for result in results] == [503] * 3
+    assert calls == []
+    with pytest.raises(HTTPException) as error:
+        await batcher.submit(rows(1)[0])
+    assert error.value.status_code == 503
+
+async def test_close_lets_a_running_batch_finish():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_run_batch(batch):
+        started.set()
+        release.wait(5)
+        return (batch,)
+
+    batcher = InferenceBatcher("slow", slow_run_batch, max_wait_ms=0)
+    request = asyncio.create_task(batcher.submit(rows(1)[0]))
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+    closing = asyncio.create_task(batcher.close())
+    await asyncio.sleep(0.01)
+    assert not closing.done()
+    release.set()
+    await asyncio.wait_for(closing, 5)
+    np.testing.assert_array_equal((await request)[0], rows(1)[0])
+
+async def test_drain_answers_submitted_requests_before_stopping():
+    batcher, _ = doubling_batcher(max_wait_ms=10)
+    waiting = [asyncio.create_task(batcher.submit(row)) for row in rows(4)]
+    await asyncio.sleep(0)
+    await asyncio.wait_for(batcher.drain(), 5)
+    assert all(not isinstance(result, Exception) for result in await asyncio.gather(*waiting, return_exceptions=True))
+    with pytest.raises(HTTPException):
+        await batcher.submit(rows(1)[0])
@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pytest
+from fastapi import HTTPException, Request
+
+from schemas.landmark_codec import (HEADER, LANDMARK_CONTENT_TYPE, SCALE, decode_landmarks, encode_landmarks,
+                                    parse_landmark_request)
+from schemas.payloads import DynamicSignPayload
+
+def frames(count: int = 5, features: int = 126, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-1, 1, (count, features)).astype(np.float32)
+
+def test_float32_round_trip_is_exact():
+    original = frames()
+    decoded = decode_landmarks(encode_landmarks(original))
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, original)
+
+def test_single_frame_encodes_as_one_row():
+    original = frames(1)[0]
+    assert decode_landmarks(encode_landmarks(original)).shape == (1, original.size)
+
+def test_int16_round_trip_is_within_half_a_quantization_step():
+    original = frames()
+    body = encode_landmarks(original, dtype="int16")
+    (scale,) = SCALE.unpack_from(body, HEADER.size)
+    decoded = decode_landmarks(body)
+    assert np.abs(decoded - original).max() <= scale / 2 + 1e-7
+
+def test_float32_decode_does_not_copy():
+    body = encode_landmarks(frames())
+    decoded = decode_landmarks(body)
+    assert not decoded.flags.writeable
+    assert np.shares_memory(decoded, np.frombuffer(body, dtype=np.uint8))
+
+def with_scale(body: bytes, scale: float) -> bytes:
+    return body[:HEADER.size] + SCALE.pack(scale) + body[HEADER.size + SCALE.size:]
+
+@pytest.mark.parametrize("scale", [math.nan, math.inf, -math.inf, 0.0, -0.5])
+def test_non_finite_or_non_positive_scales_are_rejected(scale):
+    body = with_scale(encode_landmarks(frames(), dtype="int16"), scale)
+    with pytest.raises(ValueError, match="scale"):
+        decode_landmarks(body)
+
+@pytest.mark.parametrize("body", [
+    b"AL",
+    b"XX" + encode_landmarks(frames())[2:],
+    encode_landmarks(frames())[:-1],
+    encode_landmarks(frames(), dtype="int16") + b"\x00",
+])
+def test_malformed_messages_are_rejected(body):
+    with pytest.raises(ValueError):
+        decode_landmarks(body)
+
+def binary_request(body: bytes) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {"type": "http", "method": "POST", "path": "/api/predict-dynamic-sign", "query_string": b"",
+             "headers": [(b"content-type", LANDMARK_CONTENT_TYPE.encode())]}
+    return Request(scope, receive)
+
+async def test_binary_request_with_a_bad_scale_is_400():
+    body = with_scale(encode_landmarks(frames(), dtype="int16"), math.nan)
+    with pytest.raises(HTTPException) as error:
+        await parse_landmark_request(binary_request(body), DynamicSignPayload, "landmarkSequence")
+    assert error.value.status_code == 400
+
+async def test_binary_request_builds_the_payload():
+    original = frames()
+    payload = await parse_landmark_request(binary_request(encode_landmarks(original)), DynamicSignPayload, "landmarkSequence")
+    np.testing.assert_array_equal(np.asarray(payload.landmarkSequence), original)
@@ -0,0 +1,29 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from handlers.model_handler import InferenceBatcher
+from handlers.model_registry import LoadedModel, ModelRegistry
+
+def stuck_model(version: str) -> LoadedModel:
+    """A model whose batcher queues requests but can never start a batch."""
+    model = LoadedModel("stub", version, "static", None, {0: "A"}, (2,), "stub.h5")
+    model.batcher = InferenceBatcher(f"stub v{version}", lambda batch: (batch,), concurrency=asyncio.Semaphore(0), max_wait_ms=0)
+    return model
+
+async def test_close_answers_requests_still_held_by_retiring_batchers():
+    registry = ModelRegistry("unused.json", None, build_engine=None, make_batcher=None)
+    old, new = stuck_model("1"), stuck_model("2")
+    registry._install(old)
+    pending = asyncio.create_task(old.batcher.submit(np.zeros(2, dtype=np.float32)))
+    await asyncio.sleep(0.01)
+    registry._install(new)
+    assert list(registry._retiring.values()) == [old]
+
+    await asyncio.wait_for(registry.close(), 1)
+    with pytest.raises(HTTPException) as error:
+        await asyncio.wait_for(pending, 1)
+    assert error.value.status_code == 503
+    assert registry._retiring == {}
@@ -0,0 +1,87 @@
+import numpy as np
+
+import handlers.prediction_cache as prediction_cache
+from handlers.prediction_cache import PredictionCache
+from tests.support import random_poses
+
+def test_key_is_shared_within_a_grid_cell_and_not_across():
+    cache = PredictionCache(grid_size=0.02, normalize=False)
+    pose = np.full(63, 0.5, dtype=np.float32)
+    assert cache.make_key(pose) == cache.make_key(pose + 0.004)
+    assert cache.make_key(pose) != cache.make_key(pose + 0.02)
+
+def test_large_coordinates_do_not_wrap_onto_the_same_key():
+    cache = PredictionCache(grid_size=0.02, normalize=False)
+    pose = np.full(63, 700.0, dtype=np.float32)
+    # 65536 grid cells apart: the same key once cells were truncated to int16.
+    shifted = pose + np.float32(65536 * 0.02)
+    assert cache.make_key(pose) != cache.make_key(shifted)
+
+def test_coordinates_beyond_int32_cells_are_not_cached():
+    cache = PredictionCache(grid_size=0.02, normalize=False)
+    key = cache.make_key(np.full(63, 1e30, dtype=np.float32))
+    assert key is None
+    assert cache.get(key) is None
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(capacity=2, ttl_seconds=0, normalize=False)
+    cache.put(b"a", {"class": "A"})
+    cache.put(b"b", {"class": "B"})
+    assert cache.get(b"a") == {"class": "A"}
+    cache.put(b"c", {"class": "C"})
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == {"class": "A"}
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(capacity=10, ttl_seconds=5, normalize=False)
+    cache.put(b"a", {"class": "A"})
+    now[0] += 4.9
+    assert cache.get(b"a") == {"class": "A"}
+    now[0] += 0.2
+    assert cache.get(b"a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_cached_values_are_copies():
+    cache = PredictionCache(normalize=False)
+    cache.put(b"a", {"class": "A"})
+    cache.get(b"a")["class"] = "Z"
+    assert cache.get(b"a") == {"class": "A"}
+
+async def test_hit_and_miss_paths_with_the_static_model(static_model_handler):
+    handler = await static_model_handler(static_cache=PredictionCache(capacity=100, ttl_seconds=0))
+    try:
+        first, second = random_poses(2)
+        miss = await handler.predict_static_sign(first)
+        hit = await handler.predict_static_sign(first)
+        other = await handler.predict_static_sign(second)
+        assert hit == miss
+        assert handler.static_cache.stats()["hits"] == 1
+        assert handler.static_cache.stats()["misses"] == 2
+        assert other["index"] == (await handler.predict_static_sign(second))["index"]
+    finally:
+        await handler.shutdown()
+
+async def test_cached_answers_stay_close_to_uncached_ones(static_model_handler):
+    """A pose answered from another pose's entry in the same grid cell must agree with the model."""
+    grid = 0.02
+    cache = PredictionCache(capacity=1000, ttl_seconds=0, grid_size=grid)
+    handler = await static_model_handler(static_cache=None)
+    try:
+        model = await handler.registry.get(task="static")
+        rng = np.random.default_rng(1)
+        centers = np.round(random_poses(200, seed=1) / grid) * grid
+        agree, max_drift = 0, 0.0
+        for center in centers.astype(np.float32):
+            jittered = (center + rng.uniform(-0.4 * grid, 0.4 * grid, center.shape)).astype(np.float32)
+            assert cache.make_key(center, model.normalize) == cache.make_key(jittered, model.normalize)
+            cached = await handler.predict_static_sign(center)
+            uncached = await handler.predict_static_sign(jittered)
+            agree += cached["index"] == uncached["index"]
+            max_drift = max(max_drift, abs(cached["confidence"] - uncached["confidence"]))
+        assert agree / len(centers) >= 0.95
+        assert max_drift <= 0.02
+    finally:
+        await handler.shutdown()
@@ -0,0 +1,27 @@
+import profiling
+
+def limiter_at(rate: float, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(profiling.time, "monotonic", lambda: now[0])
+    return profiling._RateLimiter(rate), now
+
+def test_fractional_rates_still_allow_traces(monkeypatch):
+    limiter, now = limiter_at(0.2, monkeypatch)
+    assert limiter.allow()
+    assert not limiter.allow()
+    now[0] += 4.9
+    assert not limiter.allow()
+    now[0] += 0.2
+    assert limiter.allow()
+    assert limiter.rejected == 2
+
+def test_whole_rates_allow_a_burst_of_one_second(monkeypatch):
+    limiter, now = limiter_at(5, monkeypatch)
+    assert [limiter.allow() for _ in range(6)] == [True] * 5 + [False]
+    now[0] += 0.2
+    assert limiter.allow()
+
+def test_zero_rate_turns_tracing_off(monkeypatch):
+    limiter, now = limiter_at(0, monkeypatch)
+    now[0] += 3600
+    assert not limiter.allow()
@@ -0,0 +1,156 @@
+import asyncio
+import random
+
+import pytest
+
+import metrics
+from handlers import realtime_handler
+from handlers.session_state import SessionState
+from handlers.session_store import InMemorySessionStore, RedisSessionStore, SessionLockTimeout
+from routes.metrics import refresh_session_gauges
+
+def session(session_id: str, last_activity: float) -> SessionState:
+    state = SessionState(session_id)
+    state.last_activity = last_activity
+    return state
+
+async def test_cleanup_expires_by_last_activity_whatever_the_create_order():
+    store = InMemorySessionStore(timeout_ms=100, max_sessions=0, max_bytes=0)
+    for session_id, last_activity in (("c", 3000), ("a", 1000), ("d", 4000), ("b", 2000)):
+        await store.create(session(session_id, last_activity))
+    assert store.next_expiry_ms() == 1100
+    assert await store.cleanup(now_ms=2150) == ["a", "b"]
+    assert store.next_expiry_ms() == 3100
+    assert await store.cleanup(now_ms=10_000) == ["c", "d"]
+    assert store.next_expiry_ms() is None
+    assert store.expired_total == 4
+
+async def test_touched_sessions_move_behind_the_others():
+    store = InMemorySessionStore(timeout_ms=100, max_sessions=0, max_bytes=0)
+    for session_id, last_activity in (("a", 1000), ("b", 2000)):
+        await store.create(session(session_id, last_activity))
+    store.sessions["a"].last_activity = 5000
+    assert store.next_expiry_ms() == 2100
+    assert await store.cleanup(now_ms=3000) == ["b"]
+    assert list(store.sessions) == ["a"]
+
+async def test_capacity_evicts_the_least_recently_active():
+    store = InMemorySessionStore(timeout_ms=10_000, max_sessions=2, max_bytes=0)
+    removed = []
+    store.on_remove = lambda session_id, reason: removed.append((session_id, reason))
+    await store.create(session("a", 1000))
+    await store.create(session("b", 2000))
+    store.sessions["a"].last_activity = 3000
+    await store.create(session("c", 2500))
+    assert removed == [("b", "capacity")]
+    assert sorted(store.sessions) == ["a", "c"]
+    assert store.evicted_capacity_total == 1
+
+async def test_deadline_heap_stays_bounded_under_churn():
+    store = InMemorySessionStore(timeout_ms=10_000, max_sessions=50, max_bytes=0)
+    rng = random.Random(0)
+    for i in range(5000):
+        await store.create(session(f"s{i}", rng.uniform(0, 1_000_000)))
+        if i % 3 == 0:
+            await store.delete(f"s{rng.randrange(i + 1)}")
+    assert len(store.sessions) <= 50
+    assert len(store.deadlines) <= 2 * len(store.sessions) + 65
+    expected = min(state.last_activity for state in store.sessions.values())
+    assert store.next_expiry_ms() == expected + 10_000
+
+async def test_removal_counters_are_exported_as_metrics(monkeypatch):
+    store = InMemorySessionStore(timeout_ms=100, max_sessions=1, max_bytes=0)
+    await store.create(session("a", 1000))
+    await store.create(session("b", 2000))
+    await store.cleanup(now_ms=5000)
+    monkeypatch.setattr(realtime_handler, "session_store", store)
+    await refresh_session_gauges()
+    rendered = metrics.render()
+    assert 'artisign_realtime_sessions_removed_total{reason="expired"} 1' in rendered
+    assert 'artisign_realtime_sessions_removed_total{reason="capacity"} 1' in rendered
+    assert 'artisign_realtime_sessions_removed_total{reason="memory"} 0' in rendered
+
+async def increment(store, session_id: str, active: list):
+    async with store.lock(session_id):
+        active.append(session_id)
+        assert len(active) == 1, "two cycles on one session overlapped"
+        state = await store.get(session_id)
+        await asyncio.sleep(0.001)
+        state.static_inferences += 1
+        await store.save(state)
+        active.remove(session_id)
+
+async def test_lock_serializes_read_modify_write_cycles():
+    store = InMemorySessionStore(timeout_ms=60_000, max_sessions=0, max_bytes=0)
+    await store.create(SessionState("s"))
+    active = []
+    await asyncio.gather(*(increment(store, "s", active) for _ in range(20)))
+    assert (await store.get("s")).static_inferences == 20
+    assert store._locks == {}
+
+async def test_lock_wait_times_out():
+    store = InMemorySessionStore()
+    async with store.lock("s"):
+        with pytest.raises(SessionLockTimeout):
+            async with store.lock("s", wait_seconds=0.01):
+                pass
+    async with store.lock("s", wait_seconds=0.01):
+        pass
+
+async def test_saving_a_deleted_session_does_not_bring_it_back():
+    store = InMemorySessionStore()
+    await store.create(SessionState("s"))
+    state = await store.get("s")
+    await store.delete("s")
+    await store.save(state)
+    assert await store.get("s") is None
+    assert await store.count() == 0
+
+@pytest.fixture
+def redis_stores():
+    """Two stores on one fake server, standing in for two workers."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from fakeredis import aioredis
+
+    server = fakeredis.FakeServer()
+    return [RedisSessionStore(aioredis.FakeRedis(server=server), prefix="test:", timeout_ms=60_000, max_sessions=3)
+            for _ in range(2)]
+
+async def test_redis_lock_serializes_across_workers(redis_stores):
+    first, second = redis_stores
+    await first.create(SessionState("s"))
+    active = []
+    await asyncio.gather(*(increment(store, "s", active) for store in redis_stores for _ in range(5)))
+    assert (await second.get("s")).static_inferences == 10
+
+async def test_redis_lock_held_by_another_worker_times_out(redis_stores):
+    first, second = redis_stores
+    async with first.lock("s"):
+        with pytest.raises(SessionLockTimeout):
+            async with second.lock("s", wait_seconds=0.02):
+                pass
+    async with second.lock("s", wait_seconds=0.02):
+        pass
+
+async def test_redis_session_round_trips_and_is_not_resurrected(redis_stores):
+    first, second = redis_stores
+    state = SessionState("s", "user")
+    state.full_text = "HALO"
+    await first.create(state)
+    loaded = await second.get("s")
+    assert (loaded.user_id, loaded.full_text) == ("user", "HALO")
+
+    await first.delete("s")
+    await second.save(loaded)
+    assert await first.get("s") is None
+    assert await first.count() == 0
+
+async def test_redis_cleanup_and_capacity(redis_stores):
+    store, _ = redis_stores
+    for i in range(4):
+        await store.create(session(f"s{i}", 1000 + i))
+    assert store.evicted_capacity_total == 1
+    assert await store.get("s0", touch=False) is None
+    assert sorted(await store.cleanup(now_ms=1002 + store.timeout_ms)) == ["s1", "s2"]
+    assert await store.count() == 1
+    assert store.expired_total == 2
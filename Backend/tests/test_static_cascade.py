@@ -0,0 +1,110 @@
+import numpy as np
+
+from config import Config
+from handlers.inference_engines import softmax
+from handlers.static_cascade import CentroidCascade
+from tests.support import random_poses
+
+def two_class_cascade(min_margin: float = 0.5) -> CentroidCascade:
+    rng = np.random.default_rng(0)
+    left = rng.normal(0.3, 0.01, (50, 63)).astype(np.float32)
+    right = rng.normal(0.7, 0.01, (50, 63)).astype(np.float32)
+    left[:, 3:6] += 0.2
+    right[:, 6:9] += 0.2
+    return CentroidCascade.fit(np.concatenate([left, right]), np.array([0] * 50 + [1] * 50), min_margin=min_margin)
+
+def test_frames_near_a_centroid_are_answered_and_ambiguous_ones_escalated():
+    cascade = two_class_cascade()
+    near = cascade.centroids.copy()
+    midway = cascade.centroids.mean(axis=0, keepdims=True)
+    # Centroids are in normalized space, which is a fixed point of normalize_landmarks.
+    _, indices, answered, margins = cascade.predict(np.concatenate([near, midway]))
+    assert answered.tolist() == [True, True, False]
+    assert indices[:2].tolist() == [0, 1]
+    assert margins[2] < cascade.min_margin <= margins[:2].min()
+
+def test_confidence_is_on_the_model_output_scale():
+    num_classes = 26
+    cascade = two_class_cascade()
+    cascade = CentroidCascade(cascade.centroids, cascade.classes, cascade.temperature, num_classes=num_classes)
+    probabilities, indices, answered, _ = cascade.predict(cascade.centroids)
+    assert answered.all()
+    # The engines' extra softmax over a one-hot output is the highest confidence the full model can give.
+    ceiling = softmax(np.eye(num_classes, dtype=np.float32)[0])[0]
+    confidences = probabilities[np.arange(len(indices)), indices]
+    assert probabilities.shape == (2, num_classes)
+    assert np.all(confidences <= ceiling + 1e-6)
+    assert np.all(confidences > ceiling * 0.9)
+
+def test_save_and_load_keep_the_output_width(tmp_path):
+    cascade = two_class_cascade()
+    cascade = CentroidCascade(cascade.centroids, cascade.classes, cascade.temperature, num_classes=10)
+    cascade.save(str(tmp_path / "cascade.npz"))
+    loaded = CentroidCascade.load(str(tmp_path / "cascade.npz"))
+    assert loaded.num_classes == 10
+    np.testing.assert_allclose(loaded.predict(cascade.centroids)[0], cascade.predict(cascade.centroids)[0])
+
+async def attach_fitted_cascade(handler, poses):
+    """Fits a cascade on the model's own labels, with the median margin as threshold."""
+    model = await handler.registry.get(task="static")
+    batch, _ = handler.preprocessor.static_batch(poses, model.normalize)
+    labels = np.asarray(model.engine(batch)[1])
+    cascade = CentroidCascade.fit(poses, labels, num_classes=len(model.class_mapping))
+    cascade.min_margin = float(np.median(cascade.predict(poses, min_margin=0.0)[3]))
+    model.cascade = cascade
+    return model, cascade
+
+async def test_bulk_sends_only_escalated_rows_to_the_model(static_model_handler):
+    handler = await static_model_handler(static_cache=None)
+    try:
+        poses = random_poses(64, seed=3)
+        model, cascade = await attach_fitted_cascade(handler, poses)
+        probabilities, indices, answered, _ = cascade.predict(poses)
+        assert 0 < answered.sum() < len(poses)
+
+        sent = []
+        run_bulk = handler._run_bulk
+
+        async def recording_run_bulk(bulk_model, inputs):
+            sent.append(inputs.copy())
+            return await run_bulk(bulk_model, inputs)
+
+        handler._run_bulk = recording_run_bulk
+        results = await handler.predict_static_sign_batch(poses.tolist())
+
+        assert len(sent) == 1 and len(sent[0]) == int((~answered).sum())
+        np.testing.assert_allclose(sent[0], poses[~answered], rtol=1e-6)
+        for position in np.flatnonzero(answered):
+            assert results[position]["result"]["index"] == int(indices[position])
+            assert abs(results[position]["result"]["confidence"] - float(probabilities[position, indices[position]])) < 1e-6
+        assert all(result["success"] for result in results)
+        assert cascade.stats()["answered"] == int(answered.sum())
+        assert cascade.stats()["escalated"] == int((~answered).sum())
+    finally:
+        await handler.shutdown()
+
+async def test_single_frames_only_reach_the_model_when_escalated(static_model_handler, monkeypatch):
+    monkeypatch.setattr(Config, "STATIC_CASCADE_AUDIT_RATE", 0.0)
+    handler = await static_model_handler(static_cache=None)
+    try:
+        poses = random_poses(32, seed=4)
+        model, cascade = await attach_fitted_cascade(handler, poses)
+        _, _, answered, _ = cascade.predict(poses)
+        submitted = []
+        submit = model.batcher.submit
+
+        async def recording_submit(item):
+            submitted.append(item)
+            return await submit(item)
+
+        model.batcher.submit = recording_submit
+        answer_confidences = []
+        for pose in poses:
+            result = await handler.predict_static_sign(pose)
+            answer_confidences.append(result["confidence"])
+        assert len(submitted) == int((~answered).sum())
+        # Both stages report on the same scale: no cascade answer is more confident than the model can be.
+        ceiling = softmax(np.eye(cascade.num_classes, dtype=np.float32)[0])[0]
+        assert max(answer_confidences) <= ceiling + 1e-6
+    finally:
+        await handler.shutdown()
@@ -0,0 +1,76 @@
+import hashlib
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from config import Config
+from handlers.upload_handler import UploadHandler
+from tests.support import multipart_body, streamed_request
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    uploads, temp = tmp_path / "uploads", tmp_path / "temp"
+    uploads.mkdir()
+    temp.mkdir()
+    monkeypatch.setattr(Config, "UPLOADS_DIR", str(uploads))
+    monkeypatch.setattr(Config, "TEMP_DIR", str(temp))
+    return uploads, temp
+
+def upload(data: bytes, content_type: str = "video/mp4", file_type: str = None, filename: str = "clip.MP4"):
+    parts = [("file", filename, content_type, data)]
+    if file_type is not None:
+        parts.append(("fileType", None, None, file_type.encode()))
+    return streamed_request(multipart_body(parts), path="/api/upload", chunk_size=1000)
+
+async def test_upload_is_stored_under_its_hash_in_a_single_write(storage, monkeypatch):
+    uploads, temp = storage
+    data = os.urandom(50_000)
+    hashes = []
+    sha256 = hashlib.sha256
+
+    def recording_sha256(*args):
+        digest = sha256(*args)
+        hashes.append(digest)
+        return digest
+
+    monkeypatch.setattr(hashlib, "sha256", recording_sha256)
+    result = await UploadHandler().handle_file_upload(upload(data, file_type="video"))
+
+    expected = sha256(data).hexdigest()
+    assert result["sha256"] == expected and result["size"] == len(data)
+    assert result["filename"] == f"{expected}.mp4" and result["type"] == "video"
+    assert (uploads / result["filename"]).read_bytes() == data
+    assert len(hashes) == 1
+    assert list(temp.iterdir()) == []
+
+async def test_identical_reupload_is_deduplicated(storage):
+    uploads, _ = storage
+    handler = UploadHandler()
+    first = await handler.handle_file_upload(upload(b"same bytes"))
+    second = await handler.handle_file_upload(upload(b"same bytes"))
+    assert not first["deduplicated"] and second["deduplicated"]
+    assert len(list(uploads.iterdir())) == 1
+
+async def test_oversized_upload_is_413_and_leaves_no_temp_file(storage, monkeypatch):
+    _, temp = storage
+    monkeypatch.setattr(Config, "MAX_FILE_SIZE_BYTES", 1000)
+    handler = UploadHandler()
+    with pytest.raises(HTTPException) as error:
+        await handler.handle_file_upload(upload(b"x" * 5000))
+    assert error.value.status_code == 413
+    assert list(temp.iterdir()) == [] and handler.uploads_in_progress == set()
+
+@pytest.mark.parametrize("content_type, file_type", [("text/plain", None), ("video/mp4", "image")])
+async def test_disallowed_types_are_400(storage, content_type, file_type):
+    uploads, temp = storage
+    with pytest.raises(HTTPException) as error:
+        await UploadHandler().handle_file_upload(upload(b"data", content_type=content_type, file_type=file_type))
+    assert error.value.status_code == 400
+    assert list(uploads.iterdir()) == [] and list(temp.iterdir()) == []
+
+async def test_body_without_a_file_is_400(storage):
+    request = streamed_request(multipart_body([("fileType", None, None, b"video")]), path="/api/upload")
+    with pytest.raises(HTTPException) as error:
+        await UploadHandler().handle_file_upload(request)
+    assert error.value.detail == "No file provided."
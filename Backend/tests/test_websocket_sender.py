@@ -0,0 +1,51 @@
+import asyncio
+
+from handlers import realtime_handler
+from handlers.realtime_handler import WebSocketSender
+
+class SlowSocket:
+    """Records frames and fails if a second send starts while one is in progress."""
+
+    def __init__(self):
+        self.frames = []
+        self.sending = False
+        self.closed = None
+
+    async def send_json(self, message):
+        assert not self.sending, "concurrent send on one socket"
+        self.sending = True
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.frames.append(message)
+        self.sending = False
+
+    async def close(self, code, reason):
+        assert not self.sending, "close during a send"
+        self.closed = (code, reason)
+
+async def test_concurrent_writers_never_overlap_on_one_socket():
+    socket = SlowSocket()
+    sender = WebSocketSender(socket)
+
+    async def writer(name):
+        for i in range(20):
+            await sender.send_json({"writer": name, "i": i})
+
+    await asyncio.gather(writer("relay"), writer("receive-loop"), writer("publish"), sender.close(1001, "Session ended"))
+    assert len(socket.frames) == 60
+    assert socket.closed == (1001, "Session ended")
+    for name in ("relay", "receive-loop", "publish"):
+        assert [frame["i"] for frame in socket.frames if frame["writer"] == name] == list(range(20))
+
+async def test_publish_update_goes_through_the_attached_sender():
+    socket = SlowSocket()
+    sender = realtime_handler.attach_websocket("ws-session", socket)
+    try:
+        await asyncio.gather(
+            realtime_handler.publish_update("ws-session", {"type": "letterDetected", "letter": "A"}),
+            sender.send_json({"type": "pong"}),
+        )
+        assert sorted(frame["type"] for frame in socket.frames) == ["letterDetected", "pong"]
+    finally:
+        realtime_handler.detach_websocket("ws-session", sender)
+    assert "ws-session" not in realtime_handler.session_websockets
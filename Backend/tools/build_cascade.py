@@ -0,0 +1,166 @@
+"""Builds the nearest-centroid first stage of the static cascade.
+
+One centroid per class is fitted on normalized landmarks. The cascade is
+then evaluated on a held-out split against the full static model. For each
+margin in --margins the report gives:
+
+- the escalation rate, i.e. the share of frames sent on to the full model;
+- the agreement of first-stage answers with the full model;
+- the end-to-end agreement, counting escalated frames as agreeing;
+- the accuracy against the labels, when the input has labels.
+
+The recommended margin is the smallest one whose first-stage agreement
+reaches --target-agreement. It is stored in the cascade metadata next to
+the sweep. At serving time the threshold is STATIC_CASCADE_MIN_MARGIN.
+
+The input is an ``.npz`` with a ``static`` array of shape (N, 63), e.g. the
+calibration file of tools.convert_tflite. An optional ``static_labels``
+array holds the class index of each frame. Without labels, the frames are
+labelled by the full model, so the first stage is distilled from it.
+
+The cascade is written to Config.MODELS_DIR as ``<h5 name>_cascade.npz``.
+With --update-manifest, the active version of the model gets a "cascade"
+entry pointing at it.
+
+Run from the Backend directory:
+
+    python -m tools.build_cascade --input calibration.npz --update-manifest
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+from config import Config
+from handlers.model_handler import ModelHandler
+from handlers.static_cascade import CentroidCascade
+
+def load_frames(path: str):
+    with np.load(path) as data:
+        frames = np.asarray(data["static"], dtype=np.float32).reshape(-1, Config.NUM_LANDMARK_FEATURES)
+        labels = np.asarray(data["static_labels"], dtype=np.int32) if "static_labels" in data else None
+    finite = np.isfinite(frames).all(axis=1)
+    return frames[finite], labels[finite] if labels is not None else None
+
+def full_model_predictions(model, preprocessor, frames: np.ndarray, chunk: int = 1024) -> np.ndarray:
+    indices = []
+    for start in range(0, len(frames), chunk):
+        batch, _ = preprocessor.static_batch(frames[start:start + chunk], model.normalize)
+        indices.append(np.asarray(model.engine(batch)[1], dtype=np.int32))
+    return np.concatenate(indices)
+
+def sweep(cascade: CentroidCascade, frames: np.ndarray, full_indices: np.ndarray, labels, margins):
+    _, cascade_indices, _, frame_margins = cascade.predict(frames, min_margin=0.0)
+    agrees = cascade_indices == full_indices
+
+    rows = []
+    for margin in margins:
+        answered = frame_margins >= margin
+        row = {
+            "margin": float(margin),
+            "escalationRate": float(1.0 - answered.mean()),
+            "firstStageAgreement": float(agrees[answered].mean()) if answered.any() else None,
+            "endToEndAgreement": float(1.0 - (answered & ~agrees).mean())
+        }
+        if labels is not None:
+            final = np.where(answered, cascade_indices, full_indices)
+            row["accuracy"] = float((final == labels).mean())
+        rows.append(row)
+    return rows
+
+def recommend(rows, target: float):
+    for row in rows:
+        if row["firstStageAgreement"] is not None and row["firstStageAgreement"] >= target:
+            return row
+    return None
+
+async def build(args):
+    model_handler = ModelHandler()
+    await model_handler.load_models()
+    model = await model_handler.registry.get(args.model or None, task="static")
+    frames, labels = load_frames(args.input)
+    print(f"Model: {model.name} v{model.version}, {len(frames)} frames, labels: {'file' if labels is not None else 'full model'}")
+
+    full_indices = full_model_predictions(model, model_handler.preprocessor, frames)
+    targets = labels if labels is not None else full_indices
+
+    order = np.random.default_rng(args.seed).permutation(len(frames))
+    held_out = order[:int(len(frames) * args.holdout)]
+    train = order[len(held_out):]
+
+    cascade = CentroidCascade.fit(frames[train], targets[train], num_classes=len(model.class_mapping))
+    rows = sweep(cascade, frames[held_out], full_indices[held_out],
+                 labels[held_out] if labels is not None else None, sorted(args.margins))
+
+    print(f"{'margin':>8} {'escalated':>10} {'1st-stage agree':>16} {'end-to-end agree':>17}" + (f" {'accuracy':>9}" if labels is not None else ""))
+    for row in rows:
+        first_stage = f"{row['firstStageAgreement']:.4f}" if row["firstStageAgreement"] is not None else "-"
+        line = f"{row['margin']:>8.2f} {row['escalationRate']:>10.2%} {first_stage:>16} {row['endToEndAgreement']:>17.4f}"
+        if labels is not None:
+            line += f" {row['accuracy']:>9.4f}"
+        print(line)
+
+    held_out_frames = frames[held_out][:args.timing_frames]
+    start = time.perf_counter()
+    cascade.predict(held_out_frames)
+    cascade_us = (time.perf_counter() - start) * 1e6 / max(len(held_out_frames), 1)
+    batch, _ = model_handler.preprocessor.static_batch(held_out_frames, model.normalize)
+    start = time.perf_counter()
+    model.engine(batch)
+    full_us = (time.perf_counter() - start) * 1e6 / max(len(held_out_frames), 1)
+    print(f"Per-frame cost in a batch of {len(held_out_frames)}: first stage {cascade_us:.1f} us, full model {full_us:.1f} us")
+
+    best = recommend(rows, args.target_agreement)
+    if best is None:
+        print(f"No margin reaches {args.target_agreement:.2%} first-stage agreement; keep the cascade disabled for {model.name}.")
+    else:
+        print(f"Recommended STATIC_CASCADE_MIN_MARGIN={best['margin']:.2f} "
+              f"({best['escalationRate']:.2%} escalated, {best['firstStageAgreement']:.4f} agreement)")
+
+    cascade.metadata = {
+        "model": model.name,
+        "version": model.version,
+        "samples": int(len(train)),
+        "heldOut": int(len(held_out)),
+        "labelSource": "file" if labels is not None else "model",
+        "temperature": cascade.temperature,
+        "recommendedMargin": best["margin"] if best is not None else None,
+        "sweep": rows,
+        "builtAt": int(time.time() * 1000)
+    }
+    file_name = args.output or f"{os.path.splitext(os.path.basename(model.path))[0]}_cascade.npz"
+    cascade.save(os.path.join(Config.MODELS_DIR, file_name))
+    print(f"Wrote {os.path.join(Config.MODELS_DIR, file_name)}")
+
+    if args.update_manifest:
+        registry = model_handler.registry
+        registry.manifest["models"][model.name]["versions"][model.version]["cascade"] = file_name
+        registry._write_manifest()
+        print(f"Manifest: {model.name} v{model.version} now uses {file_name}; reload the model to apply it.")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(cascade.metadata, f, indent=2)
+
+    await model_handler.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", required=True, help=".npz file with a 'static' array and optional 'static_labels'.")
+    parser.add_argument("--model", default="", help="Static model name; defaults to the manifest default.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of frames held out for evaluation.")
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--target-agreement", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timing-frames", type=int, default=256)
+    parser.add_argument("--output", default="", help="File name inside Config.MODELS_DIR.")
+    parser.add_argument("--update-manifest", action="store_true")
+    parser.add_argument("--report", default="", help="Also write the build metadata to this JSON file.")
+    asyncio.run(build(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Converts the models in the manifest to TFLite and compares them with Keras.
+
+For the active version of each model (the manifest defaults unless
+``--models`` is given) this writes float32, float16 and int8 variants into
+Config.TFLITE_MODELS_DIR, named ``<h5 name>_<variant>.tflite``. The int8
+variant is calibrated on a representative dataset. Then every variant is
+checked against the Keras model on an evaluation set, and the agreement,
+probability error, latency and file size are written to a JSON report.
+
+The calibration file is an ``.npz`` with a ``static`` array of shape
+(N, 63) and a ``dynamic`` array of shape (N, 30, 63), e.g. landmarks dumped
+from the training notebook. Without it, uniform random landmarks are used,
+which is only good enough for a smoke test.
+
+Run from the Backend directory:
+
+    python -m tools.convert_tflite --calibration calibration.npz --models landmark transformer
+"""
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+from config import Config
+from handlers.inference_engines import KerasEngine, TFLiteEngine, tflite_model_path
+from handlers.custom_layers import CUSTOM_OBJECTS
+
+VARIANTS = ("float32", "float16", "int8")
+
+def representative_dataset(samples: np.ndarray, limit: int = 200) -> Callable[[], Iterable]:
+    def generator():
+        for sample in samples[:limit]:
+            yield [sample[np.newaxis].astype(np.float32)]
+    return generator
+
+def convert(model, variant: str, calibration: np.ndarray) -> bytes:
+    recurrent = any(isinstance(layer, tf.keras.layers.RNN) for layer in model.layers)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(calibration)
+    if recurrent:
+        # Some recurrent layers only lower to TFLite builtins partially.
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        converter._experimental_lower_tensor_list_ops = False
+    return converter.convert()
+
+def latency(engine, samples: np.ndarray, iterations: int) -> Dict[str, float]:
+    engine(samples[:1])
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        engine(samples[i % len(samples)][np.newaxis])
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": float(np.percentile(timings, 50)), "p99_ms": float(np.percentile(timings, 99))}
+
+def compare(reference: Tuple[np.ndarray, np.ndarray], candidate: Tuple[np.ndarray, np.ndarray]) -> Dict[str, float]:
+    return {
+        "top1_agreement": float(np.mean(reference[1] == candidate[1])),
+        "max_abs_prob_diff": float(np.abs(reference[0] - candidate[0]).max()),
+        "mean_abs_prob_diff": float(np.abs(reference[0] - candidate[0]).mean())
+    }
+
+def load_samples(path: str, num_samples: int) -> Dict[str, np.ndarray]:
+    if path:
+        data = np.load(path)
+        return {"static": data["static"].astype(np.float32), "dynamic": data["dynamic"].astype(np.float32)}
+
+    print("No calibration set given; using random landmarks. Accuracy numbers are only a smoke test.")
+    rng = np.random.default_rng(0)
+    return {
+        "static": rng.random((num_samples, Config.NUM_LANDMARK_FEATURES), dtype=np.float32),
+        "dynamic": rng.random((num_samples, Config.NUM_FRAMES_VIDEO, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calibration", help="Path to an .npz file with 'static' and 'dynamic' landmark arrays.")
+    parser.add_argument("--samples", type=int, default=256, help="Random samples to use when no calibration set is given.")
+    parser.add_argument("--iterations", type=int, default=200, help="Single-item predictions per latency measurement.")
+    parser.add_argument("--models", nargs="+", help="Manifest model names to convert. Defaults to the default models.")
+    parser.add_argument("--report", default=os.path.join(Config.TFLITE_MODELS_DIR, "report.json"))
+    args = parser.parse_args()
+
+    os.makedirs(Config.TFLITE_MODELS_DIR, exist_ok=True)
+    samples = load_samples(args.calibration, args.samples)
+
+    with open(Config.MODEL_MANIFEST_PATH, "r") as f:
+        manifest = json.load(f)
+
+    report = {}
+    for name in args.models or list(manifest["defaults"].values()):
+        entry = manifest["models"][name]
+        spec = entry["versions"][entry["active"]]
+        h5_path = os.path.join(Config.MODELS_DIR, spec["path"])
+        input_shape = tuple(spec["inputShape"])
+        task_samples = samples[entry["task"]]
+
+        model = tf.keras.models.load_model(
+            h5_path,
+            custom_objects={layer: CUSTOM_OBJECTS[layer] for layer in spec.get("customObjects", [])}
+        )
+        keras_engine = KerasEngine(model, input_shape)
+        reference = keras_engine(task_samples)
+        report[name] = {
+            "keras": {
+                "size_bytes": os.path.getsize(h5_path),
+                **latency(keras_engine, task_samples, args.iterations)
+            }
+        }
+
+        for variant in VARIANTS:
+            output_path = tflite_model_path(h5_path, variant)
+            with open(output_path, "wb") as f:
+                f.write(convert(model, variant, task_samples))
+
+            engine = TFLiteEngine(output_path, input_shape)
+            report[name][variant] = {
+                "path": output_path,
+                "size_bytes": os.path.getsize(output_path),
+                **compare(reference, engine(task_samples)),
+                **latency(engine, task_samples, args.iterations)
+            }
+            print(f"Wrote {output_path}")
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'model':<13}{'engine':<9}{'size (KB)':>11}{'top-1 agree':>13}{'max |dp|':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for name, engines in report.items():
+        for engine_name, stats in engines.items():
+            agreement = f"{stats['top1_agreement']:.4f}" if "top1_agreement" in stats else "-"
+            max_diff = f"{stats['max_abs_prob_diff']:.2e}" if "max_abs_prob_diff" in stats else "-"
+            print(f"{name:<13}{engine_name:<9}{stats['size_bytes'] / 1024:>11.1f}{agreement:>13}{max_diff:>10}"
+                  f"{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+    print(f"\nReport written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
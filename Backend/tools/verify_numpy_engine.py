@@ -0,0 +1,108 @@
+"""Checks the NumPy engine against the Keras engine for a Dense-only model.
+
+Checks:
+
+- The NumPy engine is built in a fresh interpreter, which must end up
+  without TensorFlow imported.
+- The max |dp| between the two engines' probabilities must stay within
+  --tolerance, and both engines must pick the same class for every sample.
+
+Latency at batch size 1 and at --batch-size is reported for both engines.
+
+The input file is an ``.npy`` array of shape (N, 63), or an ``.npz`` with a
+``static`` array (the calibration file of tools.convert_tflite). Without it,
+uniform random landmarks are used.
+
+Run from the Backend directory:
+
+    python -m tools.verify_numpy_engine --model landmark --input calibration.npz
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from config import Config
+from handlers.inference_engines import NumpyEngine
+
+IMPORT_CHECK = """
+import sys
+from handlers.model_handler import ModelHandler
+engine = ModelHandler._build_engine(sys.argv[1], (int(sys.argv[2]),), [], "numpy")
+engine(__import__("numpy").zeros((1, int(sys.argv[2])), dtype="float32"))
+print("tensorflow" in sys.modules)
+"""
+
+def load_samples(path: str, count: int, seed: int) -> np.ndarray:
+    if not path:
+        rng = np.random.default_rng(seed)
+        return rng.random((count, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+    data = np.load(path)
+    samples = data["static"] if path.endswith(".npz") else data
+    return np.asarray(samples[:count], dtype=np.float32)
+
+def imports_tensorflow(path: str, num_features: int) -> bool:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK, path, str(num_features)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return output.strip().splitlines()[-1] == "True"
+
+def latency_ms(engine, batch: np.ndarray, iterations: int) -> float:
+    engine(batch)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        engine(batch)
+    return (time.perf_counter() - start) * 1000 / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="landmark")
+    parser.add_argument("--input", default="", help=".npy or .npz file of evaluation samples.")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    parser.add_argument("--batch-size", type=int, default=Config.INFERENCE_MAX_BATCH_SIZE)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with open(Config.MODEL_MANIFEST_PATH, "r") as f:
+        entry = json.load(f)["models"][args.model]
+    spec = entry["versions"][entry["active"]]
+    path = os.path.join(Config.MODELS_DIR, spec["path"])
+    input_shape = tuple(spec["inputShape"])
+
+    tensorflow_loaded = imports_tensorflow(path, input_shape[0])
+    print(f"Model: {args.model} v{entry['active']} ({path})")
+    print(f"TensorFlow imported by a NumPy-only worker: {tensorflow_loaded}")
+
+    import tensorflow as tf
+    from handlers.inference_engines import KerasEngine
+
+    numpy_engine = NumpyEngine.from_h5(path, input_shape)
+    keras_engine = KerasEngine(tf.keras.models.load_model(path, compile=False), input_shape)
+
+    samples = load_samples(args.input, args.count, args.seed)
+    numpy_probabilities, numpy_indices = numpy_engine(samples)
+    keras_probabilities, keras_indices = keras_engine(samples)
+    max_diff = float(np.abs(numpy_probabilities - keras_probabilities).max())
+    mismatches = int((numpy_indices != keras_indices).sum())
+
+    print(f"Max |dp| vs Keras: {max_diff:.2e} (tolerance {args.tolerance:.0e})")
+    print(f"Class mismatches vs Keras: {mismatches}/{len(samples)}")
+    for batch_size in sorted({1, args.batch_size}):
+        batch = samples[:batch_size]
+        print(f"Batch {len(batch):>4}: keras {latency_ms(keras_engine, batch, args.iterations):.3f} ms, "
+              f"numpy {latency_ms(numpy_engine, batch, args.iterations):.3f} ms")
+
+    failed = tensorflow_loaded or max_diff > args.tolerance or mismatches
+    print("FAILED" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Checks streaming LSTM inference against ModelHandler.predict_dynamic_sign.
+
+Each evaluation sequence of NUM_FRAMES_VIDEO frames is streamed through
+the NumPy stepper one frame at a time, with all sequences advancing
+together as one batch per timestep, exactly as concurrent sessions do.
+Checks:
+
+- After the last frame, the streamed probabilities must match the full-sequence
+  engine within --tolerance, and must give the same class and confidence as
+  predict_dynamic_sign.
+- After every earlier frame, the rolling probabilities must match the Keras
+  model run on the unpadded prefix within --prefix-tolerance, with the same
+  class. These rolling predictions are what the realtime path publishes.
+- Stepping each sequence alone must give the same result as the batched run.
+
+Informational only, not a pass/fail check: the rolling prediction at each
+earlier frame is compared with predict_dynamic_sign on the zero-padded prefix.
+These can legitimately differ, because the full model keeps stepping through
+the padding.
+
+Per-frame step cost is reported next to full-sequence inference.
+
+The input file is an ``.npy`` array of shape (N, 30, 63), or an ``.npz`` with
+such a ``dynamic`` array (the calibration file of tools.convert_tflite).
+Without it, uniform random landmarks are used.
+
+Run from the Backend directory:
+
+    python -m tools.verify_streaming_lstm --model lstm --input calibration.npz
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from config import Config
+from handlers.model_handler import ModelHandler
+from handlers.inference_engines import softmax
+from handlers.streaming_lstm import load_stepper
+
+def keras_model_of(model):
+    keras_model = getattr(model.engine, "model", None)
+    if keras_model is None:
+        import tensorflow as tf
+        keras_model = tf.keras.models.load_model(model.path, compile=False)
+    return keras_model
+
+def prefix_divergence(keras_model, sequences: np.ndarray, rolling: np.ndarray):
+    """Max |dp| and top-1 mismatches of the rolling outputs against the model on each unpadded prefix."""
+    max_diff, mismatches = 0.0, 0
+    for t in range(sequences.shape[1]):
+        reference = softmax(np.asarray(keras_model(sequences[:, :t + 1], training=False), dtype=np.float32))
+        max_diff = max(max_diff, float(np.abs(rolling[:, t] - reference).max()))
+        mismatches += int((rolling[:, t].argmax(axis=-1) != reference.argmax(axis=-1)).sum())
+    return max_diff, mismatches
+
+def load_sequences(path: str, count: int, seed: int) -> np.ndarray:
+    if not path:
+        rng = np.random.default_rng(seed)
+        return rng.random((count, Config.NUM_FRAMES_VIDEO, Config.NUM_LANDMARK_FEATURES), dtype=np.float32)
+    data = np.load(path)
+    sequences = data["dynamic"] if path.endswith(".npz") else data
+    return np.asarray(sequences[:count], dtype=np.float32)
+
+async def verify(args) -> int:
+    model_handler = ModelHandler()
+    await model_handler.load_models()
+    model = await model_handler.registry.get(args.model, task="dynamic")
+    stepper = load_stepper(model)
+    sequences = model_handler.preprocessor.sequence_batch(load_sequences(args.input, args.count, args.seed), model.normalize)
+    print(f"Model: {model.name} v{model.version}, {len(sequences)} sequences, state of {stepper.state_size} floats per stream")
+
+    start = time.perf_counter()
+    rolling = stepper.run_sequences(sequences)
+    step_ms = (time.perf_counter() - start) * 1000 / sequences.shape[1]
+    streamed = rolling[:, -1]
+
+    full_probabilities, full_indices = model.engine(sequences)
+    max_diff = float(np.abs(streamed - full_probabilities).max())
+
+    prefix_diff, prefix_mismatches = prefix_divergence(keras_model_of(model), sequences, rolling)
+
+    mismatches = 0
+    prefix_agreement = []
+    for i, sequence in enumerate(sequences):
+        result = await model_handler.predict_dynamic_sign(sequence, model_choice=model.name)
+        streamed_index = int(streamed[i].argmax())
+        if result["index"] != streamed_index or abs(result["confidence"] - float(streamed[i, streamed_index])) > args.tolerance:
+            mismatches += 1
+
+        if i < args.prefix_checks:
+            for t in range(Config.REALTIME_MIN_SEQUENCE_FRAMES, sequences.shape[1]):
+                prefix_result = await model_handler.predict_dynamic_sign(sequence[:t + 1], model_choice=model.name)
+                prefix_agreement.append(prefix_result["index"] == int(rolling[i, t].argmax()))
+
+    single = np.stack([stepper.run_sequences(sequence[np.newaxis])[0, -1] for sequence in sequences[:args.prefix_checks or 1]])
+    batch_diff = float(np.abs(single - streamed[:len(single)]).max())
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        model.engine(sequences[:1])
+    full_ms = (time.perf_counter() - start) * 1000 / args.iterations
+
+    start = time.perf_counter()
+    state = stepper.initial_state(1)
+    for i in range(args.iterations):
+        _, state = stepper.step(sequences[0, i % sequences.shape[1]][np.newaxis], state)
+    single_step_ms = (time.perf_counter() - start) * 1000 / args.iterations
+
+    print(f"Final-frame max |dp| vs full sequence: {max_diff:.2e} (tolerance {args.tolerance:.0e})")
+    print(f"Class/confidence mismatches vs predict_dynamic_sign: {mismatches}/{len(sequences)}")
+    print(f"Rolling max |dp| vs unpadded prefixes: {prefix_diff:.2e} (tolerance {args.prefix_tolerance:.0e}), "
+          f"top-1 mismatches: {prefix_mismatches}/{rolling.shape[0] * rolling.shape[1]}")
+    print(f"Batched vs single-stream max |dp|: {batch_diff:.2e}")
+    if prefix_agreement:
+        print(f"Rolling top-1 agreement with padded prefixes (informational): {np.mean(prefix_agreement):.4f}")
+    print(f"Full-sequence inference: {full_ms:.3f} ms; one streaming step: {single_step_ms:.3f} ms (1 stream), "
+          f"{step_ms:.3f} ms ({len(sequences)} streams batched)")
+
+    await model_handler.shutdown()
+    failed = max_diff > args.tolerance or mismatches or batch_diff > args.tolerance \
+        or prefix_diff > args.prefix_tolerance or prefix_mismatches
+    print("FAILED" if failed else "OK")
+    return 1 if failed else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=Config.REALTIME_STREAMING_MODEL or "lstm")
+    parser.add_argument("--input", default="", help=".npy or .npz file of evaluation sequences.")
+    parser.add_argument("--count", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--prefix-tolerance", type=float, default=1e-4,
+                        help="Max |dp| of every rolling prediction against the model on the unpadded prefix.")
+    parser.add_argument("--prefix-checks", type=int, default=8, help="Sequences used for the padded-prefix and single-stream checks.")
+    parser.add_argument("--iterations", type=int, default=200)
+    sys.exit(asyncio.run(verify(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()